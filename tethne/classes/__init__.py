@@ -6,7 +6,13 @@ bibliographic data in Tethne.
 
    paper
    corpus
+   duplicates
    feature
    graphcollection
+   storage
+   symbols
+   table
+   view
+   window
 
 """
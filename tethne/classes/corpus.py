@@ -2,21 +2,47 @@
 A :class:`.Corpus` is a container for :class:`.Paper`\s.
 """
 
-from collections import Counter, defaultdict
-from itertools import chain
+from collections import Counter, defaultdict, OrderedDict
 import hashlib
 import copy
-from math import log
+from math import log, ceil
 
 from tethne.classes.feature import FeatureSet, Feature, \
                                    StructuredFeatureSet, StructuredFeature
-from tethne.utilities import _iterable, argsort
+from tethne.classes.duplicates import DuplicateDetector
+from tethne.classes.paper import Paper
+from tethne.classes.storage import save_corpus, load_corpus
+from tethne.classes.table import PaperTable
+from tethne.classes.window import FeatureDateIndex, FeatureCube, \
+                                  window_ranges
+from tethne.utilities import _iterable, argsort, _parallel_imap
 
 import sys
 import os
 PYTHON_3 = sys.version_info[0] == 3
 if PYTHON_3:
     unicode = str
+    xrange = range
+
+
+_MISSING = object()
+"""Sentinel for attributes that a :class:`.Paper` does not have."""
+
+
+def _index_shard(job):
+    """
+    Index a shard of :class:`.Paper`\s in a worker process (see
+    :meth:`.Corpus.add_papers`\).
+
+    Returns
+    -------
+    tuple
+        ``(indices, indices_lookup, features)`` for the shard.
+    """
+    papers, index_by, index_fields, index_features = job
+    corpus = Corpus(papers, index_by=index_by, index_fields=list(index_fields),
+                    index_features=list(index_features))
+    return dict(corpus.indices), dict(corpus.indices_lookup), corpus.features
 
 
 def _tfidf(f, c, C, DC, N):
@@ -40,6 +66,7 @@ class Corpus(object):
        :nosignatures:
 
        distribution
+       duplicate_papers
        feature_distribution
        features
        index
@@ -167,6 +194,7 @@ class Corpus(object):
 
     index_class = dict
     index_kwargs = {}
+    columnar = False
     indexed_papers = {}
     """
     The primary index for :class:`.Paper`\s in a :class:`.Corpus` instance.
@@ -174,6 +202,22 @@ class Corpus(object):
     instances.
     """
 
+    manifest = None
+    """
+    A :class:`.Manifest` of the data files that have been ingested, if the
+    :class:`.Corpus` was built by :func:`tethne.readers.read`\. Used by
+    :func:`tethne.readers.update`\.
+    """
+
+    symbols = None
+    """
+    The :class:`.SymbolTable` in which readers interned the values of repeated
+    fields (journals, author names, etc)\. :func:`tethne.readers.update`
+    uses the same table.
+    """
+
+    _feature_indices = None     # Built from featuresets and the date index.
+
     features = {}
     """
     Contains :class:`.FeatureSet`\s for a :class:`.Corpus` instance.
@@ -228,13 +272,32 @@ class Corpus(object):
 
     def __init__(self, papers=[], index_by=None,
                  index_fields=['authors', 'citations', 'ayjid', 'date'],
-                 index_features=['authors', 'citations'], **kwargs):
+                 index_features=['authors', 'citations'], deduplicate=False,
+                 duplicate_threshold=0.8, columnar=False, processes=1,
+                 **kwargs):
         """
         Parameters
         ----------
         paper : list
         index_by : str
         index_fields : str or iterable of strs
+        deduplicate : str
+            (default: False) If ``'report'``\, near-duplicate :class:`.Paper`\s
+            (with similar titles and author names, but different keys) are
+            recorded in :attr:`.duplicate_papers` as they are indexed. If
+            ``'collapse'``\, they are also left out of the :class:`.Corpus`\.
+            See :class:`.DuplicateDetector`\.
+        duplicate_threshold : float
+            (default: 0.8) Similarity above which two :class:`.Paper`\s are
+            considered near-duplicates.
+        columnar : bool
+            (default: False) If True, :class:`.Paper` data are stored in a
+            :class:`.PaperTable`\, which uses much less memory than separate
+            :class:`.Paper` objects. :attr:`.indexed_papers` then yields
+            :class:`.PaperView`\s.
+        processes : int
+            (default: 1) Number of processes with which to build the indices.
+            See :meth:`.add_papers`\.
         kwargs : kwargs
 
         """
@@ -244,6 +307,12 @@ class Corpus(object):
         self.indices = {}
         self.features = {}
         self.duplicate_papers = {}
+        if deduplicate not in [False, None, 'report', 'collapse']:
+            raise ValueError('deduplicate must be "report" or "collapse"')
+        self.deduplicate = deduplicate
+        self.duplicate_detector = None
+        if deduplicate:
+            self.duplicate_detector = DuplicateDetector(duplicate_threshold)
         self.indices = defaultdict(dict)
         self.indices_lookup = defaultdict(dict)
         if index_by not in index_fields:
@@ -251,7 +320,10 @@ class Corpus(object):
         self.index_fields = index_fields
         self.index_features = index_features
 
-        if self.index_class is dict:
+        self.columnar = columnar
+        if columnar:
+            self.indexed_papers = PaperTable()
+        elif self.index_class is dict:
             self.indexed_papers = {}
         else:
             self.indexed_papers = self.index_class(**self.index_kwargs)
@@ -259,37 +331,144 @@ class Corpus(object):
             if field not in self.features:
                 self._init_featureset(field)
 
-        for paper in papers:
-            self._index_paper(paper)
+        self.add_papers(papers, processes=processes)
+
+    def add_papers(self, papers, processes=1):
+        """
+        Index ``papers``\.
+
+        Each :class:`.Paper`\'s key is computed once, and its values are
+        added to all of the :attr:`.indices` and :attr:`.features` in a single
+        pass.
+
+        Parameters
+        ----------
+        papers : iterable
+            :class:`.Paper`\s.
+        processes : int
+            (default: 1) If greater than 1, ``papers`` are split into that
+            many shards, which are indexed in parallel worker processes and
+            then merged. The result is the same as indexing them in one
+            process. Not used if near-duplicates are detected (see
+            ``deduplicate``\), since that depends on the order of
+            :class:`.Paper`\s.
+        """
+        self._feature_indices = None
+        if processes > 1 and self.duplicate_detector is None:
+            self._index_papers_parallel(list(papers), processes)
+            return
 
-    def add_papers(self, papers):
         for paper in papers:
             self._index_paper(paper)
 
+    def remove_papers(self, keys):
+        """
+        Remove :class:`.Paper`\s from the :class:`.Corpus`\, along with their
+        entries in :attr:`.indices` and :attr:`.features`\.
+
+        Parameters
+        ----------
+        keys : iterable
+            Primary index values of the :class:`.Paper`\s to remove. Keys that
+            are not in the :class:`.Corpus` are ignored.
+        """
+        self._feature_indices = None
+        for key in keys:
+            self._unindex_paper(key)
+
     def __len__(self):
         return len(self.indexed_papers)
 
-    def _index_paper(self, paper):
-        key = self._generate_index(paper)
-
-        # if key not in self.indexed_papers.keys():
+    def _index_paper(self, paper, key=None):
+        if key is None:
+            key = self._generate_index(paper)
+
+        # A Paper with the same key is replaced, rather than counted twice in
+        #  indices and features.
+        if key in self.indexed_papers:
+            self._unindex_paper(key)
+
+        if self.duplicate_detector is not None:
+            signature = self.duplicate_detector.signature(paper)
+            matches = self.duplicate_detector.query(paper, signature)
+            if matches:     # Only the first Paper in a group is matched.
+                self._record_duplicate(matches[0], key)
+                if self.deduplicate == 'collapse':
+                    return
+            else:
+                self.duplicate_detector.add(key, paper, signature)
 
         self.indexed_papers[key] = paper
         for field in self.index_fields:
             if field:
-                self.index_paper_by_attr(paper, field)
+                value = getattr(paper, field, _MISSING)
+                if value is not _MISSING:
+                    self._index_value(key, field, value)
         for field in self.index_features:
             if field:
-                self.index_paper_by_feature(paper, field)
-        # else:
-        #     if not self.duplicate_papers:
-        #         self.duplicate_papers = {key:2}
-        #     else:
-        #         if key not in self.duplicate_papers.keys():
-        #             count = 1
-        #         else:
-        #             count = self.duplicate_papers[key]
-        #         self.duplicate_papers.update({self._generate_index(paper): count+1})
+                self._index_feature(key, paper, field)
+
+    def _index_papers_parallel(self, papers, processes):
+        """
+        Index ``papers`` in ``processes`` shards, in worker processes, and
+        merge the results in shard order.
+        """
+        # Papers with the same key replace one another, in order, so these
+        #  are resolved before sharding.
+        keyed = OrderedDict()
+        for paper in papers:
+            key = self._generate_index(paper)
+            if key in keyed or key in self.indexed_papers:
+                self._unindex_paper(key)
+                keyed.pop(key, None)
+            keyed[key] = paper
+        if not keyed:
+            return
+
+        size = int(ceil(len(keyed) / float(processes)))
+        items = list(keyed.items())
+        jobs = [([paper for key, paper in items[i:i + size]], self.index_by,
+                 self.index_fields, self.index_features)
+                for i in xrange(0, len(items), size)]
+
+        for (indices, indices_lookup, features), i \
+                in zip(_parallel_imap(_index_shard, jobs, processes),
+                       xrange(0, len(items), size)):
+            for key, paper in items[i:i + size]:
+                self.indexed_papers[key] = paper
+            for attr, index in indices.iteritems():
+                for value, keys in index.iteritems():
+                    if value not in self.indices[attr]:
+                        self.indices[attr][value] = []
+                    self.indices[attr][value].extend(keys)
+            self.indices_lookup.update(indices_lookup)
+            for name, featureset in features.iteritems():
+                self.features[name].update(featureset)
+
+    def _record_duplicate(self, key, duplicate_key):
+        """
+        Record that the :class:`.Paper` indexed as ``duplicate_key`` duplicates
+        the one already indexed as ``key``\.
+        """
+        if key not in self.duplicate_papers:
+            self.duplicate_papers[key] = []
+        self.duplicate_papers[key].append(duplicate_key)
+
+    def _unindex_paper(self, key):
+        if key not in self.indexed_papers:
+            return
+
+        del self.indexed_papers[key]
+        if self.duplicate_detector is not None:
+            self.duplicate_detector.remove(key)
+        for attr, values in self.indices_lookup.pop(key, {}).iteritems():
+            for v_ in values:
+                self.indices[attr][v_].remove(key)
+                if not self.indices[attr][v_]:
+                    del self.indices[attr][v_]
+        for featureset in self.features.values():
+            if key in featureset.features:
+                featureset.remove(key)
 
     def _generate_index(self, paper):
         """
@@ -333,23 +512,32 @@ class Corpus(object):
 
         self.features[feature_name] = fsclass()
 
-    def index_paper_by_feature(self, paper, feature_name, tokenize=lambda x: x,
+    def index_paper_by_feature(self, paper, feature_name, tokenize=None,
                                structured=False):
         if not feature_name:
             return
+        self._index_feature(self._generate_index(paper), paper, feature_name,
+                            tokenize, structured)
 
-        if structured:
-            fclass = StructuredFeature
-        else:
-            fclass = Feature
+    def _index_feature(self, key, paper, feature_name, tokenize=None,
+                       structured=False):
+        """
+        Add the value of ``feature_name`` for ``paper`` to its featureset.
 
-        if hasattr(paper, feature_name):
-            i = self._generate_index(paper)
-            feature = fclass(tokenize(copy.deepcopy(getattr(paper, feature_name))))
+        ``tokenize`` must not modify the value that it is passed.
+        """
+        value = getattr(paper, feature_name, _MISSING)
+        if value is _MISSING:
+            return
 
-            self.features[feature_name].add(i, feature)
+        fclass = StructuredFeature if structured else Feature
+        if tokenize is not None:
+            value = tokenize(value)
+        if type(value) is not fclass:   # Features (e.g. authors) are shared.
+            value = fclass(value)
+        self.features[feature_name].add(key, value)
 
-    def index_feature(self, feature_name, tokenize=lambda x: x, structured=False):
+    def index_feature(self, feature_name, tokenize=None, structured=False):
         """
         Creates a new :class:`.FeatureSet` from the attribute ``feature_name``
         in each :class:`.Paper`\.
@@ -372,27 +560,35 @@ class Corpus(object):
         if not attr:
             return
 
-        if hasattr(paper, attr):
-            value = copy.deepcopy(getattr(paper, attr))
-            for v in _iterable(value):
-                if type(value) is Feature:
-                    v_ = v[:-1]
-                else:
-                    v_ = v
+        value = getattr(paper, attr, _MISSING)
+        if value is not _MISSING:
+            self._index_value(i, attr, value)
+
+    def _index_value(self, i, attr, value):
+        """
+        Index the :class:`.Paper` with key ``i`` by ``value``\, the value of
+        its attribute ``attr``\. ``value`` is not modified, so it is not
+        copied.
+        """
+        for v in _iterable(value):
+            if type(value) is Feature:
+                v_ = v[:-1]
+            else:
+                v_ = v
 
-                if hasattr(v_, '__iter__'):
-                    if len(v_) == 1:
-                        t = type(v_[0])
-                        v_ = t(v_[0])
+            if hasattr(v_, '__iter__'):
+                if len(v_) == 1:
+                    t = type(v_[0])
+                    v_ = t(v_[0])
 
-                if v_ not in self.indices[attr]:
-                    self.indices[attr][v_] = []
-                self.indices[attr][v_].append(i)
+            if v_ not in self.indices[attr]:
+                self.indices[attr][v_] = []
+            self.indices[attr][v_].append(i)
 
-                # For more efficient lookup later.
-                if attr not in self.indices_lookup[i]:
-                    self.indices_lookup[i][attr] = []
-                self.indices_lookup[i][attr].append(v_)
+            # For more efficient lookup later.
+            if attr not in self.indices_lookup[i]:
+                self.indices_lookup[i][attr] = []
+            self.indices_lookup[i][attr].append(v_)
 
     def index(self, attr):
         """
@@ -408,6 +604,16 @@ class Corpus(object):
 
         """
 
+        if attr == 'date':
+            self._feature_indices = None
+
+        # Fields in a PaperTable can be scanned without building Papers.
+        if isinstance(self.indexed_papers, PaperTable) \
+                and not hasattr(Paper, attr):
+            for i, value in self.indexed_papers.iter_column(attr):
+                self._index_value(i, attr, value)
+            return
+
         for i, paper in self.indexed_papers.iteritems():
             self.index_paper_by_attr(paper, attr)
 
@@ -514,7 +720,7 @@ class Corpus(object):
         return papers
 
     def slice(self, window_size=1, step_size=1, cumulative=False,
-              count_only=False, subcorpus=True, feature_name=None):
+              count_only=False, subcorpus=True, feature_name=None, view=True):
         """
         Returns a generator that yields ``(key, subcorpus)`` tuples for
         sequential time windows.
@@ -561,6 +767,13 @@ class Corpus(object):
             (default: 1) Size of the time window, in years.
         step_size : int
             (default: 1) Number of years to advance window at each step.
+        view : bool
+            (default: True) If True, subcorpora are :class:`.CorpusView`\s,
+            which share the data of this :class:`.Corpus` rather than indexing
+            their :class:`.Paper`\s again. Views are read-only, except that
+            indices and featuresets created through a view are built on this
+            :class:`.Corpus`\. If False, each subcorpus is a new
+            :class:`.Corpus`\.
 
         Returns
         -------
@@ -573,24 +786,17 @@ class Corpus(object):
         start = min(self.indices['date'].keys())
         end = max(self.indices['date'].keys())
 
-        while start <= end - (window_size - 1):
-            selector = ('date', range(start, start + window_size, 1))
-            if cumulative:
-                year = start + window_size
-            else:
-                year = start
+        for year, years in window_ranges(start, end, window_size, step_size,
+                                         cumulative):
+            selector = ('date', years)
             if count_only:
                 yield year, len(self.select(selector))
             elif feature_name:
                 yield year, self.subfeatures(selector, feature_name)
             elif subcorpus:
-                yield year, self.subcorpus(selector)
+                yield year, self.subcorpus(selector, view=view)
             else:
                 yield year, self.select(selector)
-            if cumulative:
-                window_size += step_size
-            else:
-                start += step_size
 
     def distribution(self, **slice_kwargs):
         """
@@ -656,33 +862,78 @@ class Corpus(object):
         list
         """
 
-        values = []
-        keys = []
-        fset = self.features[featureset_name]
-
-        for key, papers in self.slice(subcorpus=False, **slice_kwargs):
-            allfeatures = [v for v
-                           in chain(*[fset.features[self._generate_index(p)]
-                                      for p in papers
-                                      if self._generate_index(p)
-                                      in fset.features])]
-
-            if len(allfeatures) < 1:
-                keys.append(key)
-                values.append(0.)
-                continue
-
-            count = 0.
-            for elem, v in allfeatures:
-                if elem != feature:
-                    continue
-                if mode == 'counts':
-                    count += v
-                else:
-                    count += 1.
-            values.append(count)
-            keys.append(key)
-        return keys, values
+        index = self._feature_index(FeatureDateIndex, featureset_name)
+        return index.distribution(feature, mode, **slice_kwargs)
+
+    def feature_distributions(self, featureset_name, features, mode='counts',
+                              **slice_kwargs):
+        """
+        Calculates the distributions of several features across slices of the
+        corpus, as in :meth:`.feature_distribution`\.
+
+        Examples
+        --------
+        .. code-block:: python
+
+           >>> keys, values = corpus.feature_distributions('citations', \
+           ...                      ['DOLE RJ 1965 CELL', 'LEVIN SA 1992 ECOLOGY'])
+           >>> values['DOLE RJ 1965 CELL']
+           [2, 15, 25, 1]
+
+        Parameters
+        ----------
+        featureset_name : str
+            Name of a :class:`.FeatureSet` in the :class:`.Corpus`\.
+        features : iterable
+            Names of the specific features of interest.
+        mode : str
+            (default: ``'counts'``) ``'counts'`` or ``'documentCounts'``\; see
+            :meth:`.feature_distribution`\.
+        slice_kwargs : kwargs
+            Keyword arguments to be passed to :meth:`.Corpus.slice`\.
+
+        Returns
+        -------
+        tuple
+            ``(keys, values)``\, where ``values`` is a ``dict`` mapping each
+            feature onto a list.
+        """
+        index = self._feature_index(FeatureDateIndex, featureset_name)
+        return index.distributions(features, mode, **slice_kwargs)
+
+    def feature_cube(self, featureset_name):
+        """
+        The :class:`.FeatureCube` (year-by-element counts) for a featureset.
+
+        Parameters
+        ----------
+        featureset_name : str
+            Name of a :class:`.FeatureSet` in the :class:`.Corpus`\.
+
+        Returns
+        -------
+        :class:`.FeatureCube`
+        """
+        return self._feature_index(FeatureCube, featureset_name)
+
+    def _feature_index(self, index_class, featureset_name):
+        """
+        The ``index_class`` (:class:`.FeatureDateIndex` or
+        :class:`.FeatureCube`\) for ``featureset_name``\. It is built on first
+        use, and again if the featureset or the :class:`.Paper`\s change.
+        """
+        # Indexing 'date' resets the cache, so it must come first.
+        if 'date' not in self.indices:
+            self.index('date')
+        if self._feature_indices is None:
+            self._feature_indices = {}
+        featureset = self.features[featureset_name]
+        index = self._feature_indices.get((index_class, featureset_name))
+        if index is None or index.featureset is not featureset \
+                or index.N_documents != featureset.N_documents:
+            index = index_class(self, featureset_name)
+            self._feature_indices[(index_class, featureset_name)] = index
+        return index
 
     def top_features(self, featureset_name, topn=20, by='counts',
                      perslice=False, slice_kwargs={}):
@@ -708,8 +959,8 @@ class Corpus(object):
         """
 
         if perslice:
-            return [(k, subcorpus.features[featureset_name].top(topn, by=by))
-                    for k, subcorpus in self.slice(**slice_kwargs)]
+            cube = self.feature_cube(featureset_name)
+            return cube.slice_top(topn, by=by, **slice_kwargs)
         return self.features[featureset_name].top(topn, by=by)
 
     def subfeatures(self, selector, featureset_name):
@@ -720,7 +971,7 @@ class Corpus(object):
                            if k in indices})
 
 
-    def subcorpus(self, selector):
+    def subcorpus(self, selector, view=False):
         """
         Generates a new :class:`.Corpus` using the criteria in ``selector``.
 
@@ -733,10 +984,62 @@ class Corpus(object):
            >>> subcorpus
            <tethne.classes.corpus.Corpus object at 0x10278ea10>
 
+        If ``view`` is True, returns a read-only :class:`.CorpusView` that
+        shares the :class:`.Paper`\s, indices, and featuresets of this
+        :class:`.Corpus`\, rather than indexing the selected
+        :class:`.Paper`\s again. Indices and featuresets created through the
+        view are built on this :class:`.Corpus`\.
+
         """
+        if view:
+            from tethne.classes.view import CorpusView
+            keys = self.select(selector, index_only=True)
+            if type(keys) is not list:  # A single key.
+                keys = [keys]
+            return CorpusView(self, keys)
+
         subcorpus = self.__class__(self[selector],
                            index_by=self.index_by,
                            index_fields=self.indices.keys(),
-                           index_features=self.features.keys())
+                           index_features=self.features.keys(),
+                           columnar=self.columnar)
 
         return subcorpus
+
+    def save(self, path):
+        """
+        Write this :class:`.Corpus` to the directory ``path``\, which is
+        created if necessary.
+
+        :class:`.Paper`\s, :attr:`.indices`\, :attr:`.indices_lookup`\, and
+        :attr:`.features` are stored separately, in a versioned layout that
+        :meth:`.load` can memory-map. See :mod:`.storage`\.
+
+        .. code-block:: python
+
+           >>> corpus.save('/path/to/saved')
+           >>> corpus = Corpus.load('/path/to/saved')
+
+        Parameters
+        ----------
+        path : str
+        """
+        save_corpus(self, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Open a :class:`.Corpus` that was written by :meth:`.save`\.
+
+        Only a small header is read immediately; :class:`.Paper`\s, indices,
+        and featuresets are read from disk when they are first used.
+
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        -------
+        :class:`.Corpus`
+        """
+        return load_corpus(path, cls)
@@ -0,0 +1,213 @@
+"""
+Detection of near-duplicate :class:`.Paper`\s.
+
+Overlapping exports from different sources often describe the same work with
+slightly different titles or author spellings, so the :class:`.Paper`\s get
+different primary index values. A :class:`.DuplicateDetector` finds them as
+they are indexed, using MinHash signatures over the characters of each
+:class:`.Paper`\'s normalized title and author surnames. Signatures are split
+into bands, and only :class:`.Paper`\s that share a band (i.e. that are likely
+to be similar) are compared. There is no pairwise comparison of all
+:class:`.Paper`\s.
+
+.. code-block:: python
+
+   >>> from tethne import Corpus
+   >>> corpus = Corpus(papers, index_by='wosid', deduplicate='report')
+   >>> corpus.duplicate_papers
+   {'WOS:000309391500014': ['WOS:000309391500015']}
+
+"""
+
+import re
+import zlib
+from collections import defaultdict
+
+from tethne.utilities import _strip_punctuation
+
+try:    # Might as well use numpy if it is available.
+    import numpy as np
+except ImportError:
+    np = None
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    xrange = range
+    unicode = str
+
+
+_PRIME = (1 << 31) - 1
+"""Hash values are taken modulo this (Mersenne) prime."""
+
+_WHITESPACE = re.compile(u'\s+', flags=re.U)
+
+
+def _unicode(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return unicode(value)
+
+
+def _describe(paper):
+    """
+    The normalized title and author surnames of ``paper``\, or None if it does
+    not have both. Without authors, a title alone (e.g. "Front Matter") does
+    not identify a work.
+    """
+    title = getattr(paper, 'title', None)
+    authors = paper.authors
+    if not title or not authors:
+        return
+    if type(title) is list:
+        title = u' '.join(title)
+
+    # Author order is not reliable across sources.
+    surnames = sorted([author[0] for author in list(zip(*authors))[0]])
+    text = u' '.join([_unicode(value) for value in [title] + surnames])
+    return _WHITESPACE.sub(u' ', _strip_punctuation(text.lower())).strip()
+
+
+def _shingles(text, size):
+    """
+    Hashes of the overlapping character ``size``\-grams in ``text``\.
+    """
+    text = text.encode('utf-8')
+    return set([zlib.crc32(text[i:i + size]) & 0x7fffffff
+                for i in xrange(max(len(text) - size + 1, 1))])
+
+
+class DuplicateDetector(object):
+    """
+    Finds near-duplicate :class:`.Paper`\s incrementally, by locality-sensitive
+    hashing of MinHash signatures.
+
+    Parameters
+    ----------
+    threshold : float
+        (default: 0.8) Minimum estimated Jaccard similarity of the title and
+        author shingles of two :class:`.Paper`\s for them to be considered
+        duplicates.
+    bands : int
+        (default: 16) Number of bands into which each signature is divided.
+        :class:`.Paper`\s are compared only if all of the values in at least
+        one band are the same.
+    rows : int
+        (default: 4) Number of values in each band. Signatures have ``bands *
+        rows`` values; with the defaults, pairs with a similarity of 0.8 are
+        compared with probability 0.9998.
+    shingle_size : int
+        (default: 4) Length of the character shingles.
+    seed : int
+        (default: 1) Seeds the hash functions, so that signatures are
+        reproducible.
+    """
+
+    def __init__(self, threshold=0.8, bands=16, rows=4, shingle_size=4,
+                 seed=1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+
+        # Each hash function is h(x) = (a * x + b) % _PRIME.
+        state = seed
+        params = []
+        for i in xrange(bands * rows * 2):
+            state = (state * 48271) % _PRIME    # Park-Miller.
+            params.append(state)
+        self._a = params[::2]
+        self._b = params[1::2]
+        if np is not None:
+            self._a = np.array(self._a, dtype=np.uint64)
+            self._b = np.array(self._b, dtype=np.uint64)
+
+        self.signatures = {}
+        self.buckets = [defaultdict(set) for i in xrange(bands)]
+
+    def signature(self, paper):
+        """
+        The MinHash signature of ``paper``\.
+
+        Returns
+        -------
+        tuple or None
+            None if ``paper`` lacks a title or authors.
+        """
+        text = _describe(paper)
+        if not text:
+            return
+        shingles = _shingles(text, self.shingle_size)
+
+        if np is not None:
+            x = np.array(list(shingles), dtype=np.uint64)
+            hashed = (np.outer(self._a, x) + self._b[:, None]) % _PRIME
+            return tuple(hashed.min(axis=1).tolist())
+        return tuple([min([(a * x + b) % _PRIME for x in shingles])
+                      for a, b in zip(self._a, self._b)])
+
+    def _bands(self, signature):
+        for i in xrange(self.bands):
+            yield i, signature[i * self.rows:(i + 1) * self.rows]
+
+    def query(self, paper, signature=None):
+        """
+        Find previously added :class:`.Paper`\s that are near-duplicates of
+        ``paper``\.
+
+        Parameters
+        ----------
+        paper : :class:`.Paper`
+        signature : tuple
+            If already computed (see :meth:`.signature`\).
+
+        Returns
+        -------
+        list
+            Keys of near-duplicates, most similar first.
+        """
+        if signature is None:
+            signature = self.signature(paper)
+        if signature is None:
+            return []
+
+        candidates = set()
+        for i, band in self._bands(signature):
+            candidates |= self.buckets[i].get(band, set())
+
+        size = float(len(signature))
+        matches = []
+        for key in candidates:
+            other = self.signatures[key]
+            similarity = sum([1 for s, o in zip(signature, other)
+                              if s == o]) / size
+            if similarity >= self.threshold:
+                matches.append((similarity, key))
+        return [key for similarity, key in sorted(matches, reverse=True)]
+
+    def add(self, key, paper, signature=None):
+        """
+        Add ``paper`` under ``key``\, so that later :class:`.Paper`\s can be
+        matched against it.
+        """
+        if signature is None:
+            signature = self.signature(paper)
+        if signature is None:
+            return
+        self.remove(key)
+        self.signatures[key] = signature
+        for i, band in self._bands(signature):
+            self.buckets[i][band].add(key)
+
+    def remove(self, key):
+        """
+        Forget the :class:`.Paper` that was added under ``key``\, if any.
+        """
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for i, band in self._bands(signature):
+            bucket = self.buckets[i][band]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[i][band]
@@ -4,6 +4,7 @@ Classes in this module provide structures for additional data about
 """
 
 from collections import Counter, defaultdict
+from heapq import nlargest
 
 from tethne.utilities import _iterable
 try:    # Might as well use numpy if it is available.
@@ -241,6 +242,35 @@ class Feature(list):
         if len(data) > 0:
             self.extend(data)
 
+    @classmethod
+    def from_tokens(cls, tokens):
+        """
+        Build a :class:`.Feature` from a list of tokens in a single pass.
+
+        Equivalent to ``Feature(tokens)``\, but skips the intermediate lists
+        that :meth:`.extend` creates.
+
+        Parameters
+        ----------
+        tokens : list
+
+        Returns
+        -------
+        :class:`.Feature`
+        """
+        tokens = _iterable(tokens)
+        if len(tokens) == 0 or (type(tokens[0]) is tuple
+                                and type(tokens[0][-1]) in [float, int]):
+            return cls(tokens)  # Empty, or already counted.
+
+        # Same element order as __add__ would produce.
+        counts = defaultdict(int)
+        for elem, count in Counter(tokens).items():
+            counts[elem] += count
+        feature = cls([])
+        super(Feature, feature).extend(counts.items())
+        return feature
+
     def __add__(self, data):
         if len(data) > 0:
             if type(data[0]) is tuple and type(data[0][-1]) in [float, int]:
@@ -414,6 +444,131 @@ class BaseFeatureSet(object):
             self.documentCounts[i] += 1.
             self.with_feature[i].append(paper_id)
 
+    def remove(self, paper_id):
+        """
+        Remove the feature for ``paper_id``\, and its contribution to element
+        statistics.
+
+        Parameters
+        ----------
+        paper_id : str
+        """
+        feature = self.features.pop(paper_id)
+        if len(feature) < 1:
+            return
+
+        elems = feature if type(feature[0]) is not tuple else zip(*feature)[0]
+        for elem in set(elems):
+            self.with_feature[self.lookup[elem]].remove(paper_id)
+        self._discount(feature)
+
+    def update(self, featureset):
+        """
+        Add all of the features in another featureset.
+
+        Elements that are new to this featureset are given indices in the
+        order of their indices in ``featureset``\, so merging the
+        featuresets of consecutive batches of papers gives the same result as
+        adding all of the papers to one featureset.
+
+        Parameters
+        ----------
+        featureset : :class:`.BaseFeatureSet`
+            Should not contain any of the same paper identifiers.
+        """
+        self.features.update(featureset.features)
+        for i in sorted(featureset.index.keys()):
+            elem = featureset.index[i]
+            j = self.lookup.get(elem, len(self.lookup))
+            self.lookup[elem] = j
+            self.index[j] = elem
+
+            self.counts[j] += featureset.counts[i]
+            self.documentCounts[j] += featureset.documentCounts[i]
+            self.with_feature[j].extend(featureset.with_feature[i])
+
+    def rekey(self, keys):
+        """
+        Generate a copy of this featureset in which each feature is stored
+        under a new paper identifier.
+
+        The features themselves, and the element index, are not rebuilt; only
+        the paper identifiers are replaced.
+
+        Parameters
+        ----------
+        keys : dict
+            Maps current paper identifiers onto new identifiers. Identifiers
+            that are not in ``keys`` are unchanged. If several features are
+            mapped onto the same identifier, the last (in the order of
+            :attr:`.features`\) is kept.
+
+        Returns
+        -------
+        featureset
+            An instance of the same class.
+        """
+        rekey = lambda paper_id: keys.get(paper_id, paper_id)
+
+        featureset = type(self).__new__(type(self))
+        featureset._setUp()
+        featureset.index = dict(self.index)
+        featureset.lookup = dict(self.lookup)
+        featureset.counts = self.counts.copy()
+        featureset.documentCounts = self.documentCounts.copy()
+
+        kept = {}
+        for paper_id, feature in self.features.iteritems():
+            kept[rekey(paper_id)] = paper_id
+        featureset.features = dict([(new_id, self.features[paper_id])
+                                    for new_id, paper_id in kept.iteritems()])
+
+        dropped = set(self.features.keys()) - set(kept.values())
+        for i, paper_ids in self.with_feature.iteritems():
+            featureset.with_feature[i] = [rekey(p) for p in paper_ids
+                                          if p not in dropped]
+
+        # Discount features that were overwritten.
+        for paper_id in dropped:
+            featureset._discount(self.features[paper_id])
+        return featureset
+
+    def _discount(self, feature):
+        """
+        Subtract the contribution of ``feature`` from element statistics,
+        removing elements that no longer occur in any document. Does not
+        update :attr:`.with_feature`\.
+        """
+        if len(feature) < 1:
+            return
+        if type(feature[0]) is not tuple:
+            feature = Counter(feature).items()
+
+        for elem, value in feature:
+            i = self.lookup[elem]
+            self.counts[i] -= value
+            self.documentCounts[i] -= 1.
+            if self.documentCounts[i] <= 0:
+                self._remove_element(i)
+
+    def _remove_element(self, i):
+        """
+        Remove element ``i``. The last element takes its place, so that element
+        indices remain contiguous.
+        """
+        last = len(self.lookup) - 1
+        elem = self.index[i]
+        if i != last:
+            last_elem = self.index[last]
+            self.index[i] = last_elem
+            self.lookup[last_elem] = i
+            self.counts[i] = self.counts[last]
+            self.documentCounts[i] = self.documentCounts[last]
+            self.with_feature[i] = self.with_feature[last]
+        del self.lookup[elem]
+        for mapping in [self.index, self.counts, self.documentCounts,
+                        self.with_feature]:
+            mapping.pop(last, None)
 
     def top(self, topn, by='counts'):
         """
@@ -436,10 +591,16 @@ class BaseFeatureSet(object):
         if by not in ['counts', 'documentCounts']:
             raise NameError('kwarg `by` must be "counts" or "documentCounts"')
 
+        # Partial selection; the vocabulary is not sorted.
         cvalues = getattr(self, by)
-        order = argsort(list(cvalues.values()))[::-1][:topn]
-        keys = list(cvalues.keys())
-        return [(self.index[keys[i]], cvalues[keys[i]]) for i in order]
+        if np is not None and len(cvalues) > topn > 0:
+            keys = list(cvalues.keys())
+            values = np.array(list(cvalues.values()))
+            order = np.argpartition(-values, topn - 1)[:topn]
+            order = order[np.argsort(-values[order])]
+            return [(self.index[keys[i]], cvalues[keys[i]]) for i in order]
+        top = nlargest(topn, cvalues.iteritems(), key=lambda item: item[1])
+        return [(self.index[i], value) for i, value in top]
 
 
 class StructuredFeatureSet(BaseFeatureSet):
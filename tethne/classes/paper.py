@@ -2,7 +2,9 @@
 A :class:`.Paper` represents a single bibliographic record.
 """
 
-from tethne.classes.feature import Feature, feature
+import weakref
+
+from tethne.classes.feature import Feature
 
 import sys
 PYTHON_3 = sys.version_info[0] == 3
@@ -10,6 +12,12 @@ if PYTHON_3:
     unicode = str
 
 
+# Memoized features of each Paper (see :meth:`.Paper._memoized`\). They are
+#  kept here rather than in the Paper, so that its ``__dict__`` holds only its
+#  fields.
+_memoized_features = weakref.WeakKeyDictionary()
+
+
 class Paper(object):
     """
     Tethne's representation of a bibliographic record.
@@ -70,8 +78,13 @@ class Paper(object):
         return self._ayjid
 
 
+    memoize_features = True
+    """
+    If True, :attr:`.authors` and :attr:`.citations` are built once, and
+    reused until the fields that they are built from are changed.
+    """
+
     @property
-    @feature
     def authors(self):
         """
         Get the authors of the current :class:`.Paper` instance.
@@ -82,19 +95,20 @@ class Paper(object):
         Returns
         -------
         authors : :class:`.Feature`
-            Author names are in the format ``LAST F``.
+            Author names are in the format ``LAST F``. The same instance is
+            returned until the author fields change, so it should not be
+            modified.
         """
 
         if hasattr(self, 'authors_full'):
-            return self.authors_full
+            source = self.authors_full
         elif hasattr(self, 'authors_init'):
-            return self.authors_init
+            source = self.authors_init
         else:
-            return []
-
+            source = []
+        return self._memoized('authors', source, lambda authors: authors)
 
     @property
-    @feature
     def citations(self):
         """
         Cited references as a :class:`.Feature`\.
@@ -102,8 +116,52 @@ class Paper(object):
         Returns
         -------
         citations : :class:`.Feature`
+            The same instance is returned until ``citedReferences`` changes,
+            so it should not be modified.
+        """
+
+        source = getattr(self, 'citedReferences', [])
+        return self._memoized('citations', source, lambda citations:
+                              [cr.ayjid for cr in citations if cr is not None])
+
+    def _memoized(self, name, source, tokens):
+        """
+        The :class:`.Feature` built from ``tokens(source)``\.
+
+        It is cached (outside of the :class:`.Paper`\) along with a snapshot
+        of ``source``\, and rebuilt when the contents of the field change.
         """
+        if not self.memoize_features:
+            return Feature.from_tokens(tokens(source))
+
+        snapshot = tuple(source)
+        try:
+            cache = _memoized_features[self]
+        except KeyError:
+            cache = _memoized_features[self] = {}
+        try:
+            cached, feature = cache[name]
+            if cached == snapshot:
+                return feature
+        except KeyError:
+            pass
+        feature = Feature.from_tokens(tokens(snapshot))
+        cache[name] = (snapshot, feature)
+        return feature
+
 
-        if hasattr(self, 'citedReferences'):
-            return [cr.ayjid for cr in self.citedReferences if cr is not None]
-        return []
+def build_features(papers, names=['authors', 'citations']):
+    """
+    Build the memoized features of all of ``papers``\ at once (e.g. before
+    indexing a :class:`.Corpus` or building networks).
+
+    Parameters
+    ----------
+    papers : iterable
+        :class:`.Paper`\s.
+    names : list
+        (default: ``['authors', 'citations']``)
+    """
+    for paper in papers:
+        for name in names:
+            getattr(paper, name)
@@ -0,0 +1,664 @@
+"""
+Versioned on-disk storage for a :class:`.Corpus`\.
+
+:meth:`.Corpus.save` writes a :class:`.Corpus` to a directory, and
+:meth:`.Corpus.load` opens it again:
+
+.. code-block:: python
+
+   >>> corpus.save('/path/to/saved')
+   >>> corpus = Corpus.load('/path/to/saved')
+
+Rather than pickling the whole object graph, each part of the
+:class:`.Corpus` is stored separately. Numeric and sparse data are written as
+flat little-endian arrays of 64-bit values, which are memory-mapped when the
+:class:`.Corpus` is loaded:
+
+================================  =============================================
+``corpus.json``                   Format version, and the names and array types
+                                  of everything below.
+``meta.pickle``                   Primary keys, settings, :attr:`.symbols`\,
+                                  :attr:`.manifest`\, etc.
+``papers.bin``, ``.offsets``      Each :class:`.Paper`\, pickled separately.
+``indices/<i>.*``                 Index values; the papers with each value; the
+                                  values of each paper (for
+                                  :attr:`.indices_lookup`\).
+``features/<i>.*``                Elements and their counts; the element
+                                  indices and values of each
+                                  :class:`.Feature`\; :attr:`.with_feature`\.
+================================  =============================================
+
+Loading reads only ``corpus.json`` and ``meta.pickle``. A :class:`.Paper` is
+unpickled when it is first accessed, an index or featureset is built when it
+is first used, and the entries of :attr:`.indices_lookup` are built one paper
+at a time, so only the parts of a large :class:`.Corpus` that are touched are
+read from disk. A loaded :class:`.Corpus` can be modified like any other.
+
+Featuresets other than :class:`.FeatureSet` (e.g.
+:class:`.StructuredFeatureSet`\) are pickled whole.
+"""
+
+import os
+import json
+import mmap
+import struct
+
+from contextlib import contextmanager
+from collections import Counter, defaultdict
+
+from tethne.classes.feature import Feature, FeatureSet
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:    # Might as well use numpy if it is available.
+    import numpy as np
+except ImportError:
+    np = None
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    xrange = range
+    long = int
+
+
+FORMAT = 'tethne.corpus'
+VERSION = 1
+"""Incremented when the layout changes; :func:`.load_corpus` refuses others."""
+
+
+def _dtype(values):
+    """
+    ``'i8'`` if all of ``values`` are integers, otherwise ``'f8'``\.
+    """
+    for value in values:
+        if type(value) not in [int, long, bool]:
+            return 'f8'
+    return 'i8'
+
+
+@contextmanager
+def _replacing(path, mode='wb'):
+    """
+    Write to a temporary file that replaces ``path`` when it is complete.
+
+    Files that are memory-mapped (e.g. by a :class:`.Corpus` loaded from
+    ``path``\) keep the old contents, so a loaded :class:`.Corpus` can be saved
+    over the directory that it came from.
+    """
+    temp = path + '.tmp'
+    with open(temp, mode) as f:
+        yield f
+    os.rename(temp, path)
+
+
+def _write_array(path, values, dtype=None):
+    """
+    Write ``values`` to ``path`` as little-endian 64-bit integers (``'i8'``\)
+    or floats (``'f8'``\).
+
+    Returns
+    -------
+    str
+        The ``dtype`` that was used.
+    """
+    values = list(values)
+    if dtype is None:
+        dtype = _dtype(values)
+    with _replacing(path) as f:
+        if np is not None:
+            f.write(np.asarray(values, dtype='<' + dtype).tostring())
+        else:
+            code = 'q' if dtype == 'i8' else 'd'
+            f.write(struct.pack('<%i%s' % (len(values), code), *values))
+    return dtype
+
+
+def _read_array(path, dtype):
+    """
+    A read-only array of the values in ``path``\; memory-mapped if numpy is
+    available.
+    """
+    size = os.path.getsize(path) // 8
+    if np is not None:
+        if size == 0:   # Empty files cannot be mapped.
+            return np.zeros(0, dtype='<' + dtype)
+        return np.memmap(path, dtype='<' + dtype, mode='r', shape=(size,))
+    code = 'q' if dtype == 'i8' else 'd'
+    with open(path, 'rb') as f:
+        return list(struct.unpack('<%i%s' % (size, code), f.read()))
+
+
+def _tolist(values):
+    if np is not None and isinstance(values, np.ndarray):
+        return values.tolist()
+    return list(values)
+
+
+def _dump(obj, path):
+    with _replacing(path) as f:
+        pickle.dump(obj, f, 2)
+
+
+def _load(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class _Arrays(object):
+    """
+    The arrays named in ``dtypes``\, with the prefix ``base``\, read when
+    first accessed.
+    """
+
+    def __init__(self, base, dtypes):
+        self.base = base
+        self.dtypes = dtypes
+        self.arrays = {}
+
+    def __getitem__(self, name):
+        if name not in self.arrays:
+            self.arrays[name] = _read_array(self.base + '.' + name,
+                                            self.dtypes[name])
+        return self.arrays[name]
+
+    def pickled(self, name):
+        if name not in self.arrays:
+            self.arrays[name] = _load(self.base + '.' + name + '.pickle')
+        return self.arrays[name]
+
+    def span(self, name, i):
+        """
+        The values in array ``name`` for row ``i`` of the CSR-style array
+        ``name + '_offsets'``\.
+        """
+        offsets = self[name + '_offsets']
+        return _tolist(self[name][offsets[i]:offsets[i + 1]])
+
+
+class _LazyDict(object):
+    """
+    A ``dict`` whose values are built by ``loaders`` (name -> callable) when
+    they are first accessed. If ``default`` is given, missing keys are
+    created, as in a ``defaultdict``\.
+    """
+
+    def __init__(self, loaders, default=None):
+        self.data = {}
+        self.loaders = loaders
+        self.default = default
+
+    def _load(self, key):
+        self.data[key] = self.loaders.pop(key)()
+
+    def _load_all(self):
+        for key in list(self.loaders.keys()):
+            self._load(key)
+
+    def __getstate__(self):
+        self._load_all()
+        return {'data': self.data, 'loaders': {}, 'default': self.default}
+
+    def __getitem__(self, key):
+        if key in self.loaders:
+            self._load(key)
+        elif key not in self.data and self.default is not None:
+            self.data[key] = self.default()
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.loaders.pop(key, None)
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        if self.loaders.pop(key, None) is None:
+            del self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data or key in self.loaders
+
+    def __len__(self):
+        return len(self.data) + len(self.loaders)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *default):
+        if key in self.loaders:
+            self._load(key)
+        return self.data.pop(key, *default)
+
+    def keys(self):
+        return list(self.data.keys()) + list(self.loaders.keys())
+
+    def values(self):
+        self._load_all()
+        return list(self.data.values())
+
+    def items(self):
+        self._load_all()
+        return list(self.data.items())
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def itervalues(self):
+        return iter(self.values())
+
+
+class MappedPapers(object):
+    """
+    A mapping of keys onto :class:`.Paper`\s, which are unpickled from a
+    memory-mapped ``papers.bin`` when they are first accessed.
+
+    :class:`.Paper`\s can be added and removed as in a ``dict``\; the file is
+    not changed. Keys are kept in insertion order.
+    """
+
+    def __init__(self, path, keys, offsets):
+        self.row_keys = list(keys)  # Row -> key, or None if removed.
+        self.rows = dict([(key, i) for i, key in enumerate(self.row_keys)])
+        self.offsets = offsets
+        self.loaded = {}    # Row -> Paper.
+
+        self.data = None
+        if len(self.row_keys) > 0:
+            with open(path, 'rb') as f:    # The map keeps its own handle.
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getstate__(self):
+        for row in self.rows.values():
+            self._paper(row)
+        state = dict(self.__dict__)
+        state.update({'offsets': None, 'data': None})
+        return state
+
+    def _paper(self, row):
+        if row not in self.loaded:
+            start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+            self.loaded[row] = pickle.loads(self.data[start:end])
+        return self.loaded[row]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def __getitem__(self, key):
+        return self._paper(self.rows[key])
+
+    def __setitem__(self, key, paper):
+        if key not in self.rows:
+            self.rows[key] = len(self.row_keys)
+            self.row_keys.append(key)
+        self.loaded[self.rows[key]] = paper
+
+    def __delitem__(self, key):
+        row = self.rows.pop(key)
+        self.row_keys[row] = None
+        self.loaded.pop(row, None)
+
+    def get(self, key, default=None):
+        if key in self.rows:
+            return self[key]
+        return default
+
+    def iterkeys(self):
+        return (key for key in self.row_keys if key is not None)
+
+    def itervalues(self):
+        return (self._paper(row) for row, key in enumerate(self.row_keys)
+                if key is not None)
+
+    def iteritems(self):
+        return ((key, self._paper(row)) for row, key
+                in enumerate(self.row_keys) if key is not None)
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+
+class MappedLookup(object):
+    """
+    The :attr:`.Corpus.indices_lookup` of a loaded :class:`.Corpus`\. The
+    entry for each :class:`.Paper` is built from the saved index arrays when
+    it is first accessed. Missing keys are created, as in a ``defaultdict``\.
+    """
+
+    def __init__(self, keys, indices):
+        self.rows = dict([(key, i) for i, key in enumerate(keys)])
+        self.indices = indices  # Attribute -> _Arrays.
+        self.lookup = {}
+        self.removed = set()
+
+    def __getstate__(self):
+        for key in self.rows:
+            self._load(key)
+        return {'rows': {}, 'indices': {}, 'lookup': self.lookup,
+                'removed': set()}
+
+    def _saved(self, key):
+        return key in self.rows and key not in self.removed \
+               and key not in self.lookup
+
+    def _load(self, key):
+        if self._saved(key):
+            row = self.rows[key]
+            entry = {}
+            for attr, arrays in self.indices.iteritems():
+                ids = arrays.span('lookup', row)
+                if ids:
+                    values = arrays.pickled('values')
+                    entry[attr] = [values[i] for i in ids]
+            self.lookup[key] = entry
+
+    def __getitem__(self, key):
+        self._load(key)
+        if key not in self.lookup:
+            self.lookup[key] = {}
+        return self.lookup[key]
+
+    def __setitem__(self, key, value):
+        self.removed.add(key)
+        self.lookup[key] = value
+
+    def __contains__(self, key):
+        return key in self.lookup or self._saved(key)
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *default):
+        self._load(key)
+        self.removed.add(key)
+        return self.lookup.pop(key, *default)
+
+    def update(self, other):
+        for key, value in other.items():
+            self[key] = value
+
+    def keys(self):
+        return list(self.lookup.keys()) \
+               + [key for key in self.rows if self._saved(key)]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+
+def _save_index(base, index, rows):
+    """
+    Write an index (value -> keys) as a list of values, and two CSR-style
+    arrays: the rows with each value, and the values of each row.
+    """
+    values = list(index.keys())
+    papers, offsets = [], [0]
+    lookup = [[] for row in rows]
+    for i, value in enumerate(values):
+        for key in index[value]:
+            if key in rows:
+                papers.append(rows[key])
+                lookup[rows[key]].append(i)
+        offsets.append(len(papers))
+    _dump(values, base + '.values.pickle')
+    _write_array(base + '.papers', papers, 'i8')
+    _write_array(base + '.papers_offsets', offsets, 'i8')
+    return values, lookup
+
+
+def _save_lookup(base, attr, values, lookup, keys, indices_lookup):
+    """
+    Write the values of ``attr`` for each row, in the order of
+    ``indices_lookup`` (falling back to the order of the index).
+    """
+    ids = dict([(value, i) for i, value in enumerate(values)])
+    flat, offsets = [], [0]
+    for row, key in enumerate(keys):
+        entry = indices_lookup.get(key, {}).get(attr)
+        if entry is None:
+            flat.extend(lookup[row])
+        else:
+            flat.extend([ids[value] for value in entry if value in ids])
+        offsets.append(len(flat))
+    _write_array(base + '.lookup', flat, 'i8')
+    _write_array(base + '.lookup_offsets', offsets, 'i8')
+
+
+def _load_index(arrays, keys):
+    values = arrays.pickled('values')
+    papers, offsets = _tolist(arrays['papers']), _tolist(arrays['papers_offsets'])
+    return dict([(value, [keys[row] for row in papers[offsets[i]:offsets[i + 1]]])
+                 for i, value in enumerate(values)])
+
+
+def _save_featureset(base, featureset):
+    """
+    Write a :class:`.FeatureSet` as arrays. Returns the ``dtype``\s of the
+    arrays.
+    """
+    order = sorted(featureset.index.keys())
+    elements = [featureset.index[i] for i in order]
+    position = dict([(i, j) for j, i in enumerate(order)])
+    column = dict([(elem, j) for j, elem in enumerate(elements)])
+
+    fkeys = list(featureset.features.keys())
+    frows = dict([(key, p) for p, key in enumerate(fkeys)])
+    columns, values, offsets = [], [], [0]
+    for key in fkeys:
+        for elem, value in featureset.features[key]:
+            columns.append(column[elem])
+            values.append(value)
+        offsets.append(len(columns))
+
+    papers, poffsets = [], [0]
+    for i in order:
+        papers.extend([frows[key] for key in featureset.with_feature.get(i, [])
+                       if key in frows])
+        poffsets.append(len(papers))
+
+    _dump(elements, base + '.elements.pickle')
+    _dump(fkeys, base + '.keys.pickle')
+    return {
+        'counts': _write_array(base + '.counts',
+                               [featureset.counts[i] for i in order]),
+        'documentCounts': _write_array(base + '.documentCounts',
+                                       [featureset.documentCounts[i]
+                                        for i in order]),
+        'columns': _write_array(base + '.columns', columns, 'i8'),
+        'values': _write_array(base + '.values', values),
+        'columns_offsets': _write_array(base + '.columns_offsets', offsets,
+                                        'i8'),
+        'papers': _write_array(base + '.papers', papers, 'i8'),
+        'papers_offsets': _write_array(base + '.papers_offsets', poffsets,
+                                       'i8'),
+    }
+
+
+def _load_featureset(arrays):
+    elements = arrays.pickled('elements')
+    fkeys = arrays.pickled('keys')
+
+    featureset = FeatureSet.__new__(FeatureSet)
+    featureset._setUp()
+    featureset.index = dict(enumerate(elements))
+    featureset.lookup = dict([(elem, i) for i, elem in enumerate(elements)])
+    featureset.counts = Counter(dict(enumerate(_tolist(arrays['counts']))))
+    featureset.documentCounts = Counter(
+        dict(enumerate(_tolist(arrays['documentCounts']))))
+
+    columns, values = _tolist(arrays['columns']), _tolist(arrays['values'])
+    offsets = _tolist(arrays['columns_offsets'])
+    for p, key in enumerate(fkeys):
+        start, end = offsets[p], offsets[p + 1]
+        feature = Feature([])
+        list.extend(feature, zip([elements[j] for j in columns[start:end]],
+                                 values[start:end]))
+        featureset.features[key] = feature
+
+    papers, offsets = _tolist(arrays['papers']), _tolist(arrays['papers_offsets'])
+    for i in xrange(len(elements)):
+        featureset.with_feature[i] = [fkeys[p] for p
+                                      in papers[offsets[i]:offsets[i + 1]]]
+    return featureset
+
+
+def save_corpus(corpus, path):
+    """
+    Write ``corpus`` to the directory ``path`` (see :meth:`.Corpus.save`\).
+    """
+    for directory in [path, os.path.join(path, 'indices'),
+                      os.path.join(path, 'features')]:
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+    header = os.path.join(path, 'corpus.json')
+    if os.path.exists(header):  # Until the new one is complete.
+        os.remove(header)
+
+    keys = list(corpus.indexed_papers.keys())
+    rows = dict([(key, i) for i, key in enumerate(keys)])
+
+    # Each Paper is pickled separately, so that it can be loaded alone.
+    offsets = [0]
+    with _replacing(os.path.join(path, 'papers.bin')) as f:
+        for key in keys:
+            data = pickle.dumps(corpus.indexed_papers[key], 2)
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    _write_array(os.path.join(path, 'papers.offsets'), offsets, 'i8')
+
+    indices = []
+    for i, (attr, index) in enumerate(corpus.indices.items()):
+        base = os.path.join(path, 'indices', str(i))
+        values, lookup = _save_index(base, index, rows)
+        _save_lookup(base, attr, values, lookup, keys, corpus.indices_lookup)
+        indices.append(attr)
+
+    features = []
+    for i, (name, featureset) in enumerate(corpus.features.items()):
+        base = os.path.join(path, 'features', str(i))
+        if type(featureset) is FeatureSet:
+            features.append((name, _save_featureset(base, featureset)))
+        else:
+            _dump(featureset, base + '.pickle')
+            features.append((name, None))
+
+    _dump({
+        'keys': keys,
+        'indices': indices,
+        'features': [name for name, dtypes in features],
+        'index_by': corpus.index_by,
+        'index_fields': corpus.index_fields,
+        'index_features': corpus.index_features,
+        'columnar': corpus.columnar,
+        'slices': corpus.slices,
+        'duplicate_papers': corpus.duplicate_papers,
+        'deduplicate': corpus.deduplicate,
+        'duplicate_detector': corpus.duplicate_detector,
+        'symbols': corpus.symbols,
+        'manifest': corpus.manifest,
+    }, os.path.join(path, 'meta.pickle'))
+
+    # Written last, so that an interrupted save cannot be loaded.
+    with _replacing(header, 'w') as f:
+        json.dump({
+            'format': FORMAT,
+            'version': VERSION,
+            'papers': len(keys),
+            'features': [dtypes for name, dtypes in features],
+        }, f)
+
+
+def load_corpus(path, corpus_class):
+    """
+    Open a :class:`.Corpus` that was written by :func:`.save_corpus`\.
+
+    Parameters
+    ----------
+    path : str
+    corpus_class : type
+        :class:`.Corpus` or a subclass.
+
+    Returns
+    -------
+    :class:`.Corpus`
+
+    Raises
+    ------
+    IOError
+        If ``path`` does not contain a saved :class:`.Corpus`\.
+    ValueError
+        If it was saved in a format that this version cannot read.
+    """
+    try:
+        with open(os.path.join(path, 'corpus.json'), 'r') as f:
+            header = json.load(f)
+    except IOError:
+        raise IOError('No saved Corpus at {0}'.format(path))
+    if header.get('format') != FORMAT or header.get('version') != VERSION:
+        raise ValueError('Unsupported Corpus format: {0} version {1}'
+                         .format(header.get('format'), header.get('version')))
+    meta = _load(os.path.join(path, 'meta.pickle'))
+    keys = meta['keys']
+
+    corpus = corpus_class.__new__(corpus_class)
+    for attr in ['index_by', 'index_fields', 'index_features', 'columnar',
+                 'slices', 'duplicate_papers', 'deduplicate',
+                 'duplicate_detector', 'symbols', 'manifest']:
+        setattr(corpus, attr, meta[attr])
+
+    offsets = _read_array(os.path.join(path, 'papers.offsets'), 'i8')
+    corpus.indexed_papers = MappedPapers(os.path.join(path, 'papers.bin'),
+                                         keys, offsets)
+
+    dtypes = {'values': None, 'papers': 'i8', 'papers_offsets': 'i8',
+              'lookup': 'i8', 'lookup_offsets': 'i8'}
+    indices = dict([(attr, _Arrays(os.path.join(path, 'indices', str(i)),
+                                   dtypes))
+                    for i, attr in enumerate(meta['indices'])])
+    corpus.indices = _LazyDict(dict([
+        (attr, lambda arrays=arrays: _load_index(arrays, keys))
+        for attr, arrays in indices.iteritems()]), default=dict)
+    corpus.indices_lookup = MappedLookup(keys, indices)
+
+    loaders = {}
+    for i, (name, dtypes) in enumerate(zip(meta['features'],
+                                           header['features'])):
+        base = os.path.join(path, 'features', str(i))
+        if dtypes is None:
+            loaders[name] = lambda base=base: _load(base + '.pickle')
+        else:
+            arrays = _Arrays(base, dtypes)
+            loaders[name] = lambda arrays=arrays: _load_featureset(arrays)
+    corpus.features = _LazyDict(loaders)
+    return corpus
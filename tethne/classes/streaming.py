@@ -54,6 +54,10 @@ class StreamingIndex(object):
 
         self.key_file_map[key] = fname
 
+    def __delitem__(self, key):
+        fname = self.key_file_map.pop(key)
+        os.remove(self._build_path(fname))
+
     def __contains__(self, key):
         return key in self.key_file_map
 
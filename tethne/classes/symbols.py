@@ -0,0 +1,110 @@
+"""
+A :class:`.SymbolTable` holds a single copy of each of the strings (journal
+names, author names, keywords, etc) that are repeated across the
+:class:`.Paper`\s in a :class:`.Corpus`\.
+
+Parsers intern the values of the fields in their ``intern_fields``, so that
+e.g. a journal name that occurs in thousands of records is stored only once.
+Readers share one table among all of the data files that they parse, and attach
+it to the :class:`.Corpus` as :attr:`.Corpus.symbols`\.
+
+.. code-block:: python
+
+   >>> from tethne.readers import wos
+   >>> corpus = wos.read('/path/to/data')
+   >>> len(corpus.symbols)
+   10263
+   >>> corpus.symbols.id(u'MARINE POLLUTION BULLETIN')
+   14
+   >>> corpus.symbols[14]
+   u'MARINE POLLUTION BULLETIN'
+
+"""
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    unicode = str
+
+
+class SymbolTable(object):
+    """
+    Interns strings, and tuples of strings, and assigns each an integer id.
+
+    Values that are equal are replaced by a single instance, which is never
+    released while the table is in use. Lists are interned element-wise; other
+    values (e.g. numbers, :class:`.Paper`\s) are returned unchanged.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, value):
+        return value in self.ids
+
+    def __getitem__(self, i):
+        """
+        The value with id ``i``\.
+        """
+        return self.values[i]
+
+    def intern(self, value):
+        """
+        Get the canonical instance of ``value``\.
+
+        Parameters
+        ----------
+        value : str, tuple, or list
+
+        Returns
+        -------
+        object
+            Equal to ``value``\.
+        """
+        if isinstance(value, (str, unicode, tuple)):
+            return self.values[self.id(value)]
+        elif type(value) is list:
+            return [self.intern(v) for v in value]
+        return value
+
+    def id(self, value):
+        """
+        Get the integer id of ``value``\, adding it to the table if necessary.
+
+        Parameters
+        ----------
+        value : str or tuple
+
+        Returns
+        -------
+        int
+        """
+        try:
+            return self.ids[value]
+        except KeyError:
+            pass
+        if type(value) is tuple:    # Members are interned too.
+            value = tuple([self.intern(v) for v in value])
+        i = len(self.values)
+        self.ids[value] = i
+        self.values.append(value)
+        return i
+
+    def intern_entry(self, entry, fields):
+        """
+        Intern the values of ``fields`` on ``entry``\, in place.
+
+        Parameters
+        ----------
+        entry : :class:`.Paper`
+        fields : iterable
+            Names of attributes. Missing attributes are ignored.
+        """
+        for field in fields:
+            value = getattr(entry, field, None)
+            if value is not None:
+                setattr(entry, field, self.intern(value))
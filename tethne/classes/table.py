@@ -0,0 +1,379 @@
+"""
+A columnar store for :class:`.Paper` data.
+
+Each :class:`.Paper` carries its fields in its own ``__dict__``\, which costs
+far more memory than the field values themselves in a large :class:`.Corpus`\.
+A :class:`.PaperTable` instead keeps one column per field: a compact
+``array`` for numeric fields (e.g. ``date``\) or a list of (interned) values
+for everything else, plus a validity mask that records which rows have the
+field. Rows are accessed through lightweight :class:`.PaperView`\s, which
+support the same attribute API as :class:`.Paper`\.
+
+A :class:`.Corpus` is backed by a :class:`.PaperTable` if it is created with
+``columnar=True``\:
+
+.. code-block:: python
+
+   >>> from tethne.readers import wos
+   >>> corpus = wos.read('/path/to/data', columnar=True)
+   >>> corpus.indexed_papers
+   <tethne.classes.table.PaperTable object at 0x10a2e5d10>
+   >>> corpus.indexed_papers['WOS:000309391500014'].date
+   2012
+   >>> corpus.indexed_papers.select('date', 2012)     # Vectorized scan.
+   ['WOS:000309391500014', 'WOS:000309391500015', ...]
+
+"""
+
+from array import array
+from weakref import WeakKeyDictionary
+
+from tethne.classes.paper import Paper
+
+try:    # Might as well use numpy if it is available.
+    import numpy as np
+except ImportError:
+    np = None
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    xrange = range
+    long = int
+
+
+def _typecode(value):
+    """
+    The ``array`` typecode for a column that starts with ``value``\, or None
+    if it should be a list.
+    """
+    if type(value) in [int, long]:
+        return 'l'
+    elif type(value) is float:
+        return 'd'
+
+
+def _is_references(value):
+    """
+    True if ``value`` is a list of :class:`.Paper`\s (e.g. cited references).
+    """
+    return type(value) is list and len(value) > 0 \
+           and all([v is None or isinstance(v, Paper) for v in value])
+
+
+def _paper(fields):
+    """
+    Rebuild a :class:`.Paper` (e.g. when a :class:`.PaperView` is unpickled).
+    """
+    paper = Paper()
+    for field, value in fields.items():
+        setattr(paper, field, value)
+    return paper
+
+
+class PaperView(Paper):
+    """
+    A :class:`.Paper` whose fields are stored in a row of a
+    :class:`.PaperTable`\.
+
+    Fields are read, set, and deleted just as on a :class:`.Paper`\; changes
+    are written to the table. Views of the same row are equal. A view is
+    pickled (or copied) as a plain :class:`.Paper`\.
+    """
+
+    __slots__ = ('_table', '_row')
+
+    memoize_features = False    # Would be stored in the table.
+
+    def __init__(self, table, row):
+        object.__setattr__(self, '_table', table)
+        object.__setattr__(self, '_row', row)
+
+    def __getattr__(self, name):    # Only called for fields.
+        if name.startswith('__'):
+            raise AttributeError(name)
+        try:
+            return self._table.get_field(self._row, name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self._table.set_field(self._row, name, value)
+
+    def __delattr__(self, name):
+        try:
+            self._table.delete_field(self._row, name)
+        except KeyError:
+            raise AttributeError(name)
+
+    @property
+    def __dict__(self):
+        """
+        The fields of this row, as a new ``dict``\.
+        """
+        return self._table.fields(self._row)
+
+    def __reduce__(self):
+        return (_paper, (self.__dict__,))
+
+    def __eq__(self, other):
+        return isinstance(other, PaperView) and other._table is self._table \
+               and other._row == self._row
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self._table), self._row))
+
+
+class PaperTable(object):
+    """
+    A mapping of keys onto :class:`.Paper`\s, stored in columns.
+
+    :class:`.Paper`\s are added and retrieved like values in a ``dict``\;
+    retrieved values are :class:`.PaperView`\s. Keys are kept in insertion
+    order.
+
+    Fields whose values are lists of :class:`.Paper`\s (e.g.
+    ``citedReferences``\) are stored in a second table,
+    :attr:`.references`\, and the column holds only row numbers. A
+    :class:`.Paper` that is cited by many records (e.g. a cited reference that
+    the WoS reader parsed once) is stored once. Reading such a field returns
+    a new list of :class:`.PaperView`\s, so it should be set again after it
+    is changed.
+    """
+
+    def __init__(self):
+        self.row_keys = []  # Row -> key, or None if the row was removed.
+        self.rows = {}      # Key -> row.
+        self.columns = {}
+        self.masks = {}     # A byte for each row; 1 if the row has the field.
+
+        self.references = None
+        self.reference_fields = set()
+        self._reference_rows = WeakKeyDictionary()  # Paper -> row.
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_reference_rows']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reference_rows = WeakKeyDictionary()
+
+    # Mapping interface.
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def __getitem__(self, key):
+        return PaperView(self, self.rows[key])
+
+    def __setitem__(self, key, paper):
+        fields = paper.__dict__
+        if key in self.rows:    # Replace all of the fields.
+            row = self.rows[key]
+            self._clear(row)
+        else:
+            row = len(self.row_keys)
+            self.rows[key] = row
+            self.row_keys.append(key)
+            for field, column in self.columns.items():
+                self._grow(field, column)
+        for field, value in fields.items():
+            self.set_field(row, field, value)
+
+    def __delitem__(self, key):
+        row = self.rows.pop(key)
+        self.row_keys[row] = None
+        self._clear(row)
+
+    def get(self, key, default=None):
+        if key in self.rows:
+            return self[key]
+        return default
+
+    def iterkeys(self):
+        return (key for key in self.row_keys if key is not None)
+
+    def itervalues(self):
+        return (PaperView(self, row) for row, key in enumerate(self.row_keys)
+                if key is not None)
+
+    def iteritems(self):
+        return ((key, PaperView(self, row)) for row, key
+                in enumerate(self.row_keys) if key is not None)
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    # Row access, used by PaperView.
+
+    def get_field(self, row, field):
+        if field not in self.masks or not self.masks[field][row]:
+            raise KeyError(field)
+        if field in self.reference_fields:
+            return [None if i < 0 else PaperView(self.references, i)
+                    for i in self.columns[field][row]]
+        return self.columns[field][row]
+
+    def set_field(self, row, field, value):
+        if field not in self.columns:
+            self._add_column(field, _typecode(value))
+            if _is_references(value):
+                self.reference_fields.add(field)
+
+        if field in self.reference_fields:
+            if _is_references(value):
+                self.columns[field][row] = array('l', [self._reference(paper)
+                                                       for paper in value])
+                self.masks[field][row] = 1
+                return
+            self._dereference(field)    # Not a list of Papers, after all.
+
+        column = self.columns[field]
+        if type(column) is array and _typecode(value) != column.typecode:
+            column = self.columns[field] = list(column)     # Mixed types.
+        try:
+            column[row] = value
+        except OverflowError:   # Too big for a C long.
+            column = self.columns[field] = list(column)
+            column[row] = value
+        self.masks[field][row] = 1
+
+    def delete_field(self, row, field):
+        if field not in self.masks or not self.masks[field][row]:
+            raise KeyError(field)
+        self._unset(row, field)
+
+    def fields(self, row):
+        """
+        The fields of ``row``\, as a ``dict``\.
+        """
+        return dict([(field, self.get_field(row, field)) for field, mask
+                     in self.masks.items() if mask[row]])
+
+    # Columns.
+
+    def column(self, field):
+        """
+        All of the values of ``field``\, and a mask that indicates which values
+        are valid. Both are aligned with :attr:`.row_keys`\.
+
+        Parameters
+        ----------
+        field : str
+
+        Returns
+        -------
+        tuple
+            ``(values, mask)``\. If numpy is available, numeric columns are
+            returned as numpy arrays, and ``mask`` as a boolean array. Columns
+            grow as rows are added, so these are copies.
+        """
+        column, mask = self.columns[field], self.masks[field]
+        if field in self.reference_fields:
+            column = [self.get_field(row, field) if mask[row] else None
+                      for row in xrange(len(column))]
+        elif np is not None and type(column) is array:
+            return (np.frombuffer(column, dtype=column.typecode).copy(),
+                    np.frombuffer(mask, dtype=np.bool_).copy())
+        return column, mask
+
+    def select(self, field, value):
+        """
+        Keys of the rows in which ``field`` is ``value``\.
+
+        Parameters
+        ----------
+        field : str
+        value : object
+
+        Returns
+        -------
+        list
+        """
+        if field not in self.columns:
+            return []
+        column, mask = self.column(field)
+        if np is not None and type(column) is np.ndarray:
+            if _typecode(value) is None:
+                return []
+            rows = np.flatnonzero((column == value) & mask)
+            return [self.row_keys[row] for row in rows]
+        return [self.row_keys[row] for row in xrange(len(column))
+                if mask[row] and column[row] == value]
+
+    def iter_column(self, field):
+        """
+        Yields ``(key, value)`` for each row that has ``field``\, without
+        creating :class:`.PaperView`\s.
+        """
+        if field not in self.columns:
+            return
+        mask = self.masks[field]
+        for row, key in enumerate(self.row_keys):
+            if mask[row]:
+                yield key, self.get_field(row, field)
+
+    def _reference(self, paper):
+        """
+        The row of ``paper`` in :attr:`.references`\, or -1 for None.
+        """
+        if paper is None:
+            return -1
+        try:
+            return self._reference_rows[paper]
+        except KeyError:
+            pass
+        if self.references is None:
+            self.references = PaperTable()
+        row = len(self.references.row_keys)
+        self.references[row] = paper
+        self._reference_rows[paper] = row
+        return row
+
+    def _dereference(self, field):
+        """
+        Convert a column of references into a list of values.
+        """
+        mask = self.masks[field]
+        self.columns[field] = [self.get_field(row, field) if mask[row] else None
+                               for row in xrange(len(mask))]
+        self.reference_fields.remove(field)
+
+    def _add_column(self, field, typecode=None):
+        size = len(self.row_keys)
+        if typecode is None:
+            self.columns[field] = [None] * size
+        else:
+            self.columns[field] = array(typecode, [0]) * size
+        self.masks[field] = bytearray(size)
+
+    def _grow(self, field, column):
+        column.append(None if type(column) is list else 0)
+        self.masks[field].append(0)
+
+    def _unset(self, row, field):
+        self.masks[field][row] = 0
+        if type(self.columns[field]) is list:   # Release the value.
+            self.columns[field][row] = None
+
+    def _clear(self, row):
+        for field, mask in self.masks.items():
+            if mask[row]:
+                self._unset(row, field)
@@ -0,0 +1,301 @@
+"""
+A :class:`.CorpusView` is a read-only subset of a :class:`.Corpus` that shares
+the :class:`.Paper`\s, indices, and featuresets of its parent.
+
+Building a new :class:`.Corpus` for a subset of :class:`.Paper`\s (e.g. for
+each time-slice in :meth:`.Corpus.slice`\) means indexing every field and
+featureset again. A :class:`.CorpusView` instead holds only the keys of its
+:class:`.Paper`\s, and filters the parent's data structures by those keys as
+they are accessed. Featuresets are built from the parent's features, without
+re-tokenizing, the first time that they are used.
+
+.. code-block:: python
+
+   >>> for year, subcorpus in corpus.slice():   # Yields CorpusViews.
+   ...     print year, len(subcorpus)
+   2005, 5
+   2006, 5
+   >>> subcorpus = corpus.subcorpus(('date', 1995), view=True)
+   >>> subcorpus.materialize()  # A stand-alone Corpus.
+   <tethne.classes.corpus.Corpus object at 0x10278ea10>
+
+A :class:`.CorpusView` reflects its parent as it was when the view was
+created; it should be created again after :class:`.Paper`\s are added to or
+removed from the parent. Views cannot be modified, but indices and
+featuresets created through a view are added to its parent (see
+:class:`.CorpusView`\).
+"""
+
+from tethne.classes.corpus import Corpus
+
+
+class _Filtered(object):
+    """
+    Read-only view of a ``dict``\-like ``mapping`` whose keys are
+    :class:`.Paper` keys, restricted to the keys in ``members``\.
+    """
+
+    def __init__(self, mapping, keys, members):
+        self.mapping = mapping
+        self._keys = keys
+        self.members = members
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self.members
+
+    def __getitem__(self, key):
+        if key not in self.members:
+            raise KeyError(key)
+        return self.mapping[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def get(self, key, default=None):
+        if key in self.members:
+            return self.mapping.get(key, default)
+        return default
+
+    def iterkeys(self):
+        return iter(self._keys)
+
+    def itervalues(self):
+        return (self.mapping[key] for key in self._keys)
+
+    def iteritems(self):
+        return ((key, self.mapping[key]) for key in self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+
+class _FilteredIndex(object):
+    """
+    Read-only view of an index (see :attr:`.Corpus.indices`\) that lists only
+    the :class:`.Paper` keys in ``members``\. Values with no such keys are
+    omitted.
+    """
+
+    def __init__(self, index, members):
+        self.index = index
+        self.members = members
+
+    def __getitem__(self, value):
+        keys = [key for key in self.index[value] if key in self.members]
+        if not keys:
+            raise KeyError(value)
+        return keys
+
+    def __contains__(self, value):
+        return value in self.index \
+               and any([key in self.members for key in self.index[value]])
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __iter__(self):
+        return self.iterkeys()
+
+    def get(self, value, default=None):
+        try:
+            return self[value]
+        except KeyError:
+            return default
+
+    def iteritems(self):
+        for value, keys in self.index.iteritems():
+            keys = [key for key in keys if key in self.members]
+            if keys:
+                yield value, keys
+
+    def iterkeys(self):
+        return (value for value, keys in self.iteritems())
+
+    def itervalues(self):
+        return (keys for value, keys in self.iteritems())
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+
+class _Indices(object):
+    """
+    The :attr:`.Corpus.indices` of a :class:`.CorpusView`\.
+    """
+
+    def __init__(self, indices, members):
+        self.indices = indices
+        self.members = members
+
+    def __getitem__(self, attr):
+        return _FilteredIndex(self.indices[attr], self.members)
+
+    def __contains__(self, attr):
+        return attr in self.indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        return iter(self.indices)
+
+    def keys(self):
+        return self.indices.keys()
+
+    def iteritems(self):
+        return ((attr, self[attr]) for attr in self.indices)
+
+    def items(self):
+        return list(self.iteritems())
+
+
+class _Features(object):
+    """
+    The :attr:`.Corpus.features` of a :class:`.CorpusView`\. Each featureset
+    is built from the parent's features the first time that it is accessed.
+    """
+
+    def __init__(self, features, members):
+        self.features = features
+        self.members = members
+        self.cache = {}
+
+    def __getitem__(self, name):
+        if name not in self.cache:
+            featureset = self.features[name]
+            self.cache[name] = featureset.__class__(
+                dict([(key, feature) for key, feature
+                      in featureset.features.iteritems()
+                      if key in self.members]))
+        return self.cache[name]
+
+    def __contains__(self, name):
+        return name in self.features
+
+    def __len__(self):
+        return len(self.features)
+
+    def __iter__(self):
+        return iter(self.features)
+
+    def keys(self):
+        return self.features.keys()
+
+    def iteritems(self):
+        return ((name, self[name]) for name in self.features)
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return [self[name] for name in self.features]
+
+
+class CorpusView(Corpus):
+    """
+    A read-only subset of a :class:`.Corpus`\, which shares its parent's
+    data.
+
+    Supports the same queries as a :class:`.Corpus` (:meth:`.select`\,
+    :meth:`.slice`\, :attr:`.features`\, etc), so views can be passed to
+    network-building methods. :class:`.Paper`\s cannot be added or removed
+    (this raises a ``TypeError``\).
+
+    .. note:: :meth:`.index` and :meth:`.index_feature` build the index or
+       featureset on the parent, for all of its :class:`.Paper`\s, and so
+       change the parent and every other view of it. Use
+       :meth:`.materialize` to index a subset on its own.
+
+    Parameters
+    ----------
+    corpus : :class:`.Corpus`
+        The parent. If this is a :class:`.CorpusView`\, its parent is used.
+    keys : list
+        Keys of :class:`.Paper`\s in ``corpus``\. Keys that are not in
+        ``corpus`` are ignored.
+    """
+
+    def __init__(self, corpus, keys):
+        if isinstance(corpus, CorpusView):
+            corpus = corpus.parent
+        self.parent = corpus
+
+        # Keys may repeat, e.g. if selected by several values of an index.
+        members = set()
+        ordered = []
+        for key in keys:
+            if key not in members and key in corpus.indexed_papers:
+                members.add(key)
+                ordered.append(key)
+        self.members = frozenset(members)
+
+        self.index_by = corpus.index_by
+        self.index_fields = corpus.index_fields
+        self.index_features = corpus.index_features
+        self.columnar = corpus.columnar
+        self.symbols = corpus.symbols
+        self.slices = []
+        self.duplicate_papers = {}
+        self.deduplicate = False
+        self.duplicate_detector = None
+
+        self.indexed_papers = _Filtered(corpus.indexed_papers, ordered,
+                                        self.members)
+        self.indices_lookup = _Filtered(corpus.indices_lookup, ordered,
+                                        self.members)
+        self.indices = _Indices(corpus.indices, self.members)
+        self.features = _Features(corpus.features, self.members)
+
+    def add_papers(self, papers, processes=1):
+        raise TypeError('CorpusViews are immutable; add papers to the parent'
+                        ' Corpus, or to a copy made with materialize()')
+
+    def remove_papers(self, keys):
+        raise TypeError('CorpusViews are immutable; remove papers from the'
+                        ' parent Corpus, or from a copy made with'
+                        ' materialize()')
+
+    def index(self, attr):
+        """
+        Index ``attr`` on the parent :class:`.Corpus` (see
+        :meth:`.Corpus.index`\).
+        """
+        self.parent.index(attr)
+
+    def index_feature(self, feature_name, tokenize=None, structured=False):
+        """
+        Build the featureset ``feature_name`` on the parent :class:`.Corpus`
+        (see :meth:`.Corpus.index_feature`\).
+        """
+        self.parent.index_feature(feature_name, tokenize, structured)
+        self.features.cache.pop(feature_name, None)
+
+    def materialize(self):
+        """
+        Build a stand-alone :class:`.Corpus` from the :class:`.Paper`\s in
+        this view.
+
+        Returns
+        -------
+        :class:`.Corpus`
+        """
+        return self.parent.__class__(self.papers,
+                                     index_by=self.index_by,
+                                     index_fields=self.indices.keys(),
+                                     index_features=self.features.keys(),
+                                     columnar=self.columnar)
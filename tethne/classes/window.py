@@ -0,0 +1,447 @@
+"""
+Feature statistics over the time windows of :meth:`.Corpus.slice`\.
+
+Consecutive windows usually overlap: with ``window_size=5, step_size=1`` they
+share four of five years, and with ``cumulative=True`` each window contains
+the previous one. Rather than building a subcorpus for each window, the
+statistics of each year are computed once, and the statistics of a window are
+kept as a running total: the years that enter the window are added to the
+total for the previous window, and the years that leave it are subtracted.
+
+The time series of individual elements are served by a
+:class:`.FeatureDateIndex`\, which records the count of each element in each
+year, so that the distribution of an element takes time proportional to the
+number of years rather than to the size of the featureset. The most
+numerous elements in each window are found in a :class:`.FeatureCube`\, a
+sparse year-by-element matrix that can be rolled up into decades (or any other
+period).
+
+.. code-block:: python
+
+   >>> keys, values = corpus.feature_distribution('citations',
+   ...                                            'DOLE RJ 1965 CELL',
+   ...                                            window_size=5)
+   >>> cube = corpus.feature_cube('citations')
+   >>> cube.rollup(10).top(1, years=[2000])
+   [(u'DOLE RJ 1965 CELL', 158)]
+
+"""
+
+from collections import Counter, defaultdict
+from heapq import nlargest
+
+try:    # Might as well use numpy if it is available.
+    import numpy as np
+except ImportError:
+    np = None
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    long = int
+
+
+def window_ranges(start, end, window_size=1, step_size=1, cumulative=False):
+    """
+    The time windows from ``start`` to ``end`` (inclusive), as in
+    :meth:`.Corpus.slice`\.
+
+    Yields
+    ------
+    tuple
+        ``(key, years)``\, where ``years`` is a list. ``key`` is the first
+        year in the window; if ``cumulative``\, it is the year after the
+        window.
+    """
+    while start <= end - (window_size - 1):
+        if cumulative:
+            key = start + window_size
+        else:
+            key = start
+        yield key, range(start, start + window_size)
+        if cumulative:
+            window_size += step_size
+        else:
+            start += step_size
+
+
+def _window_steps(windows):
+    """
+    The changes from each window to the next.
+
+    Yields
+    ------
+    tuple
+        ``(key, add, subtract)``\, where ``add`` are the years to add to the
+        total for the previous window, and ``subtract`` the years to subtract
+        from it. If that is more work than summing the window from scratch
+        (e.g. windows do not overlap), ``subtract`` is None and ``add`` holds
+        all of the years in the window.
+    """
+    previous = set()
+    for key, years in windows:
+        add = [year for year in years if year not in previous]
+        subtract = sorted(previous - set(years))
+        if len(add) + len(subtract) > len(years):
+            yield key, years, None
+        else:
+            yield key, add, subtract
+        previous = set(years)
+
+
+def _value_type(values):
+    """
+    ``int`` if all of the values in the ``dict`` ``values`` are integers,
+    otherwise ``float``\.
+    """
+    for value in values.itervalues():
+        if type(value) not in [int, long]:
+            return float
+    return int
+
+
+class FeatureDateIndex(object):
+    """
+    Counts and document counts of each element in a featureset, by year.
+
+    Built once (see :meth:`.Corpus.feature_distribution`\); the distribution
+    of an element over time windows is then computed from its yearly counts
+    alone.
+
+    Parameters
+    ----------
+    corpus : :class:`.Corpus`
+    featureset_name : str
+        Name of a featureset in ``corpus``\.
+    """
+
+    def __init__(self, corpus, featureset_name):
+        if 'date' not in corpus.indices:
+            corpus.index('date')
+        featureset = corpus.features[featureset_name]
+
+        # Used by Corpus to decide whether the index is out of date.
+        self.featureset = featureset
+        self.N_documents = featureset.N_documents
+
+        self.years = sorted(corpus.indices['date'].keys())
+        self.counts = defaultdict(dict)     # Element -> {year: count}.
+        self.documentCounts = defaultdict(dict)
+        for year, keys in corpus.indices['date'].iteritems():
+            for key in keys:
+                feature = featureset.features.get(key)
+                if not feature:
+                    continue
+                if type(feature[0]) is not tuple:   # StructuredFeature.
+                    feature = Counter(feature).items()
+                for elem, value in feature:
+                    counts = self.counts[elem]
+                    counts[year] = counts.get(year, 0.) + value
+                    documentCounts = self.documentCounts[elem]
+                    documentCounts[year] = documentCounts.get(year, 0.) + 1.
+
+    def distribution(self, feature, mode='counts', **slice_kwargs):
+        """
+        The values of ``feature`` in each time window.
+
+        Parameters
+        ----------
+        feature : str
+            An element of the featureset.
+        mode : str
+            (default: ``'counts'``) ``'counts'`` or ``'documentCounts'``\.
+        slice_kwargs : kwargs
+            ``window_size``\, ``step_size``\, and ``cumulative``\, as in
+            :meth:`.Corpus.slice`\.
+
+        Returns
+        -------
+        tuple
+            ``(keys, values)``
+        """
+        keys, values = self.distributions([feature], mode, **slice_kwargs)
+        return keys, values[feature]
+
+    def distributions(self, features, mode='counts', window_size=1,
+                      step_size=1, cumulative=False, **slice_kwargs):
+        """
+        The values of each of ``features`` in each time window.
+
+        Parameters
+        ----------
+        features : iterable
+            Elements of the featureset.
+        mode : str
+            (default: ``'counts'``) ``'counts'`` or ``'documentCounts'``\.
+        window_size : int
+        step_size : int
+        cumulative : bool
+            As in :meth:`.Corpus.slice`\.
+        slice_kwargs : kwargs
+            Other arguments to :meth:`.Corpus.slice` are ignored.
+
+        Returns
+        -------
+        tuple
+            ``(keys, values)``\, where ``values`` is a ``dict`` mapping each
+            feature onto a list that is aligned with ``keys``\.
+        """
+        if mode == 'counts':
+            series = self.counts
+        else:
+            series = self.documentCounts
+
+        if self.years:
+            windows = list(window_ranges(self.years[0], self.years[-1],
+                                         window_size, step_size, cumulative))
+        else:
+            windows = []
+        keys = [key for key, years in windows]
+        steps = list(_window_steps(windows))
+
+        values = {}
+        for feature in features:
+            counts = series.get(feature, {})
+            total = 0.
+            values[feature] = []
+            for key, add, subtract in steps:
+                if subtract is None:
+                    total, subtract = 0., []
+                total += sum([counts.get(year, 0.) for year in add])
+                total -= sum([counts.get(year, 0.) for year in subtract])
+                values[feature].append(float(total))
+        return keys, values
+
+
+class FeatureCube(object):
+    """
+    A sparse year-by-element matrix of the counts and document counts of the
+    elements in a featureset.
+
+    Each row holds only the elements that occur in that year. The statistics
+    of a time window are the sum of its rows, and its most numerous elements
+    are found by partial selection (``numpy.argpartition``\, or a heap if
+    numpy is not available) rather than by sorting the whole vocabulary.
+
+    Parameters
+    ----------
+    corpus : :class:`.Corpus`
+    featureset_name : str
+        Name of a featureset in ``corpus``\.
+    """
+
+    def __init__(self, corpus, featureset_name):
+        if 'date' not in corpus.indices:
+            corpus.index('date')
+        featureset = corpus.features[featureset_name]
+
+        # Used by Corpus to decide whether the cube is out of date.
+        self.featureset = featureset
+        self.N_documents = featureset.N_documents
+
+        # Columns are the element indices of the featureset.
+        self.index = dict(featureset.index)
+        self.N_elements = len(self.index)
+
+        # Rows are summed as floats; values are returned with the type of the
+        #  featureset's own statistics (e.g. int counts).
+        self.types = dict([(by, _value_type(getattr(featureset, by)))
+                           for by in ['counts', 'documentCounts']])
+
+        self.rows = {}
+        for year, keys in corpus.indices['date'].iteritems():
+            counts, documentCounts = Counter(), Counter()
+            for key in keys:
+                feature = featureset.features.get(key)
+                if not feature:
+                    continue
+                if type(feature[0]) is not tuple:   # StructuredFeature.
+                    feature = Counter(feature).items()
+                for elem, value in feature:
+                    i = featureset.lookup[elem]
+                    counts[i] += value
+                    documentCounts[i] += 1.
+            self.rows[year] = self._row(counts, documentCounts)
+
+    def _row(self, counts, documentCounts):
+        """
+        A sparse row: ``(columns, counts, documentCounts)``\.
+        """
+        columns = sorted(documentCounts.keys())
+        counts = [counts[i] for i in columns]
+        documentCounts = [documentCounts[i] for i in columns]
+        if np is not None:
+            return (np.array(columns, dtype=np.int64),
+                    np.array(counts, dtype=np.float64),
+                    np.array(documentCounts, dtype=np.float64))
+        return columns, counts, documentCounts
+
+    @property
+    def years(self):
+        """
+        The keys of the rows, in order.
+        """
+        return sorted(self.rows.keys())
+
+    def total(self, years=None):
+        """
+        The summed counts and document counts of the rows for ``years``\.
+
+        Parameters
+        ----------
+        years : iterable
+            (optional) Keys of rows; rows that do not exist are ignored. If not
+            given, all rows are summed.
+
+        Returns
+        -------
+        tuple
+            ``(counts, documentCounts)``\; dense arrays over all elements if
+            numpy is available, otherwise ``Counter``\s keyed by column.
+        """
+        if years is None:
+            years = self.rows.keys()
+        if np is not None:
+            totals = (np.zeros(self.N_elements), np.zeros(self.N_elements))
+        else:
+            totals = (Counter(), Counter())
+        self._accumulate(totals, years)
+        return totals
+
+    def _accumulate(self, totals, years, subtract=False):
+        """
+        Add the rows for ``years`` to ``totals`` (from :meth:`.total`\) in
+        place, or subtract them.
+        """
+        counts, documentCounts = totals
+        for year in years:
+            if year not in self.rows:
+                continue
+            columns, rcounts, rdocumentCounts = self.rows[year]
+            if np is not None:  # Columns in a row are unique.
+                if subtract:
+                    counts[columns] -= rcounts
+                    documentCounts[columns] -= rdocumentCounts
+                else:
+                    counts[columns] += rcounts
+                    documentCounts[columns] += rdocumentCounts
+                continue
+
+            sign = -1. if subtract else 1.
+            for i, count, documentCount in zip(columns, rcounts,
+                                               rdocumentCounts):
+                counts[i] += sign * count
+                documentCounts[i] += sign * documentCount
+                if not documentCounts[i]:   # No longer occurs.
+                    del counts[i], documentCounts[i]
+
+    def rollup(self, width=10):
+        """
+        Sum rows into periods of ``width`` years.
+
+        Parameters
+        ----------
+        width : int
+            (default: 10) Rows are grouped by ``(year // width) * width``\, so
+            ``width=10`` gives decades (e.g. 1990 for 1990-1999).
+
+        Returns
+        -------
+        :class:`.FeatureCube`
+            Rows are keyed by the first year of each period.
+        """
+        periods = defaultdict(list)
+        for year in self.rows:
+            periods[(year // width) * width].append(year)
+
+        cube = FeatureCube.__new__(FeatureCube)
+        cube.featureset = self.featureset
+        cube.N_documents = self.N_documents
+        cube.index = self.index
+        cube.N_elements = self.N_elements
+        cube.types = self.types
+        cube.rows = {}
+        for period, years in periods.iteritems():
+            counts, documentCounts = self.total(years)
+            if np is not None:
+                columns = np.flatnonzero(documentCounts)
+                cube.rows[period] = (columns, counts[columns],
+                                     documentCounts[columns])
+            else:
+                cube.rows[period] = self._row(counts, documentCounts)
+        return cube
+
+    def top(self, topn, by='counts', years=None):
+        """
+        The ``topn`` most numerous elements in the rows for ``years``\.
+
+        Parameters
+        ----------
+        topn : int
+        by : str
+            (default: 'counts') Must be 'counts' or 'documentCounts'.
+        years : iterable
+            (optional) Keys of rows. If not given, all rows are used.
+
+        Returns
+        -------
+        list
+            ``(element, value)`` tuples, highest first.
+        """
+        if by not in ['counts', 'documentCounts']:
+            raise NameError('kwarg `by` must be "counts" or "documentCounts"')
+        return self._top(topn, by, *self.total(years))
+
+    def _top(self, topn, by, counts, documentCounts):
+        """
+        The ``topn`` most numerous elements in totals from :meth:`.total`\.
+        """
+        values = counts if by == 'counts' else documentCounts
+        cast = self.types[by]
+
+        if np is not None:
+            columns = np.flatnonzero(documentCounts)    # Elements that occur.
+            if len(columns) > topn:
+                selected = np.argpartition(-values[columns], topn - 1)[:topn]
+                columns = columns[selected]
+            top = sorted([(-values[i], i) for i in columns.tolist()])
+            return [(self.index[i], cast(-value)) for value, i in top]
+
+        top = nlargest(topn, values.iteritems(), key=lambda item: item[1])
+        return [(self.index[i], cast(value)) for i, value in top]
+
+    def slice_top(self, topn, by='counts', **slice_kwargs):
+        """
+        The ``topn`` most numerous elements in each time window.
+
+        Parameters
+        ----------
+        topn : int
+        by : str
+            (default: 'counts') Must be 'counts' or 'documentCounts'.
+        slice_kwargs : kwargs
+            ``window_size``\, ``step_size``\, and ``cumulative``\, as in
+            :meth:`.Corpus.slice`\. Other arguments are ignored.
+
+        Returns
+        -------
+        list
+            ``(key, top)`` tuples, with the same keys as :meth:`.Corpus.slice`
+            and ``top`` as in :meth:`.top`\.
+        """
+        if by not in ['counts', 'documentCounts']:
+            raise NameError('kwarg `by` must be "counts" or "documentCounts"')
+        if not self.rows:
+            return []
+        kwargs = dict([(k, v) for k, v in slice_kwargs.iteritems()
+                       if k in ['window_size', 'step_size', 'cumulative']])
+        windows = window_ranges(min(self.rows), max(self.rows), **kwargs)
+
+        top, totals = [], self.total([])
+        for key, add, subtract in _window_steps(windows):
+            if subtract is None:    # Start over.
+                totals, subtract = self.total([]), []
+            self._accumulate(totals, add)
+            self._accumulate(totals, subtract, subtract=True)
+            top.append((key, self._top(topn, by, *totals)))
+        return top
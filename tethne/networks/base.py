@@ -24,7 +24,7 @@ def _generate_graph(graph_class, pairs, node_attrs={}, edge_attrs={},
 
 
 def _get_featureset(corpus_or_featureset, featureset_name):
-    if type(corpus_or_featureset) in [Corpus, StreamingCorpus]:  # Retrieve FeatureSet from Corpus.
+    if isinstance(corpus_or_featureset, Corpus):  # Retrieve FeatureSet from Corpus.
         if not featureset_name:
             raise ValueError('featureset_name must be provided for Corpus')
         if featureset_name not in corpus_or_featureset.features:
@@ -48,7 +48,7 @@ def cooccurrence(corpus_or_featureset, featureset_name=None, min_weight=1,
 
     featureset = _get_featureset(corpus_or_featureset, featureset_name)
 
-    if type(corpus_or_featureset) in [Corpus, StreamingCorpus]:
+    if isinstance(corpus_or_featureset, Corpus):
         attributes = {i: {a: corpus_or_featureset.indices_lookup[i][a] for a in edge_attrs}
                       for i in corpus_or_featureset.indexed_papers.keys()}
 
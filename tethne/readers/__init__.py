@@ -3,6 +3,8 @@ Methods for parsing bibliographic datasets.
 
 .. autosummary::
 
+   read
+   update
    merge
    dfr
    wos
@@ -10,11 +12,25 @@ Methods for parsing bibliographic datasets.
    scopus
 
 Each module in :mod:`tethne.readers` provides a ``read`` function that yields
-a :class:`.Corpus` instance.
+a :class:`.Corpus` instance. :func:`.read` loads a directory that mixes several
+formats into a single :class:`.Corpus`\, and :func:`.update` adds new or
+changed files to it.
 
 """
 
-from tethne import Paper, Corpus
+import os
+import re
+from collections import Counter, defaultdict
+
+from tethne import Paper, Corpus, StreamingCorpus
+from tethne.classes.symbols import SymbolTable
+from tethne.readers.base import _BOMS, _parallel_imap
+from tethne.readers.cache import get_cache, Manifest
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    unicode = str
 
 class DataError(Exception):
     def __init__(self, value):
@@ -22,9 +38,384 @@ class DataError(Exception):
     def __str__(self):
         return repr(self.value)
 
-# TODO: merge FeatureSets.
+_SNIFF_SIZE = 4096
+"""Number of bytes at the start of each file used to determine its format."""
+
+_WOS_START = re.compile(u'^(FN|VR|PT) ')
+_DFR_ROOT = re.compile(u'<citations[\\s>]')
+_SCOPUS_COLUMNS = set([u'Authors', u'Title', u'Source title'])
+
+
+def _sniff(path):
+    """
+    Guess the format of a data file from its first few bytes.
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    str or None
+        One of ``'wos'``, ``'dfr'`` (a DfR ``citations.xml`` file),
+        ``'zotero'`` or ``'scopus'``; or None if the format is not recognized.
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(_SNIFF_SIZE)
+
+    encoding = 'utf-8'
+    for bom, bom_encoding in _BOMS:
+        if sample.startswith(bom):
+            sample, encoding = sample[len(bom):], bom_encoding
+            break
+    text = sample.decode(encoding, 'replace').lstrip()
+
+    if _WOS_START.match(text):
+        return 'wos'
+    if text.startswith(u'<'):
+        if u'www.w3.org/1999/02/22-rdf-syntax-ns#' in text:
+            return 'zotero'
+        if _DFR_ROOT.search(text):
+            return 'dfr'
+        return
+    header = set([column.strip(u' "') for column
+                  in text.split(u'\n', 1)[0].split(u',')])
+    if _SCOPUS_COLUMNS <= header:
+        return 'scopus'
+
+
+def _find_datasets(path):
+    """
+    Find and identify all of the data files at ``path``\, in sorted order.
+
+    N-gram files in DfR datasets, and other files that are not recognized, are
+    ignored.
+
+    Returns
+    -------
+    list
+        ``(format, path)`` tuples.
+    """
+    if not os.path.isdir(path):
+        return [(_sniff(path), path)]
+
+    datasets = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = sorted([d for d in dirnames if not d.startswith('.')])
+        for fname in sorted(filenames):
+            if fname.startswith('.'):
+                continue
+            fpath = os.path.join(dirpath, fname)
+            fmt = _sniff(fpath)
+            if fmt is not None:
+                datasets.append((fmt, fpath))
+            if fmt == 'dfr':    # Subdirectories hold N-grams.
+                dirnames[:] = []
+    return datasets
+
+
+def _parse_dataset(args):
+    """
+    Parse a single data file, using the reader for its format. Module-level so
+    that it can be dispatched to worker processes.
+
+    Returns
+    -------
+    list
+        :class:`.Paper`\s.
+    """
+    fmt, path, parse_only, cache, symbols = args
+    if fmt == 'wos':
+        from tethne.readers import wos
+        return wos._parse_file((path, parse_only, cache, symbols))
+    elif fmt == 'scopus':
+        from tethne.readers import scopus
+        return scopus._parse_file(path, parse_only, cache, symbols)
+    elif fmt == 'dfr':
+        from tethne.readers.dfr import DfRParser
+        parse = lambda: DfRParser(path, symbols=symbols).parse(
+                                                        parse_only=parse_only)
+        if cache is None:
+            return parse()
+        key = DfRParser.cache_key(parse_only=parse_only)
+        return cache.get_or_parse(path, key, parse)
+    elif fmt == 'zotero':
+        from tethne.readers import zotero
+        return zotero.read(path, corpus=False, cache=cache)
+    raise ValueError('Unknown format: {0}'.format(fmt))
+
+
+def read(path, corpus=True, index_by='ayjid', parse_only=None, streaming=False,
+         load_ngrams=True, processes=1, cache=False, **kwargs):
+    """
+    Load all of the WoS, DfR, Zotero and Scopus data at ``path`` into a single
+    :class:`.Corpus`\.
+
+    The format of each file is determined from its first few bytes, rather
+    than from its name. All of the files are then parsed, in a pool of
+    ``processes`` worker processes if more than one is requested, and their
+    :class:`.Paper`\s are indexed as they arrive.
+
+    :class:`.Paper`\s that describe the same work are not combined; see
+    :func:`.merge`\. The :class:`.Corpus` keeps a :class:`.Manifest` of the
+    files that were read, so that it can be brought up to date with
+    :func:`.update`\.
+
+    Examples
+    --------
+    .. code-block:: python
+
+       >>> from tethne.readers import read
+       >>> corpus = read("/path/to/mixed/data", processes=4)
+
+    Parameters
+    ----------
+    path : str
+        A single data file, or a directory. Directories are searched
+        recursively. A directory containing a DfR ``citations.xml`` file is
+        treated as a DfR dataset.
+    corpus : bool
+        If True (default), returns a :class:`.Corpus`\. If False, will return
+        only a list of :class:`.Paper`\s.
+    index_by : str
+        (default: ``'ayjid'``) Field used as the primary index. Since the
+        formats have different identifiers, this should be a field that they
+        all provide.
+    parse_only : list
+        If provided, only these fields will be parsed.
+    streaming : bool
+        (default: False) If True, returns a :class:`.StreamingCorpus`\.
+    load_ngrams : bool
+        (default: True) Load N-gram data from DfR datasets as featuresets. See
+        :func:`tethne.readers.dfr.ngrams`\.
+    processes : int
+        (default: 1) Number of worker processes used to parse data files.
+    cache : bool, str, or :class:`.ParseCache`
+        (default: False) If set, parse results for each data file are stored
+        on disk, and re-used on subsequent reads of the same (unchanged) file.
+        See :func:`tethne.readers.cache.get_cache`\.
+    kwargs : kwargs
+        Passed to the :class:`.Corpus` constructor.
+
+    Returns
+    -------
+    :class:`.Corpus` or list
+    """
+    if not os.path.exists(path):
+        raise ValueError('No such file or directory')
+
+    datasets = _find_datasets(path)
+    if not [fmt for fmt, fpath in datasets if fmt is not None]:
+        raise DataError('No recognized data files at {0}'.format(path))
+
+    # We need the primary index field in the parse results.
+    if parse_only:
+        parse_only = list(parse_only) + [index_by]
+
+    cache = get_cache(cache)
+    if not corpus:
+        symbols = SymbolTable() if processes < 2 else None
+        jobs = [(fmt, fpath, parse_only, cache, symbols)
+                for fmt, fpath in datasets]
+        results = _parallel_imap(_parse_dataset, jobs, processes=processes)
+        return [paper for papers in results for paper in papers]
+
+    corpus_class = StreamingCorpus if streaming else Corpus
+    corpus = corpus_class(index_by=index_by, **kwargs)
+    corpus.manifest = Manifest()
+    _ingest(corpus, datasets, parse_only, load_ngrams, processes, cache)
+    return corpus
+
+
+def update(corpus, path, parse_only=None, load_ngrams=True, processes=1,
+           cache=False):
+    """
+    Add data from new or changed files at ``path`` to a :class:`.Corpus` that
+    was built by :func:`.read`\.
+
+    Files that were already ingested, and have not changed since, are not
+    parsed again. :class:`.Paper`\s from changed files replace those that were
+    parsed from the earlier version. The :class:`.Corpus` is updated in place,
+    so the cost of an update is proportional to the amount of new data.
+
+    :class:`.Paper`\s from files that have been deleted are kept.
+
+    Examples
+    --------
+    .. code-block:: python
+
+       >>> from tethne.readers import read, update
+       >>> corpus = read("/path/to/growing/data")
+       >>> # ...new files are added to /path/to/growing/data...
+       >>> update(corpus, "/path/to/growing/data")
+
+    Parameters
+    ----------
+    corpus : :class:`.Corpus`
+        Must have a :attr:`.Corpus.manifest`\.
+    path : str
+        A single data file, or a directory; see :func:`.read`\.
+    parse_only : list
+        If provided, only these fields will be parsed.
+    load_ngrams : bool
+        (default: True) Load N-gram data from new DfR datasets.
+    processes : int
+        (default: 1) Number of worker processes used to parse data files.
+    cache : bool, str, or :class:`.ParseCache`
+        (default: False) See :func:`.read`\.
+
+    Returns
+    -------
+    :class:`.Corpus`
+        The same instance as ``corpus``\.
+    """
+    if corpus.manifest is None:
+        raise ValueError('Corpus has no manifest. Use read() to create it.')
+    if not os.path.exists(path):
+        raise ValueError('No such file or directory')
+
+    datasets = [(fmt, fpath) for fmt, fpath in _find_datasets(path)
+                if fmt is not None and not corpus.manifest.is_current(fpath)]
+
+    if parse_only:
+        parse_only = list(parse_only) + [corpus.index_by]
+
+    _ingest(corpus, datasets, parse_only, load_ngrams, processes,
+            get_cache(cache))
+    return corpus
+
+
+def _ingest(corpus, datasets, parse_only=None, load_ngrams=True, processes=1,
+            cache=None):
+    """
+    Parse ``datasets`` and index their :class:`.Paper`\s (and any DfR
+    N-grams) in ``corpus``\, recording each file in its manifest.
+
+    :class:`.Paper`\s parsed from an earlier version of the same file are
+    removed first.
+    """
+    manifest = corpus.manifest
+    fingerprints = [manifest.fingerprint(fpath) for fmt, fpath in datasets]
+
+    # Papers from an earlier version of a file are kept if another file also
+    #  provides them.
+    owners = Counter([key for entry in manifest.entries.values()
+                      for key in set(entry['keys'])])
+
+    # A table can't be shared with worker processes.
+    if corpus.symbols is None:
+        corpus.symbols = SymbolTable()
+    symbols = corpus.symbols if processes < 2 else None
+
+    jobs = [(fmt, fpath, parse_only, cache, symbols) for fmt, fpath in datasets]
+    results = _parallel_imap(_parse_dataset, jobs, processes=processes)
+
+    rekey = {}  # N-grams are keyed by DOI.
+    for i, papers in enumerate(results):
+        fmt, fpath = datasets[i]
+        corpus.remove_papers([key for key in set(manifest.keys(fpath))
+                              if owners[key] < 2])
+
+        corpus.add_papers(papers)
+        keys = [corpus._generate_index(paper) for paper in papers]
+        manifest.add(fpath, keys, fingerprints[i])
+
+        if fmt == 'dfr':
+            rekey.update([(paper.doi, key) for paper, key in zip(papers, keys)
+                          if hasattr(paper, 'doi')])
+
+    for fmt, fpath in datasets:
+        if fmt != 'dfr' or not load_ngrams:
+            continue
+        for name, featureset in _read_ngrams(os.path.dirname(fpath), processes,
+                                             cache):
+            featureset = featureset.rekey(rekey)
+            if name not in corpus.features:
+                corpus.features[name] = featureset
+            else:   # From another DfR dataset, or an earlier version.
+                for key, feature in featureset.iteritems():
+                    if key in corpus.features[name].features:
+                        corpus.features[name].remove(key)
+                    corpus.features[name].add(key, feature)
+
+
+def _read_ngrams(path, processes=1, cache=None):
+    """
+    Yields ``(name, featureset)`` for each N-gram directory in the DfR dataset
+    at ``path``\.
+    """
+    from tethne.readers.dfr import ngrams
+    for name in sorted(os.listdir(path)):
+        fpath = os.path.join(path, name)
+        if not os.path.isdir(fpath) or name.startswith('.'):
+            continue
+        if [f for f in os.listdir(fpath) if f.lower().endswith('xml')]:
+            yield name, ngrams(path, name, processes=processes, cache=cache)
+
+
+def _norm(value):
+    if type(value) in [str, unicode]:
+        return value.strip().lower()
+    return value
+
+
+def _hashable(value):
+    """
+    Returns a hashable representation of ``value`` that is equal to the
+    representation of another value if and only if the two values are equal.
+
+    Raises ``TypeError`` if no such representation is available.
+    """
+    if type(value) is list:
+        return (list, tuple([_hashable(v) for v in value]))
+    if type(value) is tuple:
+        return tuple([_hashable(v) for v in value])
+    hash(value)
+    return value
+
+
+def _unzip(pairs):
+    if not pairs:
+        return [], []
+    return [list(values) for values in zip(*pairs)]
+
+
+class _FieldIndex(object):
+    """
+    Maps normalized values of a field to the positions of the
+    :class:`.Paper`\s that have them. Values that can't be hashed are kept
+    aside, and compared one at a time.
+    """
+
+    def __init__(self, papers, field):
+        self.field = field
+        self.index = defaultdict(list)
+        self.unhashable = []
+        for j, paper in enumerate(papers):
+            if not hasattr(paper, field):
+                continue
+            value = _norm(getattr(paper, field))
+            try:
+                self.index[_hashable(value)].append(j)
+            except TypeError:
+                self.unhashable.append((j, value))
+
+    def lookup(self, paper):
+        """
+        Positions of :class:`.Paper`\s with the same (normalized) value as
+        ``paper`` for this field.
+        """
+        if not hasattr(paper, self.field):
+            return []
+        value = _norm(getattr(paper, self.field))
+        try:
+            return self.index.get(_hashable(value), [])
+        except TypeError:
+            return [j for j, other in self.unhashable if other == value]
+
+
 def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
-          index_by='ayjid'):
+          index_by='ayjid', block_by=None):
     """
     Combines two :class:`.Corpus` instances.
 
@@ -39,6 +430,12 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
     Where two matched :class:`.Paper`\s have values for the same field, values
     from the :class:`.Paper` instance in ``corpus_1`` will always be  preferred.
 
+    :class:`.Paper`\s are matched on fields by building a hash index of the
+    normalized field values in ``corpus_2``\, so that each :class:`.Paper` in
+    ``corpus_1`` is only compared with :class:`.Paper`\s that share at least
+    one value. A callable ``match_by`` is evaluated for every pair of
+    :class:`.Paper`\s, unless ``block_by`` is provided.
+
     Parameters
     ----------
     corpus_1 : :class:`.Corpus`
@@ -57,6 +454,10 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
         The field to use as the primary indexing field in the new
         :class:`.Corpus`\. Default is `ayjid`, since this is virtually always
         available.
+    block_by : list
+        If ``match_by`` is callable, only pairs of :class:`.Paper`\s that have
+        the same (normalized) value for at least one of these fields will be
+        evaluated.
 
     Returns
     -------
@@ -74,104 +475,108 @@ def merge(corpus_1, corpus_2, match_by=['ayjid'], match_threshold=1.,
 
     """
 
-    def norm(value):
-        if type(value) in [str, unicode]:
-            return value.strip().lower()
-        return value
-
+    # Keys are the primary index values in each Corpus.
+    keys_1, papers_1 = _unzip(corpus_1.indexed_papers.items())
+    keys_2, papers_2 = _unzip(corpus_2.indexed_papers.items())
+
+    # Yields the positions in corpus_2 of candidate matches for each Paper in
+    #  corpus_1, in order.
+    if callable(match_by):
+        if block_by:
+            indices = [_FieldIndex(papers_2, field) for field in block_by]
+            candidates = lambda paper_1: sorted(set([
+                j for index in indices for j in index.lookup(paper_1)]))
+        else:
+            candidates = lambda paper_1: range(len(papers_2))
+        is_match = lambda paper_1, j: match_by(paper_1, papers_2[j])
+
+    elif match_threshold <= 0.:     # Every pair matches.
+        candidates = lambda paper_1: range(len(papers_2))
+        is_match = lambda paper_1, j: True
+
+    else:
+        indices = [_FieldIndex(papers_2, field) for field in match_by]
+
+        def candidates(paper_1):
+            # The number of fields in ``match_by`` on which each candidate
+            #  matches this paper.
+            matches = Counter([j for index in indices
+                               for j in index.lookup(paper_1)])
+            return [j for j in sorted(matches)
+                    if float(matches[j])/len(match_by) >= match_threshold]
+        is_match = lambda paper_1, j: True
 
     combined = []
-    exclude_1 = []
-    exclude_2 = []
+    combined_from_1 = {}    # Position in corpus_1 -> position in combined.
+    combined_from_2 = {}
 
     # Attempt to match Papers
-    for paper_1 in corpus_1:
-        for paper_2 in corpus_2:
-            # The user can provide their own matching logic. In this case,
-            #  match_threshold is ignored.
-            if callable(match_by):
-                match = match_by(paper_1, paper_2)
-
-            # Otherwise we match using the fields in ``match_by``.
-            else:
-                matches = 0.
-                for field in match_by:
-                    if hasattr(paper_1, field) and hasattr(paper_2, field):
-                        value_1 = norm(getattr(paper_1, field))
-                        value_2 = norm(getattr(paper_2, field))
-                        if value_1 == value_2:
-                            matches += 1.
-                match = matches/len(match_by) >= match_threshold
-
-            # Not every field needs to match precisely;
-            if match:
-                paper_new = Paper()
-                # We add values from paper_2 first, so that...
-                for key, value in paper_2.__dict__.iteritems():
-                    if value not in ['', [], None]:
-                        paper_new[key] = value
-
-                # ...values from paper_1 will override values from paper_2.
-                for key, value in paper_1.__dict__.iteritems():
-                    if value not in ['', [], None]:
-                        paper_new[key] = value
-
-                # We assemble all papers before creating a new Corpus, so that
-                #  indexing happens all in one shot.
-                combined.append(paper_new)
-
-                # Flag matched papers for exclusion.
-                exclude_1.append(corpus_1._generate_index(paper_1))
-                exclude_2.append(corpus_2._generate_index(paper_2))
-
+    for i, paper_1 in enumerate(papers_1):
+        for j in candidates(paper_1):
+            if not is_match(paper_1, j):
+                continue
+            paper_2 = papers_2[j]
+
+            paper_new = Paper()
+            # We add values from paper_2 first, so that...
+            for key, value in paper_2.__dict__.iteritems():
+                if value not in ['', [], None]:
+                    paper_new[key] = value
+
+            # ...values from paper_1 will override values from paper_2.
+            for key, value in paper_1.__dict__.iteritems():
+                if value not in ['', [], None]:
+                    paper_new[key] = value
+
+            # Matched papers are flagged for exclusion. Features follow the
+            #  first combined Paper that each matched Paper contributes to.
+            combined_from_1.setdefault(i, len(combined))
+            combined_from_2.setdefault(j, len(combined))
+
+            # We assemble all papers before creating a new Corpus, so that
+            #  indexing happens all in one shot.
+            combined.append(paper_new)
 
     # Include papers that were not matched.
-    combined += [paper for paper in corpus_1
-                 if corpus_1._generate_index(paper) not in exclude_1]
-    combined += [paper for paper in corpus_2
-                 if corpus_2._generate_index(paper) not in exclude_2]
+    for i, paper in enumerate(papers_1):
+        if i not in combined_from_1:
+            combined_from_1[i] = len(combined)
+            combined.append(paper)
+    for j, paper in enumerate(papers_2):
+        if j not in combined_from_2:
+            combined_from_2[j] = len(combined)
+            combined.append(paper)
 
     # Here indexing happens all at once, with the new ``index_by`` field.
     corpus = Corpus(combined, index_by=index_by)
 
-    featuresets = {}
-    for featureset_name, featureset_1 in corpus_1.features.iteritems():
-        # We avoid FeatureSets that were generated during the indexing process
-        #  (e.g. 'citations', 'authors').
-        if featureset_name in featuresets or featureset_name in corpus.features:
-            continue
-
-        features = {}
-
-        # Can be FeatureSet or StructuredFeatureSet.
-        fclass = type(featureset_1)
-        if featureset_name in corpus_2.features:
-            featureset_2 = corpus_2.features[featureset_name]
-            for index, feature in featureset_2.iteritems():
-                features[getattr(corpus_2[index], index_by)] = feature
-
-        # Features from corpus_1 will be preferred over those from corpus_2.
-        for index, feature in featureset_1.iteritems():
-            features[getattr(corpus_1[index], index_by)] = feature
-
-        featuresets[featureset_name] = fclass(features)
+    # Features are re-keyed using the primary index of the new Corpus, without
+    #  copying the features themselves.
+    new_keys = [corpus._generate_index(paper) for paper in combined]
+    rekey_1 = dict([(key, new_keys[combined_from_1[i]])
+                    for i, key in enumerate(keys_1)])
+    rekey_2 = dict([(key, new_keys[combined_from_2[j]])
+                    for j, key in enumerate(keys_2)])
 
-    # FeatureSets unique to corpus_2.
-    for featureset_name, featureset_2 in corpus_2.features.iteritems():
+    for featureset_name in set(corpus_1.features) | set(corpus_2.features):
         # We avoid FeatureSets that were generated during the indexing process
         #  (e.g. 'citations', 'authors').
-        if featureset_name in featuresets or featureset_name in corpus.features:
+        if featureset_name in corpus.features:
             continue
 
-        features = {}
-
-        # Can be FeatureSet or StructuredFeatureSet.
-        fclass = type(featureset_2)
-        for index, feature in featureset_2.iteritems():
-            features[getattr(corpus_2[index], index_by)] = feature
-
-        featuresets[featureset_name] = fclass(features)
-
-    corpus.features.update(featuresets)
+        # Features from corpus_1 will be preferred over those from corpus_2.
+        parts = [(source.features[featureset_name], rekey)
+                 for source, rekey in [(corpus_1, rekey_1), (corpus_2, rekey_2)]
+                 if featureset_name in source.features]
+        featureset, rekey = parts[0]
+
+        merged = featureset.rekey(rekey)
+        for part, part_rekey in parts[1:]:
+            features = dict([(part_rekey.get(key, key), feature)
+                             for key, feature in part.iteritems()])
+            for key, feature in features.iteritems():
+                if key not in merged.features:
+                    merged.add(key, feature)
+        corpus.features[featureset_name] = merged
 
     return corpus
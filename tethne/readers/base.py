@@ -3,14 +3,33 @@ import re
 import xml.etree.ElementTree as ET
 import rdflib
 
+try:    # Much faster, where it is available (Python 2.x).
+    import xml.etree.cElementTree as cET
+except ImportError:
+    cET = ET
+
+try:    # Optional backend for XMLParser.
+    from lxml import etree as lET
+except ImportError:
+    lET = None
+
 import codecs
 import chardet
-import copy
 import unicodedata
 
 import logging
 
 from io import BytesIO
+from collections import defaultdict, deque, OrderedDict
+from rdflib.parser import create_input_source
+
+from tethne.classes.symbols import SymbolTable
+from tethne.utilities import _parallel_imap
+
+try:
+    from urlparse import urljoin
+except ImportError:     # Python 3.
+    from urllib.parse import urljoin
 
 # rdflib complains a lot.
 logging.getLogger("rdflib").setLevel(logging.ERROR)
@@ -21,12 +40,15 @@ if PYTHON_3:
     unicode = str
 
 
-def _fast_iter(context, func, tag):
-    for event, elem in context:
-        func(elem)
-        if elem.tag == tag:
-            elem.clear()
-    del context
+# Byte-order marks, and the encodings that they indicate. UTF-32 marks must be
+#  checked first, since BOM_UTF32_LE begins with BOM_UTF16_LE.
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
 
 
 class dobject(object):
@@ -52,6 +74,47 @@ class BaseParser(object):
     """
     Base class for all data parsers. Do not instantiate directly.
     """
+
+    cache_version = 1
+    """
+    Should be incremented whenever a change to the parser alters its output,
+    so that stale results in a :class:`.ParseCache` are not used.
+    """
+
+    intern_fields = []
+    """
+    Fields whose values are interned in :attr:`.symbols`\, because they are
+    likely to be repeated across many entries.
+    """
+
+    symbols = None
+    """
+    A :class:`.SymbolTable`\. Can be passed to the constructor, so that several
+    parsers share one table.
+    """
+
+    @classmethod
+    def cache_key(cls, **options):
+        """
+        Generate a key that identifies results produced by this parser, with
+        ``options``, in a :class:`.ParseCache`\.
+
+        Parameters
+        ----------
+        options : kwargs
+            Any options that affect the parse result (e.g. ``parse_only``).
+
+        Returns
+        -------
+        tuple
+        """
+        items = []
+        for name, value in sorted(options.items()):
+            if type(value) in [list, set, tuple]:   # Order doesn't matter.
+                value = tuple(sorted(set(value)))
+            items.append((name, value))
+        return (cls.__module__, cls.__name__, cls.cache_version, tuple(items))
+
     def __init__(self, path, **kwargs):
         self.path = path
         self.data = []
@@ -59,6 +122,8 @@ class BaseParser(object):
 
         for k, v in kwargs.iteritems():
             setattr(self, k, v)
+        if self.symbols is None:
+            self.symbols = SymbolTable()
 
         self.open()
 
@@ -77,11 +142,22 @@ class BaseParser(object):
     def set_value(self, tag, value):
         setattr(self.data[-1], tag, value)
 
+    def intern_citation(self, citation):
+        """
+        Interns the journal and authors of a cited reference, and its
+        ``ayjid`` (which is used as the citation feature), if it has one.
+        """
+        self.symbols.intern_entry(citation, ['journal', 'authors_init'])
+        if hasattr(type(citation), 'ayjid'):
+            citation._ayjid = self.symbols.intern(citation.ayjid)
+
     def postprocess_entry(self):
         for field in self.fields:
             processor_name = 'postprocess_{0}'.format(field)
             if hasattr(self.data[-1], field) and hasattr(self, processor_name):
                 getattr(self, processor_name)(self.data[-1])
+        if self.data:
+            self.symbols.intern_entry(self.data[-1], self.intern_fields)
 
 
 class IterParser(BaseParser):
@@ -107,7 +183,34 @@ class IterParser(BaseParser):
 
     def parse(self, parse_only=None):
         """
+        Parse all of the entries in the data file.
 
+        Parameters
+        ----------
+        parse_only : list
+            If provided, only these fields will be parsed.
+
+        Returns
+        -------
+        list
+        """
+        self.data = list(self.iter_entries(parse_only=parse_only))
+        return self.data
+
+    def iter_entries(self, parse_only=None):
+        """
+        Yields each entry as soon as it is finished, rather than accumulating
+        all entries in :attr:`.data`\. Only the entry currently being parsed is
+        held by the parser.
+
+        Parameters
+        ----------
+        parse_only : list
+            If provided, only these fields will be parsed.
+
+        Returns
+        -------
+        generator
         """
         # The user should be able to limit parsing to specific fields.
         if parse_only:
@@ -124,7 +227,13 @@ class IterParser(BaseParser):
 
             self.handle(tag, data)
             self.last_tag = tag
-        return self.data
+
+            # Once a new entry has been started, the previous one is finished.
+            while len(self.data) > 1:
+                yield self.data.pop(0)
+
+        while self.data:
+            yield self.data.pop(0)
 
     def start(self):
         """
@@ -183,6 +292,12 @@ class IterParser(BaseParser):
         self.fields.add(tag)
 
 
+# A line in a field-tagged file begins with a two-character tag, unless it
+#  continues the previous line.
+_FT_LINE = re.compile('([A-Z]{2}|[C][1])\W(.*)')
+_FT_TAG = re.compile(b'([A-Z]{2}|[C][1])\W')
+
+
 class FTParser(IterParser):
     """
     Base parser for field-tagged data files.
@@ -203,6 +318,12 @@ class FTParser(IterParser):
     def is_eof(self, tag):
         return self.at_eof
 
+    sample_size = 65536
+    """
+    Number of bytes from the start of the data file used to detect its
+    encoding.
+    """
+
     def open(self):
         """
         Open the data file.
@@ -211,19 +332,72 @@ class FTParser(IterParser):
         if not os.path.exists(self.path):
             raise IOError("No such path: {0}".format(self.path))
 
+        f = open(self.path, "rb")
+        self.encoding, bom_length = self._detect_encoding(f.read(self.sample_size))
+        f.seek(bom_length)
 
-        with open(self.path, "rb") as f:
-            msg = f.read()
-        result = chardet.detect(msg)
-
-        self.buffer = codecs.open(self.path, "rb", encoding=result['encoding'])
+        if self.encoding.replace('-', '').lower().startswith(('utf16', 'utf32')):
+            # Lines can't be split reliably until they are decoded.
+            self.buffer = codecs.getreader(self.encoding)(f)
+        else:
+            self.buffer = f
 
         self.at_eof = False
 
+    def _detect_encoding(self, sample):
+        """
+        Guess the encoding of the data file from a sample of its first bytes.
+
+        A byte-order mark is used if there is one. Otherwise, UTF-8 is
+        preferred if the sample is valid UTF-8; only if it is not do we fall
+        back to ``chardet``.
+
+        Parameters
+        ----------
+        sample : str
+            Bytes from the start of the data file.
+
+        Returns
+        -------
+        encoding : str
+        bom_length : int
+            Number of bytes to skip at the start of the file.
+        """
+        for bom, encoding in _BOMS:
+            if sample.startswith(bom):
+                return encoding, len(bom)
+
+        try:    # The sample may end partway through a multibyte character.
+            codecs.getincrementaldecoder('utf-8')().decode(sample, False)
+            return 'utf-8', 0
+        except UnicodeDecodeError:
+            pass
+        return chardet.detect(sample)['encoding'] or 'utf-8', 0
+
+    def _decode(self, line):
+        """
+        Decode a single line from the data file.
+
+        If the line can't be decoded with the encoding detected from the
+        sample, the encoding is re-detected from the line itself and used for
+        the rest of the file.
+        """
+        if isinstance(line, unicode):   # Already decoded.
+            return line
+
+        try:
+            return line.decode(self.encoding)
+        except UnicodeDecodeError:
+            self.encoding = chardet.detect(line)['encoding'] or self.encoding
+            return line.decode(self.encoding, 'replace')
+
     def next(self):
         """
         Get the next line of data.
 
+        If only some fields are being parsed (see :meth:`.iter_entries`\),
+        lines belonging to other fields are skipped without being decoded.
+
         Returns
         -------
         tag : str
@@ -231,14 +405,16 @@ class FTParser(IterParser):
         """
         line = self.buffer.readline()
 
-        while line == '\n':       # Skip forward to the next line with content.
+        # Skip forward to the next line with content.
+        while line in ('\n', b'\n') or self._skip(line):
             line = self.buffer.readline()
+        line = self._decode(line)
 
         if line == '':            # End of file.
             self.at_eof = True
             return None, None
 
-        match = re.match('([A-Z]{2}|[C][1])\W(.*)', line)
+        match = _FT_LINE.match(line)
         if match is not None:
             self.current_tag, data = match.groups()
         else:
@@ -246,22 +422,69 @@ class FTParser(IterParser):
             data = line.strip()
         return self.current_tag, _cast(data)
 
+    def _skip(self, line):
+        """
+        Determine whether a raw (undecoded) line belongs to a field that will
+        be discarded by :meth:`.handle`\, and so need not be decoded at all.
+
+        Only lines read as bytes can be skipped; in encodings that can be split
+        into lines before decoding, the tag at the start of a line is ASCII.
+        """
+        parse_only = getattr(self, 'parse_only', None)
+        if not parse_only or not line or isinstance(line, unicode):
+            return False
+
+        match = _FT_TAG.match(line)
+        tag = match.group(1).decode('ascii') if match else self.last_tag
+        if tag in parse_only or self.is_start(tag) or self.is_end(tag):
+            return False
+
+        # Continuation lines (if any) should be skipped, too.
+        self.current_tag = self.last_tag = tag
+        return True
+
     def __del__(self):
         if hasattr(self, 'buffer'):
             self.buffer.close()
 
 
+def _iterparse(source, use_lxml=False):
+    """
+    Incrementally parse an XML document, yielding ``start`` and ``end`` events.
+
+    Parameters
+    ----------
+    source : file
+        A file-like object, opened in binary mode.
+    use_lxml : bool
+        (default: False) Use :mod:`lxml`\, if it is installed. Otherwise,
+        ``cElementTree`` is used where it is available.
+
+    Returns
+    -------
+    iterator
+        Yields ``(event, element)`` tuples.
+    """
+    events = ('start', 'end')
+    if use_lxml and lET is not None:
+        return lET.iterparse(source, events=events, huge_tree=True)
+    return cET.iterparse(source, events=events)
+
+
 class XMLParser(IterParser):
     entry_element = 'article'
     entry_class = dobject
 
+    use_lxml = False
+    """
+    Use :mod:`lxml` to parse the data file, if it is installed. It is no faster
+    than ``cElementTree`` for the small records in bibliographic data, but is
+    more tolerant of very large text nodes.
+    """
+
     def open(self):
-        # with open(self.path, 'r') as f:
-        #     self.root = ET.fromstring(f.read())
-        # pattern = './/{elem}'.format(elem=self.entry_element)
-        # self.elements = self.root.findall(pattern)
-        self.f = open(self.path, 'r')
-        self.iterator = ET.iterparse(self.f)
+        self.f = open(self.path, 'rb')
+        self.iterator = _iterparse(self.f, self.use_lxml)
 
         self.at_start = False
         self.at_end = False
@@ -288,7 +511,10 @@ class XMLParser(IterParser):
         self.new_entry()
 
     def next(self, child):
-        child = copy.deepcopy(child)
+        """
+        Handle a single (closed) element. Its tag and text are read directly,
+        so the element must not be cleared until this has returned.
+        """
         tag, data = child.tag, child.text
         if data:
             data = data.strip()
@@ -296,9 +522,13 @@ class XMLParser(IterParser):
         self.handle(tag, data)
         self.last_tag = tag
 
-    def parse(self, parse_only=None):
+    def iter_entries(self, parse_only=None):
         """
+        Yields each entry as soon as its ``entry_element`` has been closed.
+        See :meth:`.IterParser.iter_entries`\.
 
+        Once an entry has been handled its subtree is discarded, so memory use
+        does not grow with the size of the data file.
         """
         # The user should be able to limit parsing to specific fields.
         if parse_only:
@@ -307,11 +537,28 @@ class XMLParser(IterParser):
                                    for field in parse_only
                                    if field in tag_lookup]) | set(parse_only)
 
-        _fast_iter(self.iterator, self.next, self.entry_element)
-
-        if len(self.data[-1].__dict__) == 0:
-            del self.data[-1]
-        return self.data
+        parents = []    # Elements that are open at the current position.
+        for event, elem in self.iterator:
+            if event == 'start':
+                parents.append(elem)
+                continue
+
+            parents.pop()
+            self.next(elem)
+            if elem.tag == self.entry_element:
+                # Every child of the parent element is now closed, and has
+                #  been handled.
+                elem.clear()
+                if parents:
+                    del parents[-1][:]
+                while len(self.data) > 1:
+                    yield self.data.pop(0)
+
+        # The last entry is started but never populated.
+        for entry in self.data:
+            if len(entry.__dict__) > 0:
+                yield entry
+        del self.data[:]
 
     def __del__(self):
         if hasattr(self, 'f'):
@@ -326,15 +573,15 @@ class RDFParser(BaseParser):
     def open(self):
         self.graph = rdflib.Graph()
         self.graph.parse(self.path)
-        self.entries = []
+        self.entries = deque()
 
         for element in self.entry_elements:
             query = 'SELECT * WHERE { ?p a ' + element + ' }'
-            self.entries += [r[0] for r in self.graph.query(query)]
+            self.entries.extend([r[0] for r in self.graph.query(query)])
 
     def next(self):
         if len(self.entries) > 0:
-            return self.entries.pop(0)
+            return self.entries.popleft()
 
     def parse(self):
         meta_fields, meta_refs = zip(*self.meta_elements)
@@ -378,3 +625,267 @@ class RDFParser(BaseParser):
 
             setattr(self.data[-1], tag, value)
             self.fields.add(tag)
+
+
+RDF_NS = u'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+XML_NS = u'http://www.w3.org/XML/1998/namespace'
+
+_RDF_TYPE = rdflib.URIRef(RDF_NS + u'type')
+
+# Attributes with special meaning in RDF/XML; these never describe properties.
+_RDF_SYNTAX_ATTRS = set(['{%s}%s' % (RDF_NS, name) for name
+                         in ['about', 'ID', 'nodeID', 'resource', 'parseType',
+                             'datatype', 'bagID', 'aboutEach',
+                             'aboutEachPrefix']])
+
+
+class _TripleIndex(object):
+    """
+    A minimal, subject-indexed stand-in for :class:`rdflib.Graph`\, supporting
+    the lookups used by :class:`.RDFParser` handlers.
+    """
+
+    def __init__(self):
+        self.subjects = defaultdict(list)
+
+    def add(self, triple):
+        s, p, o = triple
+        triples = self.subjects[s]
+        if (p, o) not in triples:   # Like a Graph, a set of triples.
+            triples.append((p, o))
+
+    def triples(self, pattern):
+        s, p, o = pattern
+        if s is None:
+            subjects = list(self.subjects.keys())
+        elif s in self.subjects:
+            subjects = [s]
+        else:
+            return
+        for subject in subjects:
+            for predicate, obj in self.subjects[subject]:
+                if p is not None and predicate != p:
+                    continue
+                if o is not None and obj != o:
+                    continue
+                yield subject, predicate, obj
+
+    def value(self, subject=None, predicate=None):
+        for s, p, o in self.triples((subject, predicate, None)):
+            return o
+
+
+def _iter_rdfxml(path, namespaces=None):
+    """
+    Yields triples from an RDF/XML document as it is read, without building an
+    in-memory graph.
+
+    Handles the RDF/XML constructs that occur in bibliographic exports: typed
+    node elements, property attributes, ``rdf:resource``\, ``rdf:nodeID``\,
+    ``rdf:li``\, ``rdf:parseType="Resource"`` and nested descriptions. Other
+    ``rdf:parseType`` values are treated as XML literals.
+
+    Parameters
+    ----------
+    path : str
+    namespaces : dict
+        If provided, will be populated with the prefix-to-namespace mappings
+        declared in the document.
+
+    Returns
+    -------
+    generator
+        Yields (subject, predicate, object) tuples of :mod:`rdflib` terms.
+    """
+
+    source = create_input_source(path)
+    base = source.getPublicId()
+    source.getByteStream().close()
+
+    bnodes = defaultdict(rdflib.BNode)     # rdf:nodeID -> BNode.
+    if namespaces is None:
+        namespaces = {}
+
+    uris = {}   # Element tags recur constantly; build each URIRef once.
+    def uri(tag):
+        if tag not in uris:
+            uris[tag] = rdflib.URIRef(tag[1:].replace('}', '', 1))
+        return uris[tag]
+
+    def literal(value, lang, datatype=None):
+        if datatype is not None:
+            lang = None
+        return rdflib.Literal(unicode(value), lang=lang, datatype=datatype)
+
+    def resolve(value, frame_base):
+        return rdflib.URIRef(urljoin(frame_base, value, allow_fragments=1))
+
+    # Each frame is a dict describing an open element. ``kind`` is one of
+    #  'root', 'node' (a description of a subject), 'property' (a property
+    #  element whose object is not yet known), or 'skip' (an element whose
+    #  content has already been accounted for).
+    stack = []
+    root = None
+    for event, elem in cET.iterparse(path, events=('start', 'end', 'start-ns')):
+        if event == 'start-ns':
+            prefix, namespace = elem
+            namespaces[prefix] = namespace
+            continue
+
+        if event == 'start':
+            parent = stack[-1] if stack else None
+            frame_base = parent['base'] if parent else base
+            if '{%s}base' % XML_NS in elem.attrib:
+                frame_base = urljoin(frame_base, elem.get('{%s}base' % XML_NS))
+            lang = elem.get('{%s}lang' % XML_NS,
+                            parent['lang'] if parent else None)
+            frame = {'base': frame_base, 'lang': lang, 'kind': 'skip'}
+
+            if parent is None:
+                root = elem
+                if elem.tag == '{%s}RDF' % RDF_NS:
+                    frame['kind'] = 'root'
+                    stack.append(frame)
+                    continue
+                parent = {'kind': 'root'}
+
+            if parent['kind'] in ('root', 'property'):   # A node element.
+                if '{%s}about' % RDF_NS in elem.attrib:
+                    subject = resolve(elem.get('{%s}about' % RDF_NS),
+                                      frame_base)
+                elif '{%s}ID' % RDF_NS in elem.attrib:
+                    subject = resolve('#' + elem.get('{%s}ID' % RDF_NS),
+                                      frame_base)
+                elif '{%s}nodeID' % RDF_NS in elem.attrib:
+                    subject = bnodes[elem.get('{%s}nodeID' % RDF_NS)]
+                else:
+                    subject = rdflib.BNode()
+
+                if parent['kind'] == 'property':
+                    parent['kind'] = 'skip'     # Object is this node.
+                    yield parent['subject'], parent['predicate'], subject
+
+                if elem.tag != '{%s}Description' % RDF_NS:
+                    yield subject, _RDF_TYPE, uri(elem.tag)
+                for triple in _property_attrs(elem, subject, frame_base, lang,
+                                              uri, literal, resolve):
+                    yield triple
+
+                frame.update({'kind': 'node', 'subject': subject, 'li': 0})
+
+            elif parent['kind'] == 'node':    # A property element.
+                subject = parent['subject']
+                if elem.tag == '{%s}li' % RDF_NS:
+                    parent['li'] += 1
+                    predicate = rdflib.URIRef(RDF_NS + u'_%i' % parent['li'])
+                else:
+                    predicate = uri(elem.tag)
+
+                parse_type = elem.get('{%s}parseType' % RDF_NS)
+                if '{%s}resource' % RDF_NS in elem.attrib:
+                    obj = resolve(elem.get('{%s}resource' % RDF_NS),
+                                  frame_base)
+                elif '{%s}nodeID' % RDF_NS in elem.attrib:
+                    obj = bnodes[elem.get('{%s}nodeID' % RDF_NS)]
+                elif parse_type == 'Resource':
+                    obj = rdflib.BNode()
+                    frame.update({'kind': 'node', 'subject': obj, 'li': 0})
+                elif parse_type is not None:
+                    frame.update({'kind': 'xmlliteral', 'subject': subject,
+                                  'predicate': predicate})
+                    obj = None
+                elif [k for k in elem.attrib if k not in _RDF_SYNTAX_ATTRS
+                      and not k.startswith('{%s}' % XML_NS)]:
+                    obj = rdflib.BNode()    # Empty property element.
+                else:
+                    frame.update({'kind': 'property', 'subject': subject,
+                                  'predicate': predicate,
+                                  'datatype': elem.get('{%s}datatype' % RDF_NS)})
+                    obj = None
+
+                if obj is not None:
+                    yield subject, predicate, obj
+                    if parse_type != 'Resource':
+                        for triple in _property_attrs(elem, obj, frame_base,
+                                                      lang, uri, literal,
+                                                      resolve):
+                            yield triple
+            stack.append(frame)
+
+        else:   # event == 'end'
+            frame = stack.pop()
+            if frame['kind'] == 'property':     # No node; a literal value.
+                datatype = frame['datatype']
+                if datatype is not None:
+                    datatype = resolve(datatype, frame['base'])
+                yield (frame['subject'], frame['predicate'],
+                       literal(elem.text or u'', frame['lang'], datatype))
+            elif frame['kind'] == 'xmlliteral':
+                content = (elem.text or u'') + u''.join(
+                    [cET.tostring(child) for child in elem])
+                yield (frame['subject'], frame['predicate'],
+                       rdflib.Literal(content, datatype=rdflib.RDF.XMLLiteral))
+
+            # Top-level descriptions are complete; discard them.
+            if len(stack) == 1 and stack[0]['kind'] == 'root':
+                root.clear()
+
+
+def _property_attrs(elem, subject, frame_base, lang, uri, literal, resolve):
+    """
+    Yields triples described by the property attributes of ``elem``\.
+    """
+    for key, value in elem.attrib.items():
+        if key in _RDF_SYNTAX_ATTRS or key.startswith('{%s}' % XML_NS):
+            continue
+        if key == '{%s}type' % RDF_NS:
+            yield subject, _RDF_TYPE, resolve(value, frame_base)
+        elif key.startswith('{'):
+            yield subject, uri(key), literal(value, lang)
+
+
+class StreamingRDFParser(RDFParser):
+    """
+    Reads RDF/XML in a single incremental pass, rather than loading the whole
+    document into an :class:`rdflib.Graph`\.
+
+    Only triples whose predicates are in ``meta_elements`` or
+    ``resolve_elements`` (and container memberships, e.g. ``rdf:_1``) are
+    retained. Handlers can look them up in ``self.graph`` as usual, once the
+    pass is complete.
+    """
+
+    resolve_elements = []
+    """
+    Predicates (other than those in ``meta_elements``) that handlers follow
+    to resolve referenced resources, e.g. the members of an author list.
+    """
+
+    predicate_aliases = {}
+    """
+    Maps predicates in the source data onto the predicates that should be
+    recorded, e.g. to work around malformed exports.
+    """
+
+    def open(self):
+        keep = set([ref for name, ref in self.meta_elements])
+        keep |= set(self.resolve_elements)
+        keep.add(_RDF_TYPE)
+
+        self.graph = _TripleIndex()
+        namespaces = {}
+        typed = defaultdict(OrderedDict)    # Type -> subjects, in order.
+        for s, p, o in _iter_rdfxml(self.path, namespaces):
+            p = self.predicate_aliases.get(p, p)
+            if p == _RDF_TYPE:
+                typed[o][s] = None
+            if p in keep or p.startswith(RDF_NS + u'_'):
+                self.graph.add((s, p, o))
+
+        self.entries = deque()
+        for element in self.entry_elements:
+            prefix, name = element.split(':', 1)
+            if prefix not in namespaces:
+                continue
+            element_type = rdflib.URIRef(namespaces[prefix] + name)
+            self.entries.extend(typed.get(element_type, {}).keys())
@@ -0,0 +1,356 @@
+"""
+On-disk cache for parsed bibliographic data.
+
+Parsing large exports can take many minutes. A :class:`.ParseCache` stores the
+results of a parse (e.g. a list of :class:`.Paper`\s, or a
+:class:`.FeatureSet`\) alongside a fingerprint of the source data, so that
+subsequent reads of an unchanged file or directory can skip the parser
+entirely.
+
+The cache is opt-in. Readers that support it accept a ``cache`` argument:
+
+.. code-block:: python
+
+   >>> from tethne.readers import wos
+   >>> corpus = wos.read("/path/to/some/wos/data", cache=True)  # Parses.
+   >>> corpus = wos.read("/path/to/some/wos/data", cache=True)  # Fast.
+
+A cached result is used only if it was produced by the same parser (and parser
+version) with the same options, and the source has the same size and
+modification time, or failing that the same content hash.
+
+A :class:`.Manifest` uses the same fingerprints to keep track of the files that
+have been ingested into a :class:`.Corpus`\.
+"""
+
+import os
+import hashlib
+import tempfile
+import cPickle as pickle
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    unicode = str
+
+
+CACHE_VERSION = 1
+"""
+Version of the on-disk cache format. Entries written with a different version
+are ignored.
+"""
+
+
+def _files(path):
+    """
+    The files that make up the source at ``path``, in a stable order.
+    """
+    if os.path.isdir(path):
+        return [os.path.join(path, fname)
+                for fname in sorted(os.listdir(path))
+                if os.path.isfile(os.path.join(path, fname))]
+    return [path]
+
+
+def _stat(path):
+    """
+    A cheap fingerprint of ``path``: the size and modification time of each
+    file.
+    """
+    stat = []
+    for fpath in _files(path):
+        fstat = os.stat(fpath)
+        stat.append((os.path.basename(fpath), fstat.st_size, fstat.st_mtime))
+    return tuple(stat)
+
+
+def _digest(path):
+    """
+    MD5 digest of the content of ``path``.
+    """
+    md5 = hashlib.md5()
+    for fpath in _files(path):
+        md5.update(os.path.basename(fpath).encode('utf-8'))
+        with open(fpath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _fingerprint(path):
+    """
+    The size and modification time of each file in ``path``\, and the digest
+    of its content.
+    """
+    return {'stat': _stat(path), 'digest': _digest(path)}
+
+
+class ParseCache(object):
+    """
+    Stores parse results on disk, keyed by source path and a parser-specific
+    key.
+
+    Each entry is a single file containing a small header (the fingerprint of
+    the source) followed by the pickled result. Only the header is read to
+    validate an entry.
+
+    Parameters
+    ----------
+    base_path : str
+        (default: ``'.tethne'``) Location of the disk cache. Entries are stored
+        in a ``parse_cache`` subdirectory.
+    """
+
+    def __init__(self, base_path='.tethne'):
+        self.base_path = base_path
+        self.cache_path = os.path.join(base_path, 'parse_cache')
+
+    def _entry_path(self, path, key):
+        ident = repr((os.path.abspath(path), key, CACHE_VERSION))
+        name = hashlib.md5(ident.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_path, name + '.pickle')
+
+    def get(self, path, key):
+        """
+        Retrieve the cached result for ``path`` and ``key``.
+
+        Parameters
+        ----------
+        path : str
+            Path to the source file or directory.
+        key : tuple
+            Identifies the parser, its version, and any options that affect the
+            result.
+
+        Returns
+        -------
+        object
+            The cached result, or None if there is no valid entry.
+        """
+        entry_path = self._entry_path(path, key)
+        if not os.path.exists(entry_path) or not os.path.exists(path):
+            return
+
+        try:
+            with open(entry_path, 'rb') as f:
+                header = pickle.load(f)
+                stat = _stat(path)
+                if header['stat'] == stat:
+                    return pickle.load(f)
+
+                # The source may have been touched (or rewritten) without
+                #  changing its content.
+                if header['digest'] != _digest(path):
+                    return
+                value = pickle.load(f)
+        except (EOFError, KeyError, pickle.UnpicklingError):
+            return    # Incomplete or corrupt entry; parse again.
+
+        # Refresh the header so that the next lookup can skip hashing.
+        self._write(entry_path, {'stat': stat, 'digest': header['digest']},
+                    value)
+        return value
+
+    def fingerprint(self, path):
+        """
+        Fingerprint ``path`` in its current state. This should be done before
+        the file is parsed, so that a result parsed from an older version of
+        the file is not stored as valid for the current version.
+
+        Returns
+        -------
+        dict
+        """
+        return _fingerprint(path)
+
+    def set(self, path, key, value, fingerprint=None):
+        """
+        Store ``value`` as the result for ``path`` and ``key``.
+
+        Parameters
+        ----------
+        path : str
+            Path to the source file or directory.
+        key : tuple
+        value : object
+            Must be picklable.
+        fingerprint : dict
+            From :meth:`.fingerprint`\, taken before ``value`` was parsed. If
+            not provided, ``path`` is fingerprinted now.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(path)
+        self._write(self._entry_path(path, key), dict(fingerprint), value)
+
+    def get_or_parse(self, path, key, parse):
+        """
+        Retrieve the cached result for ``path`` and ``key``; if there is no
+        valid entry, call ``parse`` and cache its return value.
+
+        Parameters
+        ----------
+        path : str
+        key : tuple
+        parse : callable
+            Takes no arguments, and returns the result to be cached.
+
+        Returns
+        -------
+        object
+        """
+        value = self.get(path, key)
+        if value is None:
+            fingerprint = self.fingerprint(path)
+            value = parse()
+            self.set(path, key, value, fingerprint=fingerprint)
+        return value
+
+    def clear(self):
+        """
+        Remove all cache entries.
+        """
+        if not os.path.exists(self.cache_path):
+            return
+        for fname in os.listdir(self.cache_path):
+            os.remove(os.path.join(self.cache_path, fname))
+
+    def _write(self, entry_path, header, value):
+        if not os.path.exists(self.cache_path):
+            try:
+                os.makedirs(self.cache_path)
+            except OSError:     # Created concurrently by another process.
+                if not os.path.isdir(self.cache_path):
+                    raise
+
+        # Write to a temporary file first, so that readers (including other
+        #  processes) never see a partial entry.
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            try:
+                os.rename(temp_path, entry_path)
+            except OSError:     # Windows will not rename over a file.
+                os.remove(entry_path)
+                os.rename(temp_path, entry_path)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+class Manifest(object):
+    """
+    Records the data files that have been ingested into a :class:`.Corpus`\,
+    and the primary index values of the :class:`.Paper`\s that each one
+    yielded, so that only new or changed files need be parsed when the
+    :class:`.Corpus` is updated. See :func:`tethne.readers.update`\.
+
+    As with :class:`.ParseCache`\, a file is considered unchanged if it has
+    the same size and modification time, or failing that the same content
+    hash, as when it was ingested.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self.entries
+
+    def fingerprint(self, path):
+        """
+        Fingerprint ``path`` in its current state. This should be done before
+        the file is parsed, so that changes made during parsing are detected
+        on the next update.
+
+        Returns
+        -------
+        dict
+        """
+        return _fingerprint(path)
+
+    def is_current(self, path):
+        """
+        Determine whether ``path`` has been ingested, and has not changed
+        since.
+
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        -------
+        bool
+        """
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is None or not os.path.exists(path):
+            return False
+
+        stat = _stat(path)
+        if entry['stat'] == stat:
+            return True
+        if entry['digest'] != _digest(path):
+            return False
+        entry['stat'] = stat    # Touched, but not changed.
+        return True
+
+    def add(self, path, keys, fingerprint=None):
+        """
+        Record that ``path`` has been ingested.
+
+        Parameters
+        ----------
+        path : str
+        keys : list
+            Primary index values of the :class:`.Paper`\s parsed from
+            ``path``\.
+        fingerprint : dict
+            From :meth:`.fingerprint`\. If not provided, ``path`` is
+            fingerprinted now.
+        """
+        if fingerprint is None:
+            fingerprint = self.fingerprint(path)
+        entry = dict(fingerprint)
+        entry['keys'] = list(keys)
+        self.entries[os.path.abspath(path)] = entry
+
+    def keys(self, path):
+        """
+        Primary index values of the :class:`.Paper`\s that were parsed from
+        ``path`` when it was last ingested.
+
+        Returns
+        -------
+        list
+        """
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is None:
+            return []
+        return entry['keys']
+
+
+def get_cache(cache):
+    """
+    Interpret the ``cache`` argument accepted by readers.
+
+    Parameters
+    ----------
+    cache : bool, str, or :class:`.ParseCache`
+        If True, uses a :class:`.ParseCache` in the default location. If a
+        string, uses a :class:`.ParseCache` at that location.
+
+    Returns
+    -------
+    :class:`.ParseCache` or None
+    """
+    if isinstance(cache, ParseCache):
+        return cache
+    if isinstance(cache, (str, unicode)):
+        return ParseCache(cache)
+    if cache:
+        return ParseCache()
+    return None
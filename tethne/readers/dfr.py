@@ -9,15 +9,21 @@ Methods for parsing JSTOR Data-for-Research datasets.
 import os
 import xml.etree.ElementTree as ET
 import re
-from collections import Counter
+from collections import Counter, defaultdict
 from tethne import Paper, Corpus, Feature, FeatureSet, StreamingCorpus
+from tethne.classes.symbols import SymbolTable
 from tethne.utilities import dict_from_node, strip_non_ascii, number
-from tethne.readers.base import XMLParser
+from tethne.readers.base import XMLParser, _parallel_imap, _iterparse
+from tethne.readers.cache import get_cache
 import iso8601
 from io import BytesIO
 
 from unidecode import unidecode
-import codecs
+
+try:    # Much faster, where it is available (Python 2.x).
+    import xml.etree.cElementTree as cET
+except ImportError:
+    cET = ET
 
 import sys
 PYTHON_3 = sys.version_info[0] == 3
@@ -25,6 +31,43 @@ if PYTHON_3:
     unicode = str
 
 
+NGRAMS_CACHE_VERSION = 2
+"""
+Should be incremented whenever a change to :func:`.ngrams` alters its output.
+"""
+
+
+# JSTOR hasn't always represented ampersands correctly.
+_AMPERSAND = re.compile(b'&(?!amp;)')
+
+
+class _AmpersandEscaper(object):
+    """
+    Wraps a binary file, escaping ampersands as they are read so that the
+    whole file need not be loaded in order to fix it.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.pending = b''  # May hold the start of an ``&amp;``.
+
+    def read(self, size=-1):
+        data = self.pending + self.f.read(size)
+        if size is None or size < 0 or len(data) <= len(self.pending):
+            self.pending = b''      # End of file.
+        else:
+            # Hold back a trailing ampersand until we know what follows it.
+            split = data.rfind(b'&', max(len(data) - 4, 0))
+            split = len(data) if split < 0 else split
+            data, self.pending = data[:split], data[split:]
+            if not data:    # Read more, rather than signal end of file.
+                return self.read(size)
+        return _AMPERSAND.sub(b'&amp;', data)
+
+    def close(self):
+        self.f.close()
+
+
 class DfRParser(XMLParser):
     entry_class = Paper
 
@@ -35,14 +78,11 @@ class DfRParser(XMLParser):
         'author': 'authors_full',
     }
 
+    intern_fields = ['journal', 'documentType', 'authors_full']
+
     def open(self):
-        with codecs.open(self.path, 'r', encoding="utf-8") as f:
-            # JSTOR hasn't always represented ampersands correctly.
-            contents = re.sub('(&)(?!amp;)', lambda match: '&amp;', f.read())
-            # self.root = ET.fromstring(contents)
-        # pattern = './/{elem}'.format(elem=self.entry_element)
-        # self.elements = self.root.findall(pattern)
-        self.iterator = ET.iterparse(BytesIO(contents.encode('utf-8')))
+        self.f = _AmpersandEscaper(open(self.path, 'rb'))
+        self.iterator = _iterparse(self.f, self.use_lxml)
 
         self.at_start = False
         self.at_end = False
@@ -176,27 +216,82 @@ class GramGenerator(object):
         """
         Retrieve data for the ith file in the dataset.
         """
-        with open(os.path.join(self.path, self.elem, self.files[i]), 'r') as f:
-            # JSTOR hasn't always produced valid XML.
-            contents = re.sub('(&)(?!amp;)', lambda match: '&amp;', f.read())
-            root = ET.fromstring(contents)
-        doi = root.attrib['id']
+        fpath = os.path.join(self.path, self.elem, self.files[i])
+        doi, grams = _parse_grams(fpath, self.elem_xml, self.ignore_hash,
+                                  doi_only=self.K)
 
         if self.K:  # Keys only.
             return doi
 
-        grams = []
-        for gram in root.findall(self.elem_xml):
-            text = unidecode(unicode(gram.text.strip()))
-            if ( not self.ignore_hash or '#' not in list(text) ):
-                c = ( text, number(gram.attrib['weight']) )
-                grams.append(c)
-
         if self.V:  # Values only.
             return grams
 
         return doi, grams   # Default behavior.
 
+
+def _iterparse_grams(f, elem_xml, ignore_hash=True, doi_only=False):
+    doi = None
+    grams = []
+    for event, elem in cET.iterparse(f, events=('start', 'end')):
+        if doi is None:     # The first event is the start of the root element.
+            doi = elem.attrib['id']
+            if doi_only:
+                break
+        if event != 'end' or elem.tag != elem_xml:
+            continue
+
+        text = elem.text.strip()
+        try:    # unidecode is slow, and most grams are plain ASCII.
+            text.encode('ascii')
+        except UnicodeError:
+            text = unidecode(unicode(text))
+        if not ignore_hash or '#' not in text:
+            grams.append((text, number(elem.attrib['weight'])))
+        elem.clear()
+    return doi, grams
+
+
+def _parse_grams(fpath, elem_xml, ignore_hash=True, doi_only=False):
+    """
+    Read the DOI and N-gram data from a single DfR N-gram file. The file is
+    parsed incrementally, one element at a time.
+
+    Parameters
+    ----------
+    fpath : str
+        Path to the N-gram XML file.
+    elem_xml : str
+        Name of the elements containing N-grams (e.g. 'wordcount').
+    ignore_hash : bool
+        If True, will exclude all N-grams that contain the hash '#' character.
+    doi_only : bool
+        If True, stop as soon as the DOI has been found.
+
+    Returns
+    -------
+    doi : str
+    grams : list
+        ``(gram, weight)`` tuples.
+    """
+    try:
+        with open(fpath, 'rb') as f:
+            return _iterparse_grams(f, elem_xml, ignore_hash, doi_only)
+    except cET.ParseError:
+        # JSTOR hasn't always produced valid XML.
+        with open(fpath, 'r') as f:
+            contents = re.sub('(&)(?!amp;)', lambda match: '&amp;', f.read())
+        return _iterparse_grams(BytesIO(contents), elem_xml, ignore_hash,
+                                doi_only)
+
+
+def _read_grams(args):
+    """
+    Module-level wrapper for :func:`._parse_grams`\, so that it can be
+    dispatched to worker processes.
+    """
+    return _parse_grams(*args)
+
+
 def _get_citation_filename(basepath):
     for fname in ["citations.xml", "citations.XML"]:
         if os.path.exists(os.path.join(basepath, fname)):
@@ -211,7 +306,7 @@ def streaming_read(path, corpus=True, index_by='doi', parse_only=None,
 
 
 def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
-         corpus_class=Corpus, **kwargs):
+         corpus_class=Corpus, processes=1, cache=False, **kwargs):
     """
     Yields :class:`.Paper` s from JSTOR DfR package.
 
@@ -222,6 +317,13 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
     ----------
     filepath : string
         Filepath to unzipped JSTOR DfR folder containing a citations.xml file.
+    processes : int
+        (default: 1) Number of worker processes used to parse N-gram files.
+        See :func:`.ngrams`\.
+    cache : bool, str, or :class:`.ParseCache`
+        (default: False) If set, parsed citation data and N-grams are stored on
+        disk, and re-used on subsequent reads of the same (unchanged) dataset.
+        See :func:`tethne.readers.cache.get_cache`\.
 
     Returns
     -------
@@ -245,10 +347,19 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
     if parse_only:
         parse_only.append(index_by)
 
-    papers = []
+    cache = get_cache(cache)
+    symbols = SymbolTable()
     if citationfname:   # Valid DfR dataset.
-        parser = DfRParser(os.path.join(path, citationfname))
-        papers += parser.parse(parse_only=parse_only)
+        citationpath = os.path.join(path, citationfname)
+        if cache is None:
+            parser = DfRParser(citationpath, symbols=symbols)
+            papers = parser.iter_entries(parse_only=parse_only)
+        else:
+            parse = lambda: DfRParser(citationpath, symbols=symbols).parse(
+                                                        parse_only=parse_only)
+            papers = cache.get_or_parse(citationpath,
+                                        DfRParser.cache_key(parse_only=parse_only),
+                                        parse)
 
     else:   # Possibly a directory containing several DfR datasets?
         papers = []
@@ -258,7 +369,8 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
             citationfname = _get_citation_filename(dirpath)
             if citationfname:
                 subcorpus = read(dirpath, index_by=index_by,
-                                 parse_only=parse_only)
+                                 parse_only=parse_only, processes=processes,
+                                 cache=cache)
                 papers += subcorpus.papers
                 for featureset_name, featureset in subcorpus.features.iteritems():
                     if featureset_name not in features:
@@ -267,11 +379,12 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
                     featureset_types[featureset_name] = type(featureset)
         load_ngrams = False
 
-    if len(papers) == 0:
-        raise ValueError('No DfR datasets found at %s' % path)
-
     if corpus:
+        # Papers are indexed as they are parsed.
         corpus = corpus_class(papers, index_by=index_by, **kwargs)
+        corpus.symbols = symbols
+        if len(corpus) == 0:
+            raise ValueError('No DfR datasets found at %s' % path)
 
         if load_ngrams:     # Find and read N-gram data.
             for sname in os.listdir(path):
@@ -280,7 +393,9 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
                     datafiles = [f for f in os.listdir(fpath)
                                  if f.lower().endswith('xml')]
                     if len(datafiles) > 0:
-                        features[sname] = ngrams(path, sname)
+                        features[sname] = ngrams(path, sname,
+                                                 processes=processes,
+                                                 cache=cache)
 
         for featureset_name, featureset_values in features.iteritems():
             if type(featureset_values) is dict:
@@ -289,12 +404,21 @@ def read(path, corpus=True, index_by='doi', load_ngrams=True, parse_only=None,
             corpus.features[featureset_name] = featureset_values
 
         return corpus
+
+    papers = list(papers)
+    if len(papers) == 0:
+        raise ValueError('No DfR datasets found at %s' % path)
     return papers
 
-def ngrams(path, elem, ignore_hash=True):
+def ngrams(path, elem, ignore_hash=True, processes=1, cache=False):
     """
     Yields N-grams from a JSTOR DfR dataset.
 
+    N-gram files are parsed incrementally and, if ``processes`` is greater
+    than 1, in a pool of worker processes. Each distinct N-gram is stored once,
+    and is assigned an integer id in the :class:`.FeatureSet`\'s ``lookup``
+    as it is first seen.
+
     Parameters
     ----------
     path : string
@@ -303,6 +427,11 @@ def ngrams(path, elem, ignore_hash=True):
         Name of subdirectory containing N-grams. (e.g. 'bigrams').
     ignore_hash : bool
         If True, will exclude all N-grams that contain the hash '#' character.
+    processes : int
+        (default: 1) Number of worker processes used to parse N-gram files.
+    cache : bool, str, or :class:`.ParseCache`
+        (default: False) If set, the resulting :class:`.FeatureSet` is stored
+        on disk, and re-used while the N-gram files are unchanged.
 
     Returns
     -------
@@ -310,8 +439,39 @@ def ngrams(path, elem, ignore_hash=True):
 
     """
 
-    grams = GramGenerator(path, elem, ignore_hash=ignore_hash)
-    return FeatureSet({k: Feature(f) for k, f in grams})
+    cache = get_cache(cache)
+    if cache is not None:
+        key = ('tethne.readers.dfr', 'ngrams', NGRAMS_CACHE_VERSION,
+               (('ignore_hash', ignore_hash),))
+        parse = lambda: ngrams(path, elem, ignore_hash=ignore_hash,
+                               processes=processes)
+        return cache.get_or_parse(os.path.join(path, elem), key, parse)
+
+    if elem.endswith('s'):
+        elem_xml = elem[:-1]
+    else:
+        elem_xml = elem
+
+    jobs = [(os.path.join(path, elem, fname), elem_xml, ignore_hash)
+            for fname in sorted(os.listdir(os.path.join(path, elem)))
+            if fname.split('.')[-1] == 'XML']
+
+    featureset = FeatureSet()
+    vocab = {}
+    for doi, grams in _parallel_imap(_read_grams, jobs, processes=processes,
+                                     chunksize=32):
+        # Grams from different files (and worker processes) are separate
+        #  string objects; keep only one copy of each.
+        grams = [(vocab.setdefault(g, g), c) for g, c in grams]
+        featureset.add(doi, Feature(grams))
+
+    # Same types as FeatureSet(features): float counts, int document counts.
+    featureset.counts = defaultdict(float, [(i, float(count)) for i, count
+                                            in featureset.counts.iteritems()])
+    featureset.documentCounts = Counter(dict([
+        (i, int(count)) for i, count
+        in featureset.documentCounts.iteritems()]))
+    return featureset
 
 
 def tokenize(ngrams, min_tf=2, min_df=2, min_len=3, apply_stoplist=False):
@@ -1,8 +1,442 @@
 """
 Reader for Scopus bibliographic database.
 
-Earlier versions of Tethne had limited support for Scopus. As of 0.8, we've
-moved away from Scopus due to (a) lack of access, and (b) lack of time. If
-you're interested in using Scopus data in Tethne, please consider contributing
-to the project.
+Scopus exports records as a comma-separated values file, with one row per
+record. :func:`.read` parses such an export into a set of :class:`.Paper`\s,
+which are then encapsulated in a :class:`.Corpus`\.
+
+.. code-block:: python
+
+   >>> from tethne.readers import scopus
+   >>> corpus = scopus.read("/path/to/some/scopus.csv")
+   >>> corpus
+   <tethne.classes.corpus.Corpus object at 0x10057c2d0>
+
+Rows are read one at a time, and :class:`.Paper`\s are added to the
+:class:`.Corpus` in chunks, so the raw export is never held in memory. Columns
+that are not needed (see ``parse_only``) are never decoded.
 """
+
+import re
+import os
+import csv
+from itertools import islice
+
+from tethne.readers.base import BaseParser
+from tethne.readers.cache import get_cache
+from tethne import Corpus, Paper, StreamingCorpus
+from tethne.classes.symbols import SymbolTable
+from tethne.utilities import _strip_punctuation, _space_sep
+
+import sys
+PYTHON_3 = sys.version_info[0] == 3
+if PYTHON_3:
+    unicode = str
+
+
+# The References column of a heavily-cited paper can be very large.
+csv.field_size_limit(max(csv.field_size_limit(), 1 << 28))
+
+# An author in a cited reference, e.g. ``Lenton, T.M., ``.
+_REF_AUTHOR = re.compile(u"([^,()]+), ((?:-?[^\W\d_][\w'-]*\.\s?)+),\s*",
+                         flags=re.U)
+_REF_DATE = re.compile(u'\s*\(([0-9]{4})\)\s*')
+_REF_VOLUME = re.compile(u'([\w.]+)\s*\(([^)]+)\)$', flags=re.U)
+_REF_PAGES = re.compile(u'pp?\. (\w+)(?:-(\w+))?', flags=re.U)
+
+
+def _parse_author(last, init):
+    """
+    Normalizes an author name to the (``LAST``, ``I I``) form used by the
+    other readers.
+    """
+    aulast = _strip_punctuation(last.strip()).upper()
+    auinit = _space_sep(_strip_punctuation(init.strip()).upper())
+    return aulast, auinit
+
+
+def _handle_authors(value):
+    """
+    Splits the Authors column (e.g. ``Pan, Y., Yu, C.``) into last names and
+    initials.
+
+    Parameters
+    ----------
+    value : str
+
+    Returns
+    -------
+    aulast : list
+    auinit : list
+    """
+    if not value or value.startswith('['):  # [No author name available]
+        return [], []
+    tokens = value.split(', ')
+    if len(tokens) % 2:     # No initials for the last author.
+        tokens.append(u'')
+
+    aulast, auinit = [], []
+    for last, init in zip(tokens[::2], tokens[1::2]):
+        last, init = _parse_author(last, init)
+        aulast.append(last)
+        auinit.append(init)
+    return aulast, auinit
+
+
+def _handle_affiliations(value, aulast, auinit):
+    """
+    Extracts the affiliation of each author from the Authors with
+    affiliations column, e.g. ``Pan, Y., Some Institute, Beijing, China; Yu,
+    C., Another Institute``.
+
+    Parameters
+    ----------
+    value : str
+    aulast : list
+        Author last names, from :func:`._handle_authors`\.
+    auinit : list
+        Author initials, from :func:`._handle_authors`\.
+
+    Returns
+    -------
+    list
+        Affiliations, in the same order as ``aulast``. An author without an
+        affiliation gets an empty string.
+    """
+    affiliations = {}
+    for segment in value.split('; '):
+        tokens = segment.split(', ', 2)
+        if len(tokens) < 2:
+            continue
+        name = _parse_author(tokens[0], tokens[1])
+        # Only the first affiliation listed for an author is kept.
+        if name not in affiliations:
+            affiliations[name] = tokens[2].strip() if len(tokens) > 2 else u''
+    return [affiliations.get(name, u'') for name in zip(aulast, auinit)]
+
+
+def _split(value):
+    return [v.strip() for v in value.split(';') if v.strip()]
+
+
+class ScopusParser(BaseParser):
+    """
+    Parser for Scopus CSV exports.
+
+    .. code-block:: python
+
+       >>> from tethne.readers.scopus import ScopusParser
+       >>> parser = ScopusParser("/path/to/scopus.csv")
+       >>> for paper in parser.iter_entries(parse_only=['title', 'date']):
+       ...     print paper.title
+
+    """
+
+    cache_version = 2   # Unidentifiable cited references are dropped.
+
+    entry_class = Paper
+    """
+    The class that should be used to represent a single bibliographic record.
+    """
+
+    intern_fields = ['journal', 'isoSource', 'authors_init', 'documentType',
+                     'language', 'publisher', 'authorKeywords', 'indexKeywords']
+    """
+    Fields whose values are usually shared by many records.
+    """
+
+    tags = {
+        'Authors': 'authors_init',
+        'Title': 'title',
+        'Year': 'date',
+        'Source title': 'journal',
+        'Volume': 'volume',
+        'Issue': 'issue',
+        'Page start': 'pageStart',
+        'Page end': 'pageEnd',
+        'Cited by': 'timesCited',
+        'DOI': 'doi',
+        'Link': 'uri',
+        'Authors with affiliations': 'institutions',
+        'Abstract': 'abstract',
+        'Author Keywords': 'authorKeywords',
+        'Index Keywords': 'indexKeywords',
+        'Funding Details': 'funding',
+        'References': 'citedReferences',
+        'Correspondence Address': 'reprintAddress',
+        'Publisher': 'publisher',
+        'ISSN': 'ISSN',
+        'Language of Original Document': 'language',
+        'Abbreviated Source Title': 'isoSource',
+        'Document Type': 'documentType',
+        'EID': 'eid',
+    }
+    """
+    Maps column names onto field names.
+    """
+
+    def open(self):
+        if not os.path.exists(self.path):
+            raise IOError("No such path: {0}".format(self.path))
+
+        if PYTHON_3:
+            self.f = open(self.path, 'r', encoding='utf-8-sig', newline='')
+            self.reader = csv.reader(self.f)
+            self.columns = next(self.reader, [])
+        else:
+            self.f = open(self.path, 'rb')
+            self.reader = csv.reader(self.f)
+            self.columns = [self._decode(c) for c in next(self.reader, [])]
+            if self.columns and self.columns[0].startswith(u'\ufeff'):
+                self.columns[0] = self.columns[0][1:]
+
+    def _decode(self, value):
+        if isinstance(value, unicode):
+            return value
+        return value.decode('utf-8', 'replace')
+
+    def iter_entries(self, parse_only=None):
+        """
+        Yields each record as an :attr:`.entry_class` instance, one row at a
+        time.
+
+        Parameters
+        ----------
+        parse_only : list
+            If provided, only these fields will be parsed. Other columns are
+            not decoded at all.
+
+        Returns
+        -------
+        generator
+        """
+        # Positions of the columns that we need, and their field names.
+        columns = [(i, self.tags[column]) for i, column
+                   in enumerate(self.columns) if column in self.tags
+                   and (not parse_only or self.tags[column] in parse_only)]
+        # Affiliations are aligned with authors.
+        if 'institutions' in [field for i, field in columns]:
+            columns.sort(key=lambda c: c[1] == 'institutions')
+
+        for row in self.reader:
+            entry = self.entry_class()
+            for i, field in columns:
+                if i >= len(row) or not row[i]:
+                    continue
+                value = self._decode(row[i]).strip()
+                handler = self._get_handler(field)
+                if handler is not None:
+                    value = handler(value, entry)
+                if value not in [None, u'', []]:
+                    setattr(entry, field, value)
+            self.symbols.intern_entry(entry, self.intern_fields)
+            yield entry
+
+    def iter_chunks(self, chunksize=1000, parse_only=None):
+        """
+        Yields lists of up to ``chunksize`` records.
+
+        Parameters
+        ----------
+        chunksize : int
+        parse_only : list
+
+        Returns
+        -------
+        generator
+        """
+        entries = self.iter_entries(parse_only=parse_only)
+        while True:
+            chunk = list(islice(entries, chunksize))
+            if not chunk:
+                break
+            yield chunk
+
+    def parse(self, parse_only=None):
+        """
+        Parse all of the records in the data file.
+
+        Parameters
+        ----------
+        parse_only : list
+            If provided, only these fields will be parsed.
+
+        Returns
+        -------
+        list
+        """
+        self.data = list(self.iter_entries(parse_only=parse_only))
+        return self.data
+
+    def handle_date(self, value, entry):
+        try:
+            return int(value)
+        except ValueError:
+            return
+
+    def handle_timesCited(self, value, entry):
+        return self.handle_date(value, entry)
+
+    def handle_authors_init(self, value, entry):
+        return list(zip(*_handle_authors(value)))
+
+    def handle_institutions(self, value, entry):
+        authors = getattr(entry, 'authors_init', None)
+        if authors is None:     # Use the author names in this column instead.
+            authors = [_parse_author(*segment.split(', ', 2)[:2])
+                       for segment in value.split('; ')
+                       if ', ' in segment]
+        if not authors:
+            return
+        return _handle_affiliations(value, *zip(*authors))
+
+    def handle_authorKeywords(self, value, entry):
+        return _split(value)
+
+    def handle_indexKeywords(self, value, entry):
+        return _split(value)
+
+    def handle_citedReferences(self, value, entry):
+        """
+        Parses cited references; those that cannot be identified (see
+        :meth:`.parse_citation`\) are dropped.
+        """
+        citations = [self.parse_citation(reference)
+                     for reference in value.split('; ') if reference.strip()]
+        return [citation for citation in citations if citation is not None]
+
+    def parse_citation(self, value):
+        """
+        Parses a single cited reference, e.g. ``Adams, B., Lenton, T.M., Some
+        title (2004) Ecol. Modell., 177, pp. 353-391``, into an instance of
+        :attr:`.entry_class`\.
+
+        Returns None if the reference has no author, publication date, or
+        source, since it could not be identified (its ``ayjid`` would be
+        empty).
+        """
+        citation = self.entry_class()
+
+        # Everything before the publication date is authors and title; the
+        #  source follows it.
+        date = _REF_DATE.search(value)
+        if date is not None:
+            head, tail = value[:date.start()], value[date.end():]
+            citation.date = int(date.group(1))
+        else:
+            head, tail = value, u''
+
+        authors, position = [], 0
+        match = _REF_AUTHOR.match(head)
+        while match is not None:
+            authors.append(_parse_author(*match.groups()))
+            position = match.end()
+            match = _REF_AUTHOR.match(head, position)
+        if authors:
+            citation.authors_init = authors
+        title = head[position:].strip()
+        if title:
+            citation.title = title
+
+        tokens = [t.strip() for t in tail.split(',')]
+        if not authors and date is None and not tokens[0]:
+            return
+        if tokens[0]:
+            citation.journal = tokens[0]
+        for token in tokens[1:]:
+            pages = _REF_PAGES.match(token)
+            if pages is not None:
+                citation.pageStart, citation.pageEnd = pages.groups()
+            elif not hasattr(citation, 'volume') and token:
+                volume = _REF_VOLUME.match(token)     # e.g. ``22 (4)``.
+                if volume is not None:
+                    citation.volume, citation.issue = volume.groups()
+                else:
+                    citation.volume = token
+        self.intern_citation(citation)
+        return citation
+
+    def __del__(self):
+        if hasattr(self, 'f'):
+            self.f.close()
+
+
+def _parse_file(path, parse_only=None, cache=None, symbols=None):
+    parse = lambda: ScopusParser(path, symbols=symbols).parse(
+                                                        parse_only=parse_only)
+    if cache is None:
+        return parse()
+    key = ScopusParser.cache_key(parse_only=parse_only)
+    return cache.get_or_parse(path, key, parse)
+
+
+def read(path, corpus=True, index_by='eid', streaming=False, parse_only=None,
+         corpus_class=Corpus, chunksize=1000, cache=False, **kwargs):
+    """
+    Parse one or more Scopus CSV exports.
+
+    Examples
+    --------
+    .. code-block:: python
+
+       >>> from tethne.readers import scopus
+       >>> corpus = scopus.read("/path/to/some/scopus.csv")
+
+    Parameters
+    ----------
+    path : str
+        Path to a Scopus CSV file, or to a directory containing several.
+    corpus : bool
+        If True (default), returns a :class:`.Corpus`\. If False, will return
+        only a list of :class:`.Paper`\s.
+    index_by : str
+        (default: ``'eid'``) Field used as the primary index.
+    streaming : bool
+        (default: False) If True, returns a :class:`.StreamingCorpus`\.
+    parse_only : list
+        If provided, only these fields will be parsed.
+    chunksize : int
+        (default: 1000) Number of :class:`.Paper`\s parsed before they are
+        added to the :class:`.Corpus`\.
+    cache : bool, str, or :class:`.ParseCache`
+        (default: False) If set, parse results for each file are stored on
+        disk, and re-used on subsequent reads of the same (unchanged) file.
+        See :func:`tethne.readers.cache.get_cache`\.
+
+    Returns
+    -------
+    :class:`.Corpus` or list
+    """
+    if not os.path.exists(path):
+        raise ValueError('No such file or directory')
+
+    # We need the primary index field in the parse results.
+    if parse_only:
+        parse_only = list(parse_only) + [index_by]
+
+    if streaming:
+        corpus_class = StreamingCorpus
+
+    if os.path.isdir(path):
+        paths = [os.path.join(path, fname) for fname in sorted(os.listdir(path))
+                 if fname.endswith('csv') and not fname.startswith('.')]
+    else:
+        paths = [path]
+
+    cache = get_cache(cache)
+    symbols = SymbolTable()     # Shared by all of the files.
+    if cache is None:
+        chunks = (chunk for fpath in paths for chunk
+                  in ScopusParser(fpath, symbols=symbols).iter_chunks(
+                                                        chunksize, parse_only))
+    else:
+        chunks = (_parse_file(fpath, parse_only, cache, symbols)
+                  for fpath in paths)
+
+    if corpus:
+        corpus = corpus_class(index_by=index_by, **kwargs)
+        corpus.symbols = symbols
+        for chunk in chunks:
+            corpus.add_papers(chunk)
+        return corpus
+    return [paper for chunk in chunks for paper in chunk]
@@ -18,9 +18,12 @@ files.
 
 import re
 import os
+from collections import OrderedDict
 
-from tethne.readers.base import FTParser
+from tethne.readers.base import FTParser, _parallel_imap
+from tethne.readers.cache import get_cache
 from tethne import Corpus, Paper, StreamingCorpus
+from tethne.classes.symbols import SymbolTable
 from tethne.utilities import _strip_punctuation, _space_sep, strip_tags, is_number
 
 import sys
@@ -29,6 +32,20 @@ if PYTHON_3:
     unicode = str
 
 
+CR_CACHE_SIZE = 100000
+"""
+Maximum number of parsed cited references kept by each :class:`.WoSParser`
+for reuse (see :meth:`.WoSParser.handle_CR`\).
+"""
+
+# Patterns for cited references, compiled once.
+_CR_NAME_DATE_JOURNAL = re.compile('([\w\s\W]+),\s([0-9]{4}),\s([\w\s]+)', flags=re.U)
+_CR_NAME_JOURNAL = re.compile('([\w\s\W]+),\s([\w\s]+)', flags=re.U)
+_CR_DATE = re.compile('([0-9]{4})')
+# The DOI is captured by lookahead so that scanning continues past it.
+_CR_FIELDS = re.compile('\,\s+V([0-9A-Za-z]+)|\,\s+[Pp]([0-9A-Za-z]+)|DOI\s(?=(.*))')
+
+
 class WoSParser(FTParser):
     """
     Parser for Web of Science field-tagged data.
@@ -64,6 +81,13 @@ class WoSParser(FTParser):
     This can be changed to support more sophisticated data models.
     """
 
+    intern_fields = ['journal', 'isoSource', 'authors_full', 'authors_init',
+                     'documentType', 'language', 'publisher', 'publisherCity',
+                     'subject', 'WC', 'authorKeywords', 'keywordsPlus']
+    """
+    Fields whose values are usually shared by many records.
+    """
+
     tags = {
         'PY': 'date',
         'SO': 'journal',
@@ -154,28 +178,57 @@ class WoSParser(FTParser):
         """
         return unicode(value)
 
+    def __init__(self, *args, **kwargs):
+        # Parsed cited references, by raw reference string. Each parser has
+        #  its own, so that separate reads never share citation instances.
+        self.citation_cache = OrderedDict()
+        super(WoSParser, self).__init__(*args, **kwargs)
+
     def handle_CR(self, value):
         """
         Parses cited references.
+
+        The same reference is usually cited by many papers, so this parser
+        caches parsed references on the raw reference string (up to
+        :data:`.CR_CACHE_SIZE` of them): each distinct reference is parsed
+        once, and papers in the same file that cite it share a single citation
+        instance.
+        """
+        try:
+            citation = self.citation_cache.pop(value)
+        except KeyError:
+            citation = self.parse_citation(value)
+        self.citation_cache[value] = citation     # Most recently used last.
+        if len(self.citation_cache) > CR_CACHE_SIZE:
+            self.citation_cache.popitem(last=False)
+        return citation
+
+    def parse_citation(self, value):
+        """
+        Parses a single cited reference into an instance of
+        :attr:`.entry_class`\.
         """
         citation = self.entry_class()
 
-        value = strip_tags(value)
+        # Most references contain no markup; HTMLParser is expensive.
+        if isinstance(value, (str, unicode)) and '<' not in value \
+                and '&' not in value:
+            value = unicode(value)
+        else:
+            value = strip_tags(value)
 
         # First-author name and publication date.
-        ptn = '([\w\s\W]+),\s([0-9]{4}),\s([\w\s]+)'
-        ny_match = re.match(ptn, value, flags=re.U)
-        nj_match = re.match('([\w\s\W]+),\s([\w\s]+)',
-                            value, flags=re.U)
+        ny_match = _CR_NAME_DATE_JOURNAL.match(value)
         if ny_match is not None:
             name_raw, date, journal = ny_match.groups()
-        elif nj_match is not None:
+        else:
+            nj_match = _CR_NAME_JOURNAL.match(value)
+            if nj_match is None:
+                return
             name_raw, journal = nj_match.groups()
             date = None
-        else:
-            return
 
-        datematch = re.match('([0-9]{4})', value)
+        datematch = _CR_DATE.match(value)
         if datematch:
             date = datematch.group(1)
             name_raw = None
@@ -201,29 +254,21 @@ class WoSParser(FTParser):
         setattr(citation, 'date', date)
         setattr(citation, 'journal', journal)
 
-        # Volume.
-        v_match = re.search('\,\s+V([0-9A-Za-z]+)', value)
-        if v_match is not None:
-            volume = v_match.group(1)
-        else:
-            volume = None
+        # Volume, start page, and DOI, in a single scan. Only the first
+        #  occurrence of each is used.
+        volume, page, doi = None, None, None
+        for match in _CR_FIELDS.finditer(value):
+            v, p, d = match.groups()
+            if v is not None and volume is None:
+                volume = v
+            elif p is not None and page is None:
+                page = p
+            elif d is not None and doi is None:
+                doi = d
         setattr(citation, 'volume', volume)
-
-        # Start page.
-        p_match = re.search('\,\s+[Pp]([0-9A-Za-z]+)', value)
-        if p_match is not None:
-            page = p_match.group(1)
-        else:
-            page = None
         setattr(citation, 'pageStart', page)
-
-        # DOI.
-        doi_match = re.search('DOI\s(.*)', value)
-        if doi_match is not None:
-            doi = doi_match.group(1)
-        else:
-            doi = None
         setattr(citation, 'doi', doi)
+        self.intern_citation(citation)
         return citation
 
     def postprocess_WC(self, entry):
@@ -347,8 +392,47 @@ def read_corpus(path, **kwargs):
     return read(path, corpus=True, **kwargs)
 
 
+def _parse_file(args):
+    """
+    Parse a single WoS data file. Module-level so that it can be dispatched to
+    worker processes.
+    """
+    path, parse_only, cache, symbols = args
+    parse = lambda: WoSParser(path, symbols=symbols).parse(parse_only=parse_only)
+    if cache is None:
+        return parse()
+    key = WoSParser.cache_key(parse_only=parse_only)
+    return cache.get_or_parse(path, key, parse)
+
+
+def _parse_files(paths, parse_only=None, processes=1, cache=None,
+                 symbols=None):
+    """
+    Yields an iterable of :class:`.Paper`\s for each file in ``paths``, in the
+    same order as ``paths``.
+
+    If ``processes`` is greater than 1, files are parsed in a pool of worker
+    processes. If a :class:`.ParseCache` is provided, cached results are used
+    where available. Values are interned in ``symbols`` (a
+    :class:`.SymbolTable`\) when files are parsed in this process.
+    """
+    if processes > 1 and len(paths) > 1:
+        jobs = [(path, parse_only, cache, None) for path in paths]
+        for papers in _parallel_imap(_parse_file, jobs, processes=processes):
+            yield papers
+        return
+
+    for path in paths:
+        if cache is None:
+            # In a single process, Papers are streamed straight from the parser.
+            parser = WoSParser(path, symbols=symbols)
+            yield parser.iter_entries(parse_only=parse_only)
+        else:
+            yield _parse_file((path, parse_only, cache, symbols))
+
+
 def read(path, corpus=True, index_by='wosid', streaming=False, parse_only=None,
-         corpus_class=Corpus, **kwargs):
+         corpus_class=Corpus, processes=1, cache=False, **kwargs):
     """
     Parse one or more WoS field-tagged data files.
 
@@ -369,6 +453,15 @@ def read(path, corpus=True, index_by='wosid', streaming=False, parse_only=None,
     corpus : bool
         If True (default), returns a :class:`.Corpus`\. If False, will return
         only a list of :class:`.Paper`\s.
+    processes : int
+        (default: 1) If ``path`` is a directory, the number of worker processes
+        used to parse its data files. Files are always added to the
+        :class:`.Corpus` in sorted filename order, regardless of the number of
+        workers.
+    cache : bool, str, or :class:`.ParseCache`
+        (default: False) If set, parse results for each data file are stored
+        on disk, and re-used on subsequent reads of the same (unchanged) file.
+        See :func:`tethne.readers.cache.get_cache`\.
 
     Returns
     -------
@@ -384,28 +477,35 @@ def read(path, corpus=True, index_by='wosid', streaming=False, parse_only=None,
 
     if streaming:
         return streaming_read(path, corpus=corpus, index_by=index_by,
-                              parse_only=parse_only, **kwargs)
+                              parse_only=parse_only, processes=processes,
+                              cache=cache, **kwargs)
 
     if os.path.isdir(path):    # Directory containing 1+ WoS data files.
-        papers = []
-        for sname in os.listdir(path):
-            if sname.endswith('txt') and not sname.startswith('.'):
-                papers += read(os.path.join(path, sname),
-                               corpus=False,
-                               parse_only=parse_only)
+        paths = [os.path.join(path, sname) for sname in sorted(os.listdir(path))
+                 if sname.endswith('txt') and not sname.startswith('.')]
     else:   # A single data file.
-        papers = WoSParser(path).parse(parse_only=parse_only)
+        paths = [path]
+    symbols = SymbolTable()     # Shared by all of the files.
+    results = _parse_files(paths, parse_only=parse_only, processes=processes,
+                           cache=get_cache(cache), symbols=symbols)
 
     if corpus:
-        return corpus_class(papers, index_by=index_by, **kwargs)
-    return papers
+        # Papers are indexed as results arrive, rather than holding the whole
+        #  dataset in memory before indexing.
+        corpus = corpus_class(index_by=index_by, **kwargs)
+        corpus.symbols = symbols
+        for papers in results:
+            corpus.add_papers(papers)
+        return corpus
+    return [paper for papers in results for paper in papers]
 
 
 def streaming_read(path, corpus=True, index_by='wosid', parse_only=None,
-                   **kwargs):
+                   processes=1, cache=False, **kwargs):
 
     return read(path, corpus=corpus, index_by=index_by, parse_only=parse_only,
-                corpus_class=StreamingCorpus, **kwargs)
+                corpus_class=StreamingCorpus, processes=processes, cache=cache,
+                **kwargs)
     # corpus = StreamingCorpus(index_by=index_by, **kwargs)
 
     # if os.path.isdir(path):    # Directory containing 1+ WoS data files.
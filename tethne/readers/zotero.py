@@ -1,4 +1,5 @@
 import os
+import gzip
 import iso8601
 import logging
 import rdflib
@@ -12,13 +13,15 @@ import warnings
 warnings.simplefilter('always', UserWarning)
 
 from math import log
+from bisect import bisect_left
 logging.basicConfig(level=40)
 logging.getLogger('iso8601').setLevel(40)
 
 from datetime import datetime
 
 from tethne import Paper, Corpus, StructuredFeature, StructuredFeatureSet
-from tethne.readers.base import RDFParser
+from tethne.readers.base import RDFParser, StreamingRDFParser, _parallel_imap
+from tethne.readers.cache import get_cache
 from tethne.utilities import _strip_punctuation, mean
 
 import sys
@@ -45,38 +48,85 @@ IDENT = rdflib.URIRef(DC + u"identifier")
 TITLE = rdflib.term.URIRef(DC + u'title')
 
 
-# Build a cost dictionary, assuming Zipf's law and cost = -math.log(probability).
-from tethne.readers._rankedwords import WORDS
-WORDCOST = dict((k, log((i+1)*log(len(WORDS)))) for i, k in enumerate(WORDS))
-MAXWORD = max(len(x) for x in WORDS)
+RANKEDWORDS_PATH = os.path.join(os.path.dirname(__file__),
+                                'rankedwords.txt.gz')
+"""
+English words, one per line, in descending order of frequency. Used by
+:func:`._infer_spaces`\.
+"""
+
+_word_model = None
+
+
+def _load_word_model():
+    """
+    Loads the ranked word list, the first time that it is needed.
+
+    Word costs are built assuming Zipf's law, with cost = -math.log(probability).
+    Words are stored reversed and sorted, so that all of the words that end at
+    a given position in a string can be found by bisection.
+
+    Returns
+    -------
+    tuple
+        Reversed words (sorted), their costs, and the length of the longest
+        word.
+    """
+    global _word_model
+    if _word_model is None:
+        with gzip.open(RANKEDWORDS_PATH, 'rb') as f:
+            words = f.read().decode('ascii').split()
+        N = len(words)
+        ranked = sorted([(word[::-1], log((i + 1) * log(N)))
+                         for i, word in enumerate(words)])
+        # The sentinel sorts after any word, so a search never runs off the
+        #  end of the list.
+        _word_model = ([word for word, cost in ranked] + [u'\uffff'],
+                       [cost for word, cost in ranked] + [9e999],
+                       max(len(word) for word in words))
+    return _word_model
+
 
 def _infer_spaces(s):
     """
     Uses dynamic programming to infer the location of spaces in a string
     without spaces.
     """
+    rwords, wordcost, maxword = _load_word_model()
+    if not isinstance(s, unicode):
+        s = s.decode('utf-8', 'replace')
     s = s.lower()
+    r = s[::-1]
+    N = len(s)
 
-    # Find the best match for the i first characters, assuming cost has
-    # been built for the i-1 first characters.
-    # Returns a pair (match_cost, match_length).
-    def best_match(i):
-        candidates = enumerate(reversed(cost[max(0, i - MAXWORD):i]))
-        return min((c + WORDCOST.get(s[i-k-1: i], 9e999), k + 1)
-                    for k, c in candidates)
-
-    # Build the cost array.
+    # Build the cost array. cost[i] is the cost of the best segmentation of the
+    #  i first characters, and length[i] is the length of its last word.
     cost = [0]
-    for i in range(1, len(s) + 1):
-        c, k = best_match(i)
-        cost.append(c)
+    length = [0]
+    for i in range(1, N + 1):
+        # Reading backwards from i, skip ahead to the first reversed word that
+        #  begins with the characters read so far; stop once there is none.
+        best_cost, best_k = 9e999, 1
+        lo = 0
+        start = N - i
+        for k in range(1, min(i, maxword) + 1):
+            prefix = r[start:start + k]
+            lo = bisect_left(rwords, prefix, lo)
+            word = rwords[lo]
+            if word == prefix:      # s[i-k:i] is a word.
+                c = cost[i - k] + wordcost[lo]
+                if c < best_cost:   # Ties go to the shortest word.
+                    best_cost, best_k = c, k
+            elif not word.startswith(prefix):
+                break
+        cost.append(best_cost)
+        length.append(best_k)
 
     # Backtrack to recover the minimal-cost string.
     out = []
-    i = len(s)
+    i = N
     while i > 0:
-        c, k = best_match(i)
-        assert c == cost[i]
+        k = length[i]
         out.append(s[i-k:i])
         i -= k
 
@@ -140,8 +190,6 @@ def extract_pdf(fpath):
     pages = []
     sentences = []
 
-    tokenizer = nltk.tokenize.TextTilingTokenizer()
-
     i = 0
     for page in document:
         pages.append(i)
@@ -167,6 +215,94 @@ def extract_pdf(fpath):
     return StructuredFeature(tokens, contexts)
 
 
+EXTRACT_CACHE_VERSION = 1
+"""
+Should be incremented whenever a change to :func:`.extract_pdf` or
+:func:`.extract_text` alters their output.
+"""
+
+
+def _extract_attachment(args):
+    """
+    Extract full-text content from a single attached file. Module-level so that
+    it can be dispatched to worker processes.
+
+    Returns
+    -------
+    tuple
+        The mime-type of the file, and a :class:`.StructuredFeature` (or None).
+    """
+    fpath, cache = args
+    mime_type = magic.from_file(fpath, mime=True)
+    if mime_type == 'application/pdf':
+        extract = extract_pdf
+    elif mime_type == 'text/plain':
+        extract = extract_text
+    else:
+        return mime_type, None
+
+    if cache is None:
+        return mime_type, extract(fpath)
+    key = ('tethne.readers.zotero', extract.__name__, EXTRACT_CACHE_VERSION)
+    return mime_type, cache.get_or_parse(fpath, key, lambda: extract(fpath))
+
+
+def extract_full_text(papers, index_by='uri', processes=1, cache=None):
+    """
+    Extracts full-text content from files linked to ``papers`` (e.g. PDFs with
+    embedded text).
+
+    Parameters
+    ----------
+    papers : list
+        A list of :class:`.Paper`\s. The ``link`` attribute of each
+        :class:`.Paper` will be coerced to a list.
+    index_by : str
+        (default: ``'uri'``) :class:`.Paper` attribute used to identify the
+        source of each :class:`.StructuredFeature`\.
+    processes : int
+        (default: 1) Number of worker processes used to extract content.
+    cache : :class:`.ParseCache`
+        If provided, extracted content is stored on disk, and re-used for files
+        that have not changed.
+
+    Returns
+    -------
+    dict
+        Keys are featureset names (e.g. ``'pdf_text'``), values are dicts
+        mapping paper identifiers to :class:`.StructuredFeature`\s.
+    """
+
+    jobs = []
+    idents = []
+    for paper in papers:
+        if not hasattr(paper, 'link'):
+            continue
+        if type(paper.link) is not list:
+            paper.link = [paper.link]
+
+        ident = getattr(paper, index_by)
+        if type(ident) is list:
+            ident = ident[0]
+
+        for link in paper.link:
+            if os.path.exists(link):
+                jobs.append((link, cache))
+                idents.append(ident)
+
+    full_text = {}
+    results = _parallel_imap(_extract_attachment, jobs, processes=processes)
+    for ident, (mime_type, structuredfeature) in zip(idents, results):
+        if not structuredfeature:
+            continue
+
+        fset_name = mime_type.split('/')[-1] + '_text'
+        if not fset_name in full_text:
+            full_text[fset_name] = {}
+        full_text[fset_name][ident] = structuredfeature
+    return full_text
+
+
 class ZoteroParser(RDFParser):
     """
     Reads Zotero RDF files.
@@ -202,7 +338,7 @@ class ZoteroParser(RDFParser):
 
         super(ZoteroParser, self).__init__(path, **kwargs)
 
-        self.full_text = {}     # Collect StructuredFeatures until finished.
+        self.full_text = {}     # Populated by parse(), if follow_links.
         self.follow_links = kwargs.get('follow_links', False) # Boolean switch to follow links associated with a paper
 
     def open(self):
@@ -348,47 +484,49 @@ class ZoteroParser(RDFParser):
         setattr(entry, 'pageEnd', end)
         del entry.pages
 
-    def postprocess_link(self, entry):
-        """
-        Attempt to load full-text content from resource.
+    def parse(self):
         """
+        Parse all of the entries in the RDF file. If ``follow_links`` is set,
+        full-text content is then extracted from attached files into
+        :attr:`.full_text`\. Set ``processes`` to extract content in several
+        worker processes, and ``cache`` (a :class:`.ParseCache`\) to re-use
+        content extracted from unchanged files.
 
-        if not self.follow_links:
-            return
-
-        if type(entry.link) is not list:
-            entry.link = [entry.link]
-
-        for link in list(entry.link):
-            if not os.path.exists(link):
-                continue
+        Returns
+        -------
+        list
+        """
+        papers = super(ZoteroParser, self).parse()
+        if self.follow_links:
+            # If `index_by` is not set, use `uri` by default.
+            self.full_text = extract_full_text(
+                papers, getattr(self, 'index_by', 'uri'),
+                processes=getattr(self, 'processes', 1),
+                cache=get_cache(getattr(self, 'cache', None)))
+        return papers
 
-            mime_type = magic.from_file(link, mime=True)
-            if mime_type == 'application/pdf':
-                structuredfeature = extract_pdf(link)
-            elif mime_type == 'text/plain':
-                structuredfeature = extract_text(link)
-            else:
-                structuredfeature = None
 
-            if not structuredfeature:
-                continue
+class StreamingZoteroParser(StreamingRDFParser, ZoteroParser):
+    """
+    Reads Zotero RDF files in a single pass, without loading the whole export
+    into an :class:`rdflib.Graph`\. Produces the same :class:`.Paper`\s as
+    :class:`.ZoteroParser`\.
 
-            fset_name = mime_type.split('/')[-1] + '_text'
-            if not fset_name in self.full_text:
-                self.full_text[fset_name] = {}
+    Unlike :class:`.ZoteroParser`\, does not modify the RDF file.
+    """
 
-            if hasattr(self, 'index_by'):
-                ident = getattr(entry, self.index_by)
-                if type(ident) is list:
-                    ident = ident[0]
-            else:   # If `index_by` is not set, use `uri` by default.
-                ident = entry.uri
+    resolve_elements = [VALUE_ELEM, TYPE_ELEM, LINK_ELEM, FORENAME_ELEM,
+                        SURNAME_ELEM, VOL, TITLE]
 
-            self.full_text[fset_name][ident] = structuredfeature
+    # Zotero incorrectly uses ``rdf:resource`` as a child element of
+    #  attachments; it should be ``link:link``. See :meth:`ZoteroParser.open`.
+    predicate_aliases = {
+        rdflib.URIRef(RDF + u'resource'): LINK_ELEM
+    }
 
 
-def read(path, corpus=True, index_by='uri', follow_links=False, **kwargs):
+def read(path, corpus=True, index_by='uri', follow_links=False, cache=False,
+         parser_class=StreamingZoteroParser, processes=1, **kwargs):
     """
     Read bibliographic data from Zotero RDF.
 
@@ -423,6 +561,18 @@ def read(path, corpus=True, index_by='uri', follow_links=False, **kwargs):
     follow_links : bool
         If ``True``, attempts to load full-text content from attached files
         (e.g. PDFs with embedded text). Default: False.
+    cache : bool, str, or :class:`.ParseCache`
+        (default: False) If set, parse results are stored on disk, and re-used
+        on subsequent reads of the same (unchanged) RDF file. Full-text content
+        is cached separately for each attached file, so that only new or
+        changed files are processed when ``follow_links`` is set.
+        See :func:`tethne.readers.cache.get_cache`\.
+    parser_class : class
+        (default: :class:`.StreamingZoteroParser`) Use :class:`.ZoteroParser`
+        to parse via :mod:`rdflib` instead.
+    processes : int
+        (default: 1) Number of worker processes used to extract full-text
+        content from attached files.
     kwargs : kwargs
         Passed to the :class:`.Corpus` constructor.
 
@@ -432,15 +582,29 @@ def read(path, corpus=True, index_by='uri', follow_links=False, **kwargs):
     """
     # TODO: is there a case where `from_dir` would make sense?
 
-    parser = ZoteroParser(path, index_by=index_by, follow_links=follow_links)
-    papers = parser.parse()
+    # Full-text content is extracted separately, so that cached metadata
+    #  can be combined with content from new or changed attachments.
+    parse = lambda: parser_class(path, index_by=index_by).parse()
+
+    cache = get_cache(cache)
+    if cache is None:
+        papers = parse()
+    else:
+        if os.path.isdir(path):    # See ZoteroParser.__init__.
+            path = os.path.join(path, '{0}.rdf'.format(os.path.split(path)[1]))
+        papers = cache.get_or_parse(path, parser_class.cache_key(), parse)
+
+    full_text = {}
+    if follow_links:
+        full_text = extract_full_text(papers, index_by, processes=processes,
+                                      cache=cache)
 
     if corpus:
         c = Corpus(papers, index_by=index_by, **kwargs)
         if c.duplicate_papers:
             warnings.warn("Duplicate papers detected. Use the 'duplicate_papers' attribute of the corpus to get the list", UserWarning)
 
-        for fset_name, fset_values in parser.full_text.iteritems():
+        for fset_name, fset_values in full_text.iteritems():
             c.features[fset_name] = StructuredFeatureSet(fset_values)
         return c
     return papers
@@ -45,6 +45,70 @@ class TestCorpus(unittest.TestCase):
             self.assertEqual(len(corpus.indices[field]), expected,
                              'Index for {0} is the wrong size.'.format(field))
 
+    def test_remove_papers(self):
+        corpus = Corpus(self.papers, index_by='wosid')
+        expected = Corpus(self.papers[1:], index_by='wosid')
+        corpus.remove_papers([self.papers[0].wosid, 'nonexistent'])
+
+        self.assertEqual(len(corpus), len(self.papers) - 1)
+        self.assertNotIn(self.papers[0].wosid, corpus.indexed_papers)
+        for field in ['date', 'citations', 'authors']:
+            self.assertEqual(corpus.indices[field], expected.indices[field])
+        for name in ['citations', 'authors']:
+            featureset = corpus.features[name]
+            self.assertEqual(set(featureset.features.keys()),
+                             set(expected.features[name].features.keys()))
+            self.assertEqual(featureset.unique, expected.features[name].unique)
+
+    def test_duplicate_papers(self):
+        """
+        A :class:`.Paper` with the same key as one that is already in the
+        :class:`.Corpus` replaces it, rather than being counted twice.
+        """
+        corpus = Corpus(self.papers + self.papers[:1], index_by='wosid')
+        expected = Corpus(self.papers, index_by='wosid')
+        self.assertEqual(len(corpus), len(self.papers))
+        for date, keys in expected.indices['date'].items():
+            self.assertEqual(sorted(corpus.indices['date'][date]), sorted(keys))
+        self.assertEqual(corpus.features['authors'].counts,
+                         expected.features['authors'].counts)
+
+        # Replacement is not near-duplication.
+        self.assertEqual(corpus.duplicate_papers, {})
+
+    def test_parallel(self):
+        """
+        Indexing in shards, in worker processes, gives the same indices and
+        features as indexing in one process.
+        """
+        corpus = Corpus(self.papers + self.papers[:1], index_by='wosid')
+        pcorpus = Corpus(self.papers + self.papers[:1], index_by='wosid',
+                         processes=3)
+
+        self.assertEqual(set(pcorpus.indexed_papers.keys()),
+                         set(corpus.indexed_papers.keys()))
+        self.assertEqual(pcorpus.duplicate_papers, {})
+        self.assertEqual(dict(pcorpus.indices), dict(corpus.indices))
+        self.assertEqual(dict(pcorpus.indices_lookup),
+                         dict(corpus.indices_lookup))
+        for name, featureset in corpus.features.items():
+            pfeatureset = pcorpus.features[name]
+            self.assertEqual(pfeatureset.unique, featureset.unique)
+            for elem in featureset.unique:
+                self.assertEqual(pfeatureset.count(elem),
+                                 featureset.count(elem))
+                self.assertEqual(sorted(pfeatureset.papers_containing(elem)),
+                                 sorted(featureset.papers_containing(elem)))
+
+    def test_features_not_copied(self):
+        """
+        Features that a :class:`.Paper` already provides are indexed as-is.
+        """
+        corpus = Corpus(self.papers, index_by='wosid')
+        paper = self.papers[0]
+        self.assertIs(corpus.features['authors'].features[paper.wosid],
+                      paper.authors)
+
     def test_slice(self):
         corpus = Corpus(self.papers, index_by='wosid')
         for key, papers in corpus.slice():
@@ -96,6 +160,41 @@ class TestCorpus(unittest.TestCase):
         self.assertEqual(len(values[0]), len(values[1]))
         self.assertListEqual(values[1], [0, 1])
 
+    def test_feature_distribution_no_date(self):
+        """
+        The date index is built if the :class:`.Corpus` does not have one.
+        """
+        corpus = Corpus(self.papers, index_by='wosid',
+                        index_fields=['ayjid', 'authors'])
+        self.assertNotIn('date', corpus.indices)
+        keys, values = corpus.feature_distribution('authors',
+                                                   (u'SOTO', u'MANU'))
+        self.assertIn('date', corpus.indices)
+        self.assertListEqual(values, [0, 1])
+        self.assertEqual(keys, [key for key, subcorpus in corpus.slice()])
+
+    def test_feature_distributions(self):
+        corpus = Corpus(self.papers, index_by='wosid')
+        features = [(u'SOTO', u'MANU'), ('nobody', 'here')]
+        keys, values = corpus.feature_distributions('authors', features)
+        self.assertListEqual(values[features[0]], [0, 1])
+        self.assertListEqual(values[features[1]], [0, 0])
+        self.assertEqual(keys, corpus.feature_distribution('authors',
+                                                           features[0])[0])
+
+    def test_feature_distribution_changed(self):
+        """
+        The feature-by-date index is rebuilt when :class:`.Paper`\s change.
+        """
+        corpus = Corpus(self.papers, index_by='wosid')
+        feature = (u'SOTO', u'MANU')
+        corpus.feature_distribution('authors', feature)
+        keys = [paper.wosid for paper in self.papers
+                if feature in dict(paper.authors)]
+        corpus.remove_papers(keys)
+        self.assertListEqual(corpus.feature_distribution('authors', feature)[1],
+                             [0, 0])
+
     def test_getitem(self):
         corpus = Corpus(self.papers, index_by='wosid')
 
@@ -0,0 +1,95 @@
+import sys
+sys.path.append('./')
+
+import copy
+import unittest
+from tethne.readers.wos import read
+from tethne.classes.duplicates import DuplicateDetector
+from tethne import Corpus
+
+datapath = './tethne/tests/data/wos.txt'
+
+
+def _perturb(paper, key):
+    """
+    A copy of ``paper`` as another source might describe it.
+    """
+    other = copy.deepcopy(paper)
+    other.wosid = key
+    other.title = other.title.lower().replace(' of ', ' of the ', 1) + '.'
+    surname, forename = other.authors_full[0]
+    other.authors_full[0] = (surname, forename[:1])
+    return other
+
+
+class TestDuplicateDetector(unittest.TestCase):
+    def setUp(self):
+        self.papers = read(datapath, corpus=False)
+        self.detector = DuplicateDetector()
+        for paper in self.papers:
+            self.detector.add(paper.wosid, paper)
+
+    def test_signature(self):
+        signature = self.detector.signature(self.papers[0])
+        self.assertEqual(len(signature), 64)
+        self.assertEqual(signature, DuplicateDetector().signature(self.papers[0]))
+
+    def test_query(self):
+        for paper in self.papers:
+            self.assertEqual(self.detector.query(paper), [paper.wosid])
+            self.assertEqual(self.detector.query(_perturb(paper, 'X')),
+                             [paper.wosid])
+
+    def test_remove(self):
+        self.detector.remove(self.papers[0].wosid)
+        self.assertEqual(self.detector.query(self.papers[0]), [])
+        for bucket in self.detector.buckets:
+            for keys in bucket.values():
+                self.assertNotIn(self.papers[0].wosid, keys)
+
+
+class TestCorpusDeduplicate(unittest.TestCase):
+    def setUp(self):
+        self.papers = read(datapath, corpus=False)
+        self.duplicates = [_perturb(paper, 'X%i' % i)
+                           for i, paper in enumerate(self.papers[:3])]
+
+    def test_report(self):
+        corpus = Corpus(self.papers + self.duplicates, index_by='wosid',
+                        deduplicate='report')
+        self.assertEqual(len(corpus), 13)
+        self.assertEqual(corpus.duplicate_papers,
+                         dict([(paper.wosid, ['X%i' % i]) for i, paper
+                               in enumerate(self.papers[:3])]))
+
+    def test_collapse(self):
+        corpus = Corpus(self.papers + self.duplicates, index_by='wosid',
+                        deduplicate='collapse')
+        self.assertEqual(len(corpus), 10)
+        self.assertEqual(len(corpus.duplicate_papers), 3)
+        self.assertNotIn('X0', corpus.indices['authors'].get(
+                         self.duplicates[0].authors[0][0], []))
+
+    def test_default(self):
+        corpus = Corpus(self.papers + self.duplicates, index_by='wosid')
+        self.assertEqual(len(corpus), 13)
+        self.assertEqual(corpus.duplicate_papers, {})
+
+    def test_exact(self):
+        """
+        A :class:`.Paper` with the same key replaces the earlier one, and is
+        not reported as a duplicate of itself.
+        """
+        for deduplicate in [False, 'report']:
+            corpus = Corpus(self.papers + self.papers[:1], index_by='wosid',
+                            deduplicate=deduplicate)
+            self.assertEqual(len(corpus), 10)
+            self.assertEqual(corpus.duplicate_papers, {})
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Corpus(self.papers, deduplicate='merge')
+
+
+if __name__ == '__main__':
+    unittest.main()
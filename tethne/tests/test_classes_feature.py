@@ -46,6 +46,18 @@ class TestFeature(unittest.TestCase):
         self.assertEqual(len(feature), 2)
         self.assertEqual(dict(feature)[('bob', 'dole')], 1)
 
+    def test_from_tokens(self):
+        """
+        Same as initializing with the tokens, in the same order.
+        """
+        for tokens in [['bob', 'joe', 'bob', 'bobert', 'bob'],
+                       [('bob', 'dole'), ('roy', 'snaydon'), ('bob', 'dole')],
+                       [('bob', 3), ('joe', 1), ('bobert', 1)],
+                       'bob', []]:
+            feature = Feature.from_tokens(tokens)
+            self.assertIsInstance(feature, Feature)
+            self.assertEqual(feature, Feature(tokens))
+
     def test_norm(self):
         feature = Feature([('bob', 3), ('joe', 1), ('bobert', 1)])
         T = sum(list(zip(*feature))[1])
@@ -210,6 +222,79 @@ class TestFeatureSet(unittest.TestCase):
         self.assertEqual(featureset.documentCount('bob'), 1)
         self.assertEqual(featureset.count('bob'), 3)
 
+    def test_rekey(self):
+        featureset = FeatureSet()
+        featureset.add('p1', Feature([('bob', 3), ('joe', 1)]))
+        featureset.add('p2', Feature([('blob', 3), ('joe', 1)]))
+        featureset.add('p3', Feature([('bob', 1)]))
+
+        rekeyed = featureset.rekey({'p1': 'q1', 'p2': 'q2'})
+        self.assertIsInstance(rekeyed, FeatureSet)
+        self.assertSetEqual(set(rekeyed.features.keys()),
+                            set(['q1', 'q2', 'p3']))
+        self.assertSetEqual(set(rekeyed.papers_containing('bob')),
+                            set(['q1', 'p3']))
+        self.assertEqual(rekeyed.count('joe'), 2)
+
+        # The original is unchanged.
+        self.assertSetEqual(set(featureset.features.keys()),
+                            set(['p1', 'p2', 'p3']))
+
+    def test_rekey_collision(self):
+        """
+        If two features are mapped to the same key, only one is kept, and
+        elements that occur only in the other are removed.
+        """
+        featureset = FeatureSet()
+        featureset.add('p1', Feature([('bob', 3), ('joe', 1)]))
+        featureset.add('p2', Feature([('blob', 3), ('joe', 1)]))
+
+        rekeyed = featureset.rekey({'p1': 'q', 'p2': 'q'})
+        self.assertEqual(len(rekeyed.features), 1)
+        kept = rekeyed.features['q']
+        self.assertEqual(rekeyed.count('joe'), 1)
+        self.assertEqual(rekeyed.documentCount('joe'), 1)
+        self.assertSetEqual(set(rekeyed.unique), kept.unique)
+        self.assertListEqual(sorted(rekeyed.index.keys()),
+                             range(len(kept.unique)))
+        for elem in kept.unique:
+            self.assertEqual(rekeyed.papers_containing(elem), ['q'])
+
+    def test_update(self):
+        """
+        Merging the featuresets of two batches gives the same result as adding
+        all of the features to one featureset.
+        """
+        features = [('p1', Feature([('bob', 3), ('joe', 1)])),
+                    ('p2', Feature([('blob', 3), ('joe', 1)])),
+                    ('p3', Feature([('bob', 1), ('jim', 2)]))]
+        expected = FeatureSet()
+        first, second = FeatureSet(), FeatureSet()
+        for i, (key, feature) in enumerate(features):
+            expected.add(key, feature)
+            (first if i < 2 else second).add(key, feature)
+
+        first.update(second)
+        self.assertEqual(first.index, expected.index)
+        self.assertEqual(first.lookup, expected.lookup)
+        self.assertEqual(first.counts, expected.counts)
+        self.assertEqual(first.documentCounts, expected.documentCounts)
+        self.assertEqual(dict(first.with_feature), dict(expected.with_feature))
+        self.assertSetEqual(set(first.features.keys()), set(['p1', 'p2', 'p3']))
+
+    def test_remove(self):
+        featureset = FeatureSet()
+        featureset.add('p1', Feature([('bob', 3), ('joe', 1)]))
+        featureset.add('p2', Feature([('blob', 3), ('joe', 1)]))
+
+        featureset.remove('p1')
+        self.assertSetEqual(set(featureset.features.keys()), set(['p2']))
+        self.assertSetEqual(featureset.unique, set(['blob', 'joe']))
+        self.assertEqual(featureset.count('joe'), 1)
+        self.assertEqual(featureset.documentCount('joe'), 1)
+        self.assertEqual(featureset.papers_containing('joe'), ['p2'])
+        self.assertListEqual(sorted(featureset.index.keys()), [0, 1])
+
     def test_top(self):
         featureset = FeatureSet()
         feature = Feature([('bob', 3), ('joe', 1), ('bobert', 1)])
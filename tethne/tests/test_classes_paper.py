@@ -0,0 +1,93 @@
+import sys
+sys.path.append('./')
+
+import copy
+import pickle
+import unittest
+from tethne.readers.wos import read
+from tethne.classes import paper as paper_module
+from tethne.classes.paper import Paper, build_features
+from tethne import Feature
+
+datapath = './tethne/tests/data/wos.txt'
+
+
+class TestPaperFeatures(unittest.TestCase):
+    def setUp(self):
+        self.papers = read(datapath, corpus=False)
+        self.paper = self.papers[0]
+
+    def test_authors(self):
+        authors = self.paper.authors
+        self.assertIsInstance(authors, Feature)
+        self.assertEqual(authors, Feature(self.paper.authors_full))
+        self.assertIs(self.paper.authors, authors)
+
+    def test_citations(self):
+        citations = self.paper.citations
+        self.assertEqual(citations,
+                         Feature([cr.ayjid for cr in self.paper.citedReferences
+                                  if cr is not None]))
+        self.assertIs(self.paper.citations, citations)
+
+    def test_invalidate_set(self):
+        authors = self.paper.authors
+        self.paper.authors_full = [(u'BOB', u'D')]
+        self.assertEqual(self.paper.authors, Feature([(u'BOB', u'D')]))
+
+        self.paper.citations
+        self.paper.citedReferences = []
+        self.assertEqual(self.paper.citations, Feature([]))
+
+    def test_invalidate_append(self):
+        self.paper.authors
+        self.paper.authors_full.append((u'BOB', u'D'))
+        self.assertIn((u'BOB', u'D'), dict(self.paper.authors))
+
+    def test_invalidate_in_place(self):
+        authors = self.paper.authors
+        self.paper.authors_full[0] = (u'BOB', u'D')
+        self.assertIsNot(self.paper.authors, authors)
+        self.assertIn((u'BOB', u'D'), dict(self.paper.authors))
+
+        self.paper.citations
+        citation = Paper()
+        citation._ayjid = u'BOB_D_2000_JOURNAL'
+        self.paper.citedReferences[0] = citation
+        self.assertIn(u'BOB_D_2000_JOURNAL', dict(self.paper.citations))
+
+    def test_not_in_dict(self):
+        """
+        Memoized features are not stored in the :class:`.Paper`\.
+        """
+        fields = dict(self.paper.__dict__)
+        self.paper.authors
+        self.paper.citations
+        self.assertEqual(self.paper.__dict__, fields)
+
+    def test_invalidate_delete(self):
+        self.paper.authors
+        del self.paper.authors_full
+        self.assertEqual(self.paper.authors, Feature(self.paper.authors_init))
+
+    def test_no_authors(self):
+        paper = Paper()
+        self.assertEqual(paper.authors, Feature([]))
+        self.assertEqual(paper.citations, Feature([]))
+
+    def test_pickle(self):
+        self.paper.authors
+        for paper in [pickle.loads(pickle.dumps(self.paper)),
+                      copy.deepcopy(self.paper)]:
+            self.assertNotIn(paper, paper_module._memoized_features)
+            self.assertEqual(paper.authors, self.paper.authors)
+
+    def test_build_features(self):
+        build_features(self.papers)
+        for paper in self.papers:
+            self.assertIn('authors', paper_module._memoized_features[paper])
+            self.assertIn('citations', paper_module._memoized_features[paper])
+
+
+if __name__ == '__main__':
+    unittest.main()
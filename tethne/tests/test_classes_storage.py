@@ -0,0 +1,153 @@
+import sys
+sys.path.append('./')
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import cPickle as pickle
+
+from tethne.readers.wos import read
+from tethne.classes import storage
+from tethne.classes.storage import MappedPapers
+from tethne import Corpus, Paper, StructuredFeatureSet
+
+datapath = './tethne/tests/data/wos2.txt'
+
+
+class TestSaveLoad(unittest.TestCase):
+    def setUp(self):
+        self.corpus = read(datapath, index_by='wosid')
+        self.corpus.index('journal')
+        self.temp = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp, 'corpus')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def load(self):
+        self.corpus.save(self.path)
+        return Corpus.load(self.path)
+
+    def assertSameCorpus(self, loaded, corpus):
+        self.assertEqual(set(loaded.indexed_papers.keys()),
+                         set(corpus.indexed_papers.keys()))
+        for key, paper in corpus.indexed_papers.items():
+            self.assertEqual(set(loaded.indexed_papers[key].__dict__.keys()),
+                             set(paper.__dict__.keys()))
+            self.assertEqual(loaded.indexed_papers[key].title, paper.title)
+            self.assertEqual(loaded.indices_lookup[key],
+                             corpus.indices_lookup[key])
+
+        self.assertEqual(set(loaded.indices.keys()),
+                         set(corpus.indices.keys()))
+        for attr, index in corpus.indices.items():
+            self.assertEqual(dict(loaded.indices[attr]), dict(index))
+
+        self.assertEqual(set(loaded.features.keys()),
+                         set(corpus.features.keys()))
+        for name, featureset in corpus.features.items():
+            lfeatureset = loaded.features[name]
+            self.assertIs(type(lfeatureset), type(featureset))
+            self.assertEqual(set(lfeatureset.features.keys()),
+                             set(featureset.features.keys()))
+            for key, feature in featureset.features.items():
+                self.assertEqual(list(lfeatureset.features[key]),
+                                 list(feature))
+            for elem in featureset.unique:
+                self.assertEqual(lfeatureset.count(elem),
+                                 featureset.count(elem))
+                self.assertEqual(lfeatureset.documentCount(elem),
+                                 featureset.documentCount(elem))
+                self.assertEqual(set(lfeatureset.papers_containing(elem)),
+                                 set(featureset.papers_containing(elem)))
+
+    def test_round_trip(self):
+        loaded = self.load()
+        self.assertIsInstance(loaded, Corpus)
+        self.assertEqual(len(loaded), len(self.corpus))
+        self.assertSameCorpus(loaded, self.corpus)
+        self.assertEqual(loaded.top_features('citations', topn=5),
+                         self.corpus.top_features('citations', topn=5))
+
+    def test_lazy(self):
+        """
+        Nothing is read until it is used.
+        """
+        loaded = self.load()
+        self.assertIsInstance(loaded.indexed_papers, MappedPapers)
+        self.assertEqual(len(loaded.indexed_papers.loaded), 0)
+
+        key = self.corpus.indexed_papers.keys()[0]
+        loaded.indexed_papers[key]
+        self.assertEqual(len(loaded.indexed_papers.loaded), 1)
+
+    def test_structured(self):
+        self.corpus.index_feature('authors', structured=True)
+        featureset = self.corpus.features['authors']
+        self.assertIsInstance(featureset, StructuredFeatureSet)
+        loaded = self.load()
+        self.assertIsInstance(loaded.features['authors'],
+                              StructuredFeatureSet)
+        self.assertEqual(set(loaded.features['authors'].features.keys()),
+                         set(featureset.features.keys()))
+
+    def test_modify(self):
+        loaded = self.load()
+        key = self.corpus.indexed_papers.keys()[0]
+        loaded.remove_papers([key])
+        self.corpus.remove_papers([key])
+
+        paper = Paper()
+        paper.wosid = 'NEWPAPER'
+        paper.date = 2000
+        paper.title = 'A new paper'
+        loaded.add_papers([paper])
+        self.corpus.add_papers([paper])
+        self.assertEqual(loaded.indices['date'][2000], ['NEWPAPER'])
+        self.assertSameCorpus(loaded, self.corpus)
+
+        # ...and save the modified Corpus over the files that it came from.
+        loaded.save(self.path)
+        self.assertSameCorpus(Corpus.load(self.path), self.corpus)
+
+    def test_pickle(self):
+        loaded = pickle.loads(pickle.dumps(self.load()))
+        self.assertSameCorpus(loaded, self.corpus)
+
+    def test_slice(self):
+        loaded = self.load()
+        for (key, view), (ekey, expected) \
+                in zip(loaded.slice(), self.corpus.slice()):
+            self.assertEqual(key, ekey)
+            self.assertEqual(set(view.indexed_papers.keys()),
+                             set(expected.indexed_papers.keys()))
+
+    def test_no_numpy(self):
+        np, storage.np = storage.np, None
+        try:
+            loaded = self.load()
+            self.assertSameCorpus(loaded, self.corpus)
+        finally:
+            storage.np = np
+
+    def test_missing(self):
+        with self.assertRaises(IOError):
+            Corpus.load(self.path)
+
+    def test_version(self):
+        self.corpus.save(self.path)
+        header = os.path.join(self.path, 'corpus.json')
+        with open(header, 'r') as f:
+            data = json.load(f)
+        data['version'] = storage.VERSION + 1
+        with open(header, 'w') as f:
+            json.dump(data, f)
+
+        with self.assertRaises(ValueError):
+            Corpus.load(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -47,7 +47,7 @@ class TestStreamingCorpus(unittest.TestCase):
 
     def test_slice(self):
         corpus = StreamingCorpus(self.papers, index_by='wosid')
-        for key, papers in corpus.slice():
+        for key, papers in corpus.slice(view=False):
             self.assertIsInstance(papers, StreamingCorpus)
             self.assertIsInstance(papers[0], Paper)
 
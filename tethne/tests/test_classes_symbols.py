@@ -0,0 +1,93 @@
+import sys
+sys.path.append('./')
+
+import unittest
+from tethne.classes.symbols import SymbolTable
+from tethne.readers import wos, scopus
+from tethne import Paper
+
+datapath = './tethne/tests/data/wos.txt'
+datapath2 = './tethne/tests/data/wos2.txt'
+
+
+class TestSymbolTable(unittest.TestCase):
+    def setUp(self):
+        self.symbols = SymbolTable()
+
+    def test_intern(self):
+        a = u''.join([u'MARINE ', u'POLLUTION'])
+        b = u''.join([u'MARINE ', u'POLLUTION'])
+        self.assertIsNot(a, b)
+        self.assertIs(self.symbols.intern(a), a)
+        self.assertIs(self.symbols.intern(b), a)
+        self.assertEqual(len(self.symbols), 1)
+
+    def test_intern_tuple(self):
+        last = u''.join([u'PETERS', u'ON'])
+        first = self.symbols.intern((u'PETERSON', u'J'))
+        second = self.symbols.intern((last, u'J'))
+        self.assertIs(second, first)
+        self.assertIs(self.symbols.intern(u'PETERSON'), first[0])
+
+    def test_intern_list(self):
+        value = [(u'PETERSON', u'J'), u'PETERSON', 1]
+        interned = self.symbols.intern(value)
+        self.assertEqual(interned, value)
+        self.assertIs(interned[1], interned[0][0])
+
+    def test_intern_other(self):
+        paper = Paper()
+        self.assertIs(self.symbols.intern(paper), paper)
+        self.assertIs(self.symbols.intern(None), None)
+        self.assertEqual(len(self.symbols), 0)
+
+    def test_id(self):
+        i = self.symbols.id(u'JOURNAL')
+        self.assertEqual(self.symbols.id(u'JOURNAL'), i)
+        self.assertNotEqual(self.symbols.id(u'OTHER'), i)
+        self.assertEqual(self.symbols[i], u'JOURNAL')
+        self.assertIn(u'JOURNAL', self.symbols)
+
+
+class TestReaderSymbols(unittest.TestCase):
+    def test_wos(self):
+        corpus = wos.read(datapath)
+        self.assertIsInstance(corpus.symbols, SymbolTable)
+
+        journals = {}
+        for paper in corpus.papers:
+            journal = journals.setdefault(paper.journal, paper.journal)
+            self.assertIs(paper.journal, journal)
+            for author in paper.authors_full:
+                self.assertIs(author, corpus.symbols.intern(author))
+
+    def test_wos_citations(self):
+        corpus = wos.read(datapath)
+        ayjids = {}
+        for paper in corpus.papers:
+            for citation in paper.citedReferences:
+                if citation is None:
+                    continue
+                ayjid = ayjids.setdefault(citation.ayjid, citation.ayjid)
+                self.assertIs(citation.ayjid, ayjid)
+
+    def test_shared(self):
+        """
+        Files read together share a table.
+        """
+        symbols = SymbolTable()
+        papers = wos.WoSParser(datapath, symbols=symbols).parse() \
+               + wos.WoSParser(datapath2, symbols=symbols).parse()
+        for paper in papers:
+            self.assertIs(paper.journal, symbols.intern(paper.journal))
+
+    def test_scopus(self):
+        corpus = scopus.read('./tethne/tests/data/scopus.csv')
+        for paper in corpus.papers:
+            if hasattr(paper, 'journal'):
+                self.assertIs(paper.journal,
+                              corpus.symbols.intern(paper.journal))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import sys
+sys.path.append('./')
+
+import copy
+import pickle
+import unittest
+from tethne.readers.wos import read
+from tethne.classes.table import PaperTable, PaperView
+from tethne import Corpus, Paper
+
+datapath = './tethne/tests/data/wos.txt'
+
+
+class TestPaperTable(unittest.TestCase):
+    def setUp(self):
+        self.papers = read(datapath, corpus=False)
+        self.table = PaperTable()
+        for paper in self.papers:
+            self.table[paper.wosid] = paper
+
+    def test_mapping(self):
+        self.assertEqual(len(self.table), 10)
+        self.assertEqual(self.table.keys(),
+                         [paper.wosid for paper in self.papers])
+        self.assertIn(self.papers[0].wosid, self.table)
+        self.assertIsNone(self.table.get('nope'))
+        for key, paper in self.table.iteritems():
+            self.assertIsInstance(paper, PaperView)
+            self.assertIsInstance(paper, Paper)
+            self.assertEqual(paper.wosid, key)
+
+    def test_view(self):
+        for paper in self.papers:
+            view = self.table[paper.wosid]
+            fields = view.__dict__
+            citations = fields.pop('citedReferences')
+            self.assertEqual(fields, dict([(k, v) for k, v
+                                           in paper.__dict__.items()
+                                           if k != 'citedReferences']))
+            self.assertEqual([c.__dict__ for c in citations],
+                             [c.__dict__ for c in paper.citedReferences])
+            self.assertEqual(view.ayjid, paper.ayjid)
+            self.assertEqual(view.authors, paper.authors)
+            self.assertEqual(view.citations, paper.citations)
+            self.assertEqual(view, self.table[paper.wosid])
+        self.assertFalse(hasattr(view, 'nope'))
+        with self.assertRaises(AttributeError):
+            view.nope
+
+    def test_view_set(self):
+        view = self.table[self.papers[0].wosid]
+        view.date = 1999
+        view['journal'] = 'Some journal'
+        view.newfield = [1, 2]
+        self.assertEqual(self.table[self.papers[0].wosid].date, 1999)
+        self.assertEqual(self.table[self.papers[0].wosid].journal,
+                         'Some journal')
+        self.assertEqual(self.table[self.papers[0].wosid].newfield, [1, 2])
+        self.assertFalse(hasattr(self.table[self.papers[1].wosid], 'newfield'))
+
+        del view.newfield
+        self.assertFalse(hasattr(view, 'newfield'))
+        with self.assertRaises(AttributeError):
+            del view.newfield
+
+    def test_types(self):
+        """
+        Numeric columns are stored as arrays until a value of another type is
+        set.
+        """
+        self.assertEqual(self.table.columns['date'].typecode, 'l')
+        view = self.table[self.papers[0].wosid]
+        view.date = u'2012'
+        self.assertIs(type(self.table.columns['date']), list)
+        self.assertEqual(view.date, u'2012')
+        self.assertEqual(self.table[self.papers[1].wosid].date,
+                         self.papers[1].date)
+
+    def test_pickle(self):
+        view = self.table[self.papers[0].wosid]
+        for paper in [pickle.loads(pickle.dumps(view)), copy.deepcopy(view)]:
+            self.assertIs(type(paper), Paper)
+            self.assertEqual(set(paper.__dict__.keys()),
+                             set(self.papers[0].__dict__.keys()))
+            self.assertEqual(paper.title, self.papers[0].title)
+
+        table = pickle.loads(pickle.dumps(self.table))
+        self.assertEqual(table.keys(), self.table.keys())
+        self.assertEqual(table[self.papers[0].wosid].title,
+                         self.papers[0].title)
+
+    def test_delete(self):
+        key = self.papers[0].wosid
+        del self.table[key]
+        self.assertNotIn(key, self.table)
+        self.assertEqual(len(self.table), 9)
+        self.assertNotIn(key, self.table.keys())
+
+        self.table[key] = self.papers[0]
+        self.assertEqual(self.table[key].title, self.papers[0].title)
+        self.assertEqual(self.table.keys()[-1], key)
+
+    def test_replace(self):
+        key = self.papers[0].wosid
+        paper = Paper()
+        paper.wosid = key
+        self.table[key] = paper
+        self.assertEqual(self.table[key].__dict__, {'wosid': key})
+        self.assertEqual(len(self.table), 10)
+
+    def test_references(self):
+        """
+        Lists of Papers are stored once, in another table.
+        """
+        self.assertIn('citedReferences', self.table.reference_fields)
+        citations = set([id(c) for paper in self.papers
+                         for c in paper.citedReferences])
+        self.assertEqual(len(self.table.references), len(citations))
+
+        view = self.table[self.papers[0].wosid]
+        self.assertIsInstance(view.citedReferences[0], PaperView)
+        view.citedReferences = [u'not', u'papers']
+        self.assertNotIn('citedReferences', self.table.reference_fields)
+        self.assertEqual(view.citedReferences, [u'not', u'papers'])
+        self.assertEqual(self.table[self.papers[1].wosid].citations,
+                         self.papers[1].citations)
+
+    def test_column(self):
+        values, mask = self.table.column('date')
+        self.assertEqual(list(values), [paper.date for paper in self.papers])
+        self.assertTrue(all(mask))
+
+    def test_select(self):
+        date = self.papers[0].date
+        self.assertEqual(self.table.select('date', date),
+                         [paper.wosid for paper in self.papers
+                          if paper.date == date])
+        journal = self.papers[0].journal
+        self.assertEqual(self.table.select('journal', journal),
+                         [paper.wosid for paper in self.papers
+                          if paper.journal == journal])
+        self.assertEqual(self.table.select('date', 'nope'), [])
+        self.assertEqual(self.table.select('nope', 1), [])
+
+
+class TestColumnarCorpus(unittest.TestCase):
+    def setUp(self):
+        self.papers = read(datapath, corpus=False)
+        self.corpus = Corpus(self.papers, index_by='wosid')
+        self.columnar = Corpus(self.papers, index_by='wosid', columnar=True)
+
+    def test_init(self):
+        self.assertIsInstance(self.columnar.indexed_papers, PaperTable)
+        self.assertEqual(set(self.columnar.indexed_papers.keys()),
+                         set(self.corpus.indexed_papers.keys()))
+        for key, index in self.corpus.indices.items():
+            self.assertEqual(self.columnar.indices[key], index)
+        for key, featureset in self.corpus.features.items():
+            self.assertEqual(self.columnar.features[key].features,
+                             featureset.features)
+
+    def test_index(self):
+        for field in ['journal', 'authors_full', 'date']:
+            self.corpus.index(field)
+            self.columnar.index(field)
+            sort = lambda index: dict([(k, sorted(v))
+                                       for k, v in index.items()])
+            self.assertEqual(sort(self.columnar.indices[field]),
+                             sort(self.corpus.indices[field]))
+
+    def test_select(self):
+        date = self.papers[0].date
+        self.assertEqual(set([p.wosid for p in self.columnar[('date', date)]]),
+                         set([p.wosid for p in self.corpus[('date', date)]]))
+
+    def test_subcorpus(self):
+        for key, subcorpus in self.columnar.slice(view=False):
+            self.assertTrue(subcorpus.columnar)
+            self.assertIsInstance(subcorpus.indexed_papers, PaperTable)
+            for paper in subcorpus.papers:
+                self.assertEqual(paper.date, key)
+
+    def test_remove_papers(self):
+        key = self.papers[0].wosid
+        self.columnar.remove_papers([key])
+        self.assertEqual(len(self.columnar), 9)
+        self.assertNotIn(key, self.columnar.indexed_papers)
+
+    def test_read(self):
+        corpus = read(datapath, columnar=True)
+        self.assertIsInstance(corpus.indexed_papers, PaperTable)
+        self.assertEqual(len(corpus), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import sys
+sys.path.append('./')
+
+import unittest
+from tethne.readers.wos import read
+from tethne.classes.view import CorpusView
+from tethne import Corpus, networks
+
+datapath = './tethne/tests/data/wos2.txt'
+
+
+class TestCorpusView(unittest.TestCase):
+    def setUp(self):
+        self.corpus = read(datapath, index_by='wosid')
+        self.date = sorted(self.corpus.indices['date'].keys())[0]
+        self.view = self.corpus.subcorpus(('date', self.date), view=True)
+        self.expected = self.corpus.subcorpus(('date', self.date))
+
+    def test_papers(self):
+        self.assertIsInstance(self.view, CorpusView)
+        self.assertIsInstance(self.view, Corpus)
+        self.assertEqual(len(self.view), len(self.expected))
+        self.assertEqual(set(self.view.indexed_papers.keys()),
+                         set(self.expected.indexed_papers.keys()))
+        for paper in self.view.papers:
+            self.assertIs(self.view.indexed_papers[paper.wosid],
+                          self.corpus.indexed_papers[paper.wosid])
+
+        other = self.corpus.papers[0]
+        if other.date != self.date:
+            self.assertNotIn(other.wosid, self.view.indexed_papers)
+            with self.assertRaises(KeyError):
+                self.view.indexed_papers[other.wosid]
+
+    def test_indices(self):
+        for attr in self.expected.indices.keys():
+            self.assertIn(attr, self.view.indices)
+            self.assertEqual(
+                dict([(k, sorted(v)) for k, v
+                      in self.view.indices[attr].items()]),
+                dict([(k, sorted(v)) for k, v
+                      in self.expected.indices[attr].items()]))
+        self.assertEqual(self.view.indices['date'].keys(), [self.date])
+        for key in self.view.indexed_papers:
+            self.assertEqual(self.view.indices_lookup[key],
+                             self.corpus.indices_lookup[key])
+
+    def test_features(self):
+        for name, featureset in self.expected.features.items():
+            vfeatureset = self.view.features[name]
+            self.assertEqual(set(vfeatureset.features.keys()),
+                             set(featureset.features.keys()))
+            self.assertEqual(vfeatureset.unique, featureset.unique)
+            for elem in featureset.unique:
+                self.assertEqual(vfeatureset.count(elem),
+                                 featureset.count(elem))
+                self.assertEqual(vfeatureset.documentCount(elem),
+                                 featureset.documentCount(elem))
+
+    def test_select(self):
+        self.assertEqual(len(self.view[('date', self.date)]), len(self.view))
+        self.assertEqual(self.view[('date', self.date + 1)], [])
+
+    def test_slice(self):
+        for (key, view), (ekey, expected) \
+                in zip(self.corpus.slice(), self.corpus.slice(view=False)):
+            self.assertEqual(key, ekey)
+            self.assertIsInstance(view, CorpusView)
+            self.assertNotIsInstance(expected, CorpusView)
+            self.assertEqual(set(view.indexed_papers.keys()),
+                             set(expected.indexed_papers.keys()))
+
+    def test_network(self):
+        graph = networks.coauthors(self.view)
+        expected = networks.coauthors(self.expected)
+        self.assertEqual(sorted(graph.nodes()), sorted(expected.nodes()))
+        self.assertEqual(graph.size(), expected.size())
+
+    def test_readonly(self):
+        with self.assertRaises(TypeError):
+            self.view.add_papers(self.corpus.papers[:1])
+        with self.assertRaises(TypeError):
+            self.view.remove_papers([self.view.indexed_papers.keys()[0]])
+
+    def test_index(self):
+        """
+        New indices are added to the parent.
+        """
+        self.view.index('journal')
+        self.assertIn('journal', self.corpus.indices)
+        journals = set([paper.journal for paper in self.view.papers])
+        self.assertEqual(set(self.view.indices['journal'].keys()), journals)
+
+    def test_index_feature(self):
+        """
+        New featuresets are built on the parent, for all of its papers.
+        """
+        self.assertNotIn('keywordsPlus', self.corpus.features)
+        self.view.index_feature('keywordsPlus')
+        self.assertIn('keywordsPlus', self.corpus.features)
+        self.assertEqual(set(self.corpus.features['keywordsPlus'].features),
+                         set([key for key, paper
+                              in self.corpus.indexed_papers.items()
+                              if getattr(paper, 'keywordsPlus', None)]))
+
+        # The view's featureset has only the view's papers.
+        featureset = self.view.features['keywordsPlus']
+        self.assertLessEqual(set(featureset.features),
+                             set(self.view.indexed_papers.keys()))
+
+    def test_materialize(self):
+        corpus = self.view.materialize()
+        self.assertNotIsInstance(corpus, CorpusView)
+        self.assertEqual(set(corpus.indexed_papers.keys()),
+                         set(self.expected.indexed_papers.keys()))
+        corpus.remove_papers(corpus.indexed_papers.keys()[:1])
+        self.assertEqual(len(corpus), len(self.view) - 1)
+
+    def test_view_of_view(self):
+        key = self.view.indexed_papers.keys()[0]
+        view = self.view.subcorpus([key], view=True)
+        self.assertIs(view.parent, self.corpus)
+        self.assertEqual(view.indexed_papers.keys(), [key])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import sys
+sys.path.append('./')
+
+import unittest
+from tethne.readers.wos import read
+from tethne.classes import window
+from tethne.classes.window import FeatureCube, FeatureDateIndex, \
+                                  window_ranges, _window_steps
+
+datapath = './tethne/tests/data/wos2.txt'
+
+# Overlapping, cumulative, and non-overlapping windows.
+slicings = [{}, {'window_size': 3}, {'cumulative': True},
+            {'cumulative': True, 'step_size': 2},
+            {'window_size': 2, 'step_size': 3}]
+
+
+def slice_featuresets(corpus, featureset_name, **slice_kwargs):
+    """
+    The featureset of each subcorpus from :meth:`.Corpus.slice`\.
+    """
+    return [(key, subcorpus.features[featureset_name]) for key, subcorpus
+            in corpus.slice(view=False, **slice_kwargs)]
+
+
+def value(featureset, elem, mode='counts'):
+    if elem not in featureset.lookup:
+        return 0.
+    return getattr(featureset, mode)[featureset.lookup[elem]]
+
+
+class TestWindowRanges(unittest.TestCase):
+    def test_sliding(self):
+        self.assertEqual(list(window_ranges(2000, 2003, window_size=2)),
+                         [(2000, [2000, 2001]), (2001, [2001, 2002]),
+                          (2002, [2002, 2003])])
+
+    def test_cumulative(self):
+        self.assertEqual(list(window_ranges(2000, 2002, cumulative=True)),
+                         [(2001, [2000]), (2002, [2000, 2001]),
+                          (2003, [2000, 2001, 2002])])
+
+    def test_steps(self):
+        """
+        Only the years that enter or leave a window are added or subtracted.
+        """
+        self.assertEqual(list(_window_steps(window_ranges(2000, 2004,
+                                                          window_size=3))),
+                         [(2000, [2000, 2001, 2002], []),
+                          (2001, [2003], [2000]), (2002, [2004], [2001])])
+        self.assertEqual(list(_window_steps(window_ranges(2000, 2002,
+                                                          cumulative=True))),
+                         [(2001, [2000], []), (2002, [2001], []),
+                          (2003, [2002], [])])
+        self.assertEqual(list(_window_steps(window_ranges(2000, 2004,
+                                                          window_size=2,
+                                                          step_size=3))),
+                         [(2000, [2000, 2001], []),
+                          (2003, [2003, 2004], None)])
+
+
+class TestFeatureDateIndex(unittest.TestCase):
+    def setUp(self):
+        self.corpus = read(datapath, index_by='wosid')
+        self.index = FeatureDateIndex(self.corpus, 'citations')
+
+    def test_distribution(self):
+        featureset = self.corpus.features['citations']
+        elements = [featureset.index[i] for i, c
+                    in featureset.counts.most_common(5)]
+        for slice_kwargs in slicings:
+            expected = slice_featuresets(self.corpus, 'citations',
+                                         **slice_kwargs)
+            for mode in ['counts', 'documentCounts']:
+                keys, values = self.index.distributions(elements, mode,
+                                                        **slice_kwargs)
+                self.assertEqual(keys, [key for key, sub in expected])
+                for elem in elements:
+                    self.assertEqual(values[elem],
+                                     [value(sub, elem, mode)
+                                      for key, sub in expected])
+                    self.assertEqual(values[elem],
+                                     self.index.distribution(
+                                        elem, mode, **slice_kwargs)[1])
+
+    def test_missing(self):
+        keys, values = self.index.distribution('nope')
+        self.assertEqual(values, [0.] * len(keys))
+
+
+class TestFeatureCube(unittest.TestCase):
+    def setUp(self):
+        self.corpus = read(datapath, index_by='wosid')
+        self.cube = FeatureCube(self.corpus, 'citations')
+
+    def assertSameTop(self, top, expected):
+        self.assertEqual([value for elem, value in top],
+                         [value for elem, value in expected])
+        self.assertEqual([type(value) for elem, value in top],
+                         [type(value) for elem, value in expected])
+        for elem, value in top:
+            self.assertEqual(dict(expected).get(elem, value), value)
+
+    def test_top(self):
+        featureset = self.corpus.features['citations']
+        for by in ['counts', 'documentCounts']:
+            self.assertSameTop(self.cube.top(10, by), featureset.top(10, by))
+
+    def assertSameSliceTop(self, cube):
+        for slice_kwargs in slicings:
+            expected = slice_featuresets(self.corpus, 'citations',
+                                         **slice_kwargs)
+            for by in ['counts', 'documentCounts']:
+                result = cube.slice_top(5, by, **slice_kwargs)
+                self.assertEqual(len(result), len(expected))
+                for (key, top), (ekey, featureset) in zip(result, expected):
+                    self.assertEqual(key, ekey)
+                    self.assertSameTop(top, featureset.top(5, by))
+
+    def test_slice_top(self):
+        """
+        The running totals give the same top elements as the featureset of
+        each subcorpus.
+        """
+        self.assertSameSliceTop(self.cube)
+
+    def test_rollup(self):
+        decades = self.cube.rollup(10)
+        self.assertEqual(decades.years,
+                         sorted(set([(year // 10) * 10
+                                     for year in self.cube.years])))
+        for decade in decades.years:
+            years = [year for year in self.cube.years
+                     if (year // 10) * 10 == decade]
+            self.assertSameTop(decades.top(5, years=[decade]),
+                               self.cube.top(5, years=years))
+
+    def test_no_numpy(self):
+        np, window.np = window.np, None
+        try:
+            cube = FeatureCube(self.corpus, 'citations')
+            for by in ['counts', 'documentCounts']:
+                self.assertSameTop(cube.top(5, by), self.cube.top(5, by))
+                self.assertSameTop(cube.rollup(10).top(5, by),
+                                   self.cube.top(5, by))
+            self.assertSameSliceTop(cube)
+        finally:
+            window.np = np
+
+    def test_corpus(self):
+        self.assertIs(self.corpus.feature_cube('citations'),
+                      self.corpus.feature_cube('citations'))
+        top = self.corpus.top_features('citations', topn=5, perslice=True)
+        self.assertEqual(len(top), len(self.corpus.indices['date']))
+
+    def test_corpus_no_date(self):
+        """
+        ``top_features(perslice=True)`` gives the same values, of the same
+        types, as the top features of each slice, even if the
+        :class:`.Corpus` has no date index.
+        """
+        corpus = read(datapath, index_by='wosid',
+                      index_fields=['ayjid', 'authors'])
+        self.assertNotIn('date', corpus.indices)
+        for by in ['counts', 'documentCounts']:
+            top = corpus.top_features('authors', topn=5, by=by,
+                                      perslice=True)
+            expected = slice_featuresets(corpus, 'authors')
+            self.assertEqual([key for key, values in top],
+                             [key for key, featureset in expected])
+            for (key, values), (ekey, featureset) in zip(top, expected):
+                self.assertSameTop(values, featureset.top(5, by))
+        self.assertIsInstance(top[0][1][0][1], float)   # documentCounts.
+        top = corpus.top_features('authors', topn=5, perslice=True)
+        self.assertIsInstance(top[0][1][0][1], int)
+
+
+if __name__ == '__main__':
+    unittest.main()
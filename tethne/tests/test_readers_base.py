@@ -2,10 +2,15 @@ import sys
 sys.path.append('../tethne')
 
 import unittest
+import codecs
+import os
+import shutil
+import tempfile
 from tethne.readers.base import FTParser, XMLParser
 import xml.etree.ElementTree as ET
 
 datapath = './tethne/tests/data/test.ft'
+wosdatapath = './tethne/tests/data/wos.txt'
 xmldatapath = './tethne/tests/data/dfr/citations.XML'
 
 
@@ -51,6 +56,19 @@ class TestXMLParser(unittest.TestCase):
         
         self.assertEqual(N, 398, 'Expected 398 entries, found {0}'.format(N))
 
+    def test_iter_entries(self):
+        """
+        ``iter_entries`` should yield the same entries as ``parse``, without
+        accumulating them in ``data``.
+        """
+        parser = XMLParser(xmldatapath)
+        N = 0
+        for entry in parser.iter_entries():
+            self.assertIsInstance(entry, parser.entry_class)
+            self.assertLessEqual(len(parser.data), 1)
+            N += 1
+        self.assertEqual(N, 398, 'Expected 398 entries, found {0}'.format(N))
+
 
 class TestFTParser(unittest.TestCase):
     def test_badpath(self):
@@ -114,6 +132,58 @@ class TestFTParser(unittest.TestCase):
         N = len(parser.data)
         self.assertEqual(N, 2, 'Expected 2 data entries, found {0}'.format(N))
 
+    def test_iter_entries(self):
+        """
+        ``iter_entries`` should yield each entry, fully processed.
+        """
+        entries = list(FTParser(datapath).iter_entries())
+
+        self.assertEqual(len(entries), 2,
+                         'Expected 2 data entries, found {0}'.format(len(entries)))
+        self.assertEqual(len(entries[0].TH), 3)
+
+
+class TestFTParserEncoding(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def _write(self, content, encoding, bom=''):
+        fpath = os.path.join(self.temp, 'data.ft')
+        with open(fpath, 'wb') as f:
+            f.write(bom + content.encode(encoding))
+        return fpath
+
+    def test_bom(self):
+        """
+        A UTF-8 byte-order mark should be detected and skipped.
+        """
+        parser = FTParser(wosdatapath, autostart=False)
+        self.assertEqual(parser.encoding, 'utf-8')
+        tag, data = parser.next()
+        self.assertEqual(tag, 'FN')
+
+    def test_utf16(self):
+        content = u'ST\nFI\tSome data\nED\n'
+        parser = FTParser(self._write(content, 'utf-16-le',
+                                      codecs.BOM_UTF16_LE))
+        parser.parse()
+        self.assertEqual(parser.data[0].FI, u'Some data')
+
+    def test_fallback(self):
+        """
+        If the sample looks like UTF-8 but the rest of the file does not
+        decode, the parser should re-detect the encoding rather than fail.
+        """
+        content = u'ST\nFI\tSome data\nTH\tEl Ni\xf1o\nED\n'
+        parser = FTParser(self._write(content, 'latin-1'), sample_size=8)
+        self.assertEqual(parser.encoding, 'utf-8')
+        parser.parse()
+        self.assertEqual(len(parser.data), 1)
+        self.assertTrue(parser.data[0].TH.startswith(u'El Ni'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,140 @@
+import sys
+sys.path.append('../tethne')
+
+import unittest
+import os
+import shutil
+import tempfile
+import time
+
+from tethne.readers.cache import ParseCache, get_cache
+from tethne.readers import wos, dfr, zotero
+from tethne import Corpus, FeatureSet
+
+wosdatapath = './tethne/tests/data/wos.txt'
+dfrdatapath = './tethne/tests/data/dfr_float_weights'
+zoterodatapath = './tethne/tests/data/zotero/zotero.rdf'
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.mkdtemp()
+        self.cache = ParseCache(os.path.join(self.temp, 'cache'))
+        self.source = os.path.join(self.temp, 'data.txt')
+        with open(self.source, 'w') as f:
+            f.write('some data')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def test_get_set(self):
+        self.assertEqual(self.cache.get(self.source, ('key',)), None)
+        self.cache.set(self.source, ('key',), [1, 2, 3])
+        self.assertEqual(self.cache.get(self.source, ('key',)), [1, 2, 3])
+        self.assertEqual(self.cache.get(self.source, ('other',)), None)
+
+    def test_modified(self):
+        """
+        An entry should not be used once its source content has changed.
+        """
+        self.cache.set(self.source, ('key',), [1, 2, 3])
+        with open(self.source, 'w') as f:
+            f.write('other data')
+        self.assertEqual(self.cache.get(self.source, ('key',)), None)
+
+    def test_touched(self):
+        """
+        If the source is touched but its content is the same, the entry is
+        still valid.
+        """
+        self.cache.set(self.source, ('key',), [1, 2, 3])
+        later = time.time() + 10
+        os.utime(self.source, (later, later))
+        self.assertEqual(self.cache.get(self.source, ('key',)), [1, 2, 3])
+
+    def test_get_or_parse(self):
+        calls = []
+        parse = lambda: calls.append(1) or 'parsed'
+        for i in range(2):
+            value = self.cache.get_or_parse(self.source, ('key',), parse)
+            self.assertEqual(value, 'parsed')
+        self.assertEqual(len(calls), 1)
+
+    def test_modified_while_parsing(self):
+        """
+        A result is stored with the fingerprint that the source had before it
+        was parsed, so a change made during parsing invalidates it.
+        """
+        def parse():
+            with open(self.source, 'w') as f:
+                f.write('changed while parsing')
+            return 'stale'
+
+        self.assertEqual(self.cache.get_or_parse(self.source, ('key',), parse),
+                         'stale')
+        self.assertEqual(self.cache.get(self.source, ('key',)), None)
+        self.assertEqual(self.cache.get_or_parse(self.source, ('key',),
+                                                 lambda: 'fresh'), 'fresh')
+
+    def test_clear(self):
+        self.cache.set(self.source, ('key',), [1, 2, 3])
+        self.cache.clear()
+        self.assertEqual(self.cache.get(self.source, ('key',)), None)
+
+    def test_get_cache(self):
+        self.assertEqual(get_cache(False), None)
+        self.assertIsInstance(get_cache(True), ParseCache)
+        self.assertEqual(get_cache(self.temp).base_path, self.temp)
+        self.assertIs(get_cache(self.cache), self.cache)
+
+
+class TestCachedRead(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.mkdtemp()
+        self.cache = ParseCache(self.temp)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def test_wos(self):
+        corpus = wos.read(wosdatapath, cache=self.cache)
+        cached = wos.read(wosdatapath, cache=self.cache)
+        self.assertIsInstance(cached, Corpus)
+        self.assertEqual(len(os.listdir(self.cache.cache_path)), 1)
+        self.assertEqual(set(corpus.indexed_papers.keys()),
+                         set(cached.indexed_papers.keys()))
+        for key, paper in corpus.indexed_papers.iteritems():
+            values = dict(paper.__dict__)
+            cached_values = dict(cached[key].__dict__)
+            refs = values.pop('citedReferences', [])
+            cached_refs = cached_values.pop('citedReferences', [])
+            self.assertEqual(values, cached_values)
+            self.assertEqual([ref.__dict__ for ref in refs],
+                             [ref.__dict__ for ref in cached_refs])
+
+    def test_wos_parse_only(self):
+        """
+        Results parsed with different fields should be cached separately.
+        """
+        wos.read(wosdatapath, cache=self.cache)
+        corpus = wos.read(wosdatapath, cache=self.cache, parse_only=['title'])
+        self.assertEqual(len(os.listdir(self.cache.cache_path)), 2)
+        self.assertFalse(hasattr(corpus.papers[0], 'journal'))
+
+    def test_dfr(self):
+        corpus = dfr.read(dfrdatapath, cache=self.cache)
+        cached = dfr.read(dfrdatapath, cache=self.cache)
+        self.assertEqual(len(corpus), len(cached))
+        self.assertIsInstance(cached.features['keyterms'], FeatureSet)
+        self.assertEqual(len(corpus.features['keyterms'].index),
+                         len(cached.features['keyterms'].index))
+
+    def test_zotero(self):
+        corpus = zotero.read(zoterodatapath, cache=self.cache)
+        cached = zotero.read(zoterodatapath, cache=self.cache)
+        self.assertEqual(len(os.listdir(self.cache.cache_path)), 1)
+        self.assertEqual(len(corpus), len(cached))
+
+
+if __name__ == '__main__':
+    unittest.main()
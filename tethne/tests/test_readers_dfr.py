@@ -4,6 +4,9 @@ sys.path.append('../tethne')
 import unittest
 from tethne.readers import merge
 from tethne.readers.dfr import read, ngrams, _handle_author,_dfr2paper_map,_create_ayjid,_handle_pagerange,tokenize,_handle_authors,_handle_paper
+from tethne.readers.dfr import DfRParser, _AmpersandEscaper
+from tethne.readers.base import lET
+from io import BytesIO
 from tethne import Corpus, Paper, FeatureSet
 import xml.etree.ElementTree as ET
 
@@ -113,6 +116,17 @@ class TestNGrams(unittest.TestCase):
         self.assertEqual(len(grams), 398)
         self.assertEqual(len(grams.index), 105156)
 
+        # As built by FeatureSet(features).
+        self.assertEqual(set([type(v) for v in grams.counts.values()]),
+                         set([float]))
+        self.assertEqual(set([type(v) for v in grams.documentCounts.values()]),
+                         set([int]))
+        expected = FeatureSet(grams.features)
+        for elem in grams.unique:
+            self.assertEqual(grams.count(elem), expected.count(elem))
+            self.assertEqual(grams.documentCount(elem),
+                             expected.documentCount(elem))
+
     def test_float_weights(self):
         """
         Some DfR features have floating-point weights, rather than ints.
@@ -123,6 +137,44 @@ class TestNGrams(unittest.TestCase):
         self.assertEqual(len(grams), 2)
         self.assertEqual(len(grams.index), 43)
 
+    def test_ngrams_parallel(self):
+        """
+        Parsing N-gram files in several processes should yield the same
+        :class:`.FeatureSet` as parsing them serially.
+        """
+        grams = ngrams(datapath_float_weights, 'keyterms')
+        pgrams = ngrams(datapath_float_weights, 'keyterms', processes=2)
+
+        self.assertEqual(set(grams.features.keys()),
+                         set(pgrams.features.keys()))
+        for k in grams.features.keys():
+            self.assertEqual(dict(grams.features[k]), dict(pgrams.features[k]))
+        self.assertEqual(grams.counts, pgrams.counts)
+
+class TestCitationParser(unittest.TestCase):
+    def test_escape_ampersands(self):
+        """
+        Bare ampersands should be escaped, even where a read ends partway
+        through ``&amp;``\.
+        """
+        raw = b'<a>R&D &amp; more &amp &</a>'
+        for size in range(1, 8):
+            escaper = _AmpersandEscaper(BytesIO(raw))
+            chunks = iter(lambda: escaper.read(size), b'')
+            self.assertEqual(b''.join(chunks),
+                             b'<a>R&amp;D &amp; more &amp;amp &amp;</a>')
+
+    @unittest.skipIf(lET is None, 'lxml is not installed')
+    def test_lxml(self):
+        citationpath = datapath + '/citations.XML'
+        papers = DfRParser(citationpath).parse()
+        lxml_papers = DfRParser(citationpath, use_lxml=True).parse()
+
+        self.assertEqual(len(papers), 398)
+        self.assertEqual([paper.__dict__ for paper in papers],
+                         [paper.__dict__ for paper in lxml_papers])
+
+
 class TestCitationFile(unittest.TestCase):
     def test_citations_file(self):
         datapath2 = './tethne/tests/data/dfr2'
@@ -32,6 +32,30 @@ class TestMerge(unittest.TestCase):
         combined = merge(self.dfr_corpus, self.wos_corpus, match_by=comparator)
         self.assertEqual(len(combined), 472)
 
+    def test_merge_block_by(self):
+        """
+        A callable ``match_by`` is only evaluated for pairs of papers that
+        agree on the ``block_by`` fields.
+        """
+        calls = []
+        def comparator(p1, p2):
+            calls.append(1)
+            return p1.ayjid == p2.ayjid
+        combined = merge(self.dfr_corpus, self.wos_corpus, match_by=comparator,
+                         block_by=['ayjid'])
+        self.assertEqual(len(combined), 472)
+        self.assertLess(len(calls),
+                        len(self.dfr_corpus) * len(self.wos_corpus))
+
+    def test_merge_threshold(self):
+        """
+        With ``match_threshold`` < 1., papers need only agree on some of the
+        ``match_by`` fields.
+        """
+        combined = merge(self.dfr_corpus, self.wos_corpus,
+                         match_by=['ayjid', 'title'], match_threshold=0.5)
+        self.assertLessEqual(len(combined), 472)
+
     def test_merge_both_empty(self):
         """
         Testing the functionality of merge when both lists passed are empty
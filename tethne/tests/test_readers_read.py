@@ -0,0 +1,187 @@
+import sys
+sys.path.append('../tethne')
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tethne.readers import read, update, dfr, wos, scopus, _sniff, _find_datasets
+from tethne import Corpus, Paper, FeatureSet
+
+dfr_datapath = './tethne/tests/data/dfr'
+wos_datapath = './tethne/tests/data/wos.txt'
+scopus_datapath = './tethne/tests/data/scopus.csv'
+zotero_datapath = './tethne/tests/data/zotero/zotero.rdf'
+
+
+class TestSniff(unittest.TestCase):
+    def test_sniff(self):
+        self.assertEqual(_sniff(wos_datapath), 'wos')
+        self.assertEqual(_sniff('./tethne/tests/data/valentin.txt'), 'wos')
+        self.assertEqual(_sniff(dfr_datapath + '/citations.XML'), 'dfr')
+        self.assertEqual(_sniff(zotero_datapath), 'zotero')
+        self.assertEqual(_sniff(scopus_datapath), 'scopus')
+
+    def test_sniff_unknown(self):
+        self.assertEqual(_sniff('./tethne/tests/data/test.ft'), None)
+        self.assertEqual(_sniff(dfr_datapath + '/README.txt'), None)
+
+
+class TestRead(unittest.TestCase):
+    def setUp(self):
+        """
+        Files are given names that don't indicate their formats.
+        """
+        self.temp = tempfile.mkdtemp()
+        shutil.copy(wos_datapath, os.path.join(self.temp, 'a'))
+        os.mkdir(os.path.join(self.temp, 'b'))
+        shutil.copy(scopus_datapath, os.path.join(self.temp, 'b', 'export'))
+        shutil.copytree(dfr_datapath, os.path.join(self.temp, 'c'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def test_find_datasets(self):
+        datasets = _find_datasets(self.temp)
+        self.assertEqual([fmt for fmt, path in datasets],
+                         ['wos', 'scopus', 'dfr'])
+
+    def test_read(self):
+        corpus = read(self.temp)
+        self.assertIsInstance(corpus, Corpus)
+
+        papers = wos.read(wos_datapath, corpus=False) \
+               + scopus.read(scopus_datapath, corpus=False) \
+               + dfr.read(dfr_datapath, corpus=False)
+        expected = Corpus(papers, index_by='ayjid')
+        self.assertEqual(set(corpus.indexed_papers.keys()),
+                         set(expected.indexed_papers.keys()))
+
+    def test_read_ngrams(self):
+        """
+        N-grams from DfR datasets are re-keyed using the primary index. Some
+        DfR papers share an ``ayjid``\, so there are fewer than 398.
+        """
+        corpus = read(self.temp)
+        self.assertIn('wordcounts', corpus.features)
+        self.assertGreater(len(corpus.features['wordcounts']), 300)
+        for key in corpus.features['wordcounts'].features:
+            self.assertIn(key, corpus.indexed_papers)
+
+    def test_read_parallel(self):
+        corpus = read(self.temp)
+        pcorpus = read(self.temp, processes=2)
+        self.assertEqual(corpus.indexed_papers.keys(),
+                         pcorpus.indexed_papers.keys())
+
+    def test_read_nocorpus(self):
+        papers = read(self.temp, corpus=False, parse_only=['title'])
+        self.assertEqual(len(papers), 428)
+        self.assertIsInstance(papers[0], Paper)
+
+    def test_read_nothing(self):
+        with self.assertRaises(ValueError):
+            read(os.path.join(self.temp, 'nope'))
+
+
+class TestUpdate(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.mkdtemp()
+        shutil.copy(wos_datapath, os.path.join(self.temp, 'a.txt'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp)
+
+    def assertSameCorpus(self, corpus, expected):
+        self.assertEqual(set(corpus.indexed_papers.keys()),
+                         set(expected.indexed_papers.keys()))
+        for field, index in expected.indices.items():
+            self.assertEqual(dict([(k, sorted(v)) for k, v
+                                   in corpus.indices[field].items()]),
+                             dict([(k, sorted(v)) for k, v in index.items()]))
+        for name, featureset in expected.features.items():
+            self.assertEqual(set(corpus.features[name].features.keys()),
+                             set(featureset.features.keys()))
+            for elem in featureset.unique:
+                self.assertEqual(corpus.features[name].count(elem),
+                                 featureset.count(elem))
+
+    def test_manifest(self):
+        corpus = read(self.temp)
+        self.assertEqual(len(corpus.manifest), 1)
+        self.assertIn(os.path.join(self.temp, 'a.txt'), corpus.manifest)
+        self.assertEqual(len(corpus.manifest.keys(self.temp + '/a.txt')), 10)
+
+    def test_update_new(self):
+        corpus = read(self.temp)
+        shutil.copy('./tethne/tests/data/wos2.txt',
+                    os.path.join(self.temp, 'b.txt'))
+        shutil.copytree(dfr_datapath, os.path.join(self.temp, 'dfr'))
+
+        self.assertIs(update(corpus, self.temp), corpus)
+        self.assertEqual(len(corpus.manifest), 3)
+        self.assertIn('wordcounts', corpus.features)
+        self.assertSameCorpus(corpus, read(self.temp))
+
+    def test_update_changed(self):
+        shutil.copy('./tethne/tests/data/wos2.txt',
+                    os.path.join(self.temp, 'b.txt'))
+        corpus = read(self.temp)
+
+        # Keep only the first record.
+        with open(os.path.join(self.temp, 'b.txt'), 'r') as f:
+            data = f.read()
+        with open(os.path.join(self.temp, 'b.txt'), 'w') as f:
+            f.write(data[:data.index('\nER') + 3] + '\nEF\n')
+
+        update(corpus, self.temp)
+        self.assertEqual(len(corpus), 11)
+        self.assertSameCorpus(corpus, read(self.temp))
+
+    def test_update_ngrams(self):
+        """
+        N-grams from a changed DfR dataset replace those already in the
+        :class:`.Corpus`\, even if another dataset provides the same papers.
+        """
+        os.remove(os.path.join(self.temp, 'a.txt'))
+        shutil.copytree(dfr_datapath, os.path.join(self.temp, 'dfr1'))
+        shutil.copytree(dfr_datapath, os.path.join(self.temp, 'dfr2'))
+        corpus = read(self.temp)
+        before = corpus.features['wordcounts'].count('the')
+
+        dpath = os.path.join(self.temp, 'dfr2')
+        wpath = os.path.join(dpath, 'wordcounts',
+                             'wordcounts_10.2307_1141712.XML')
+        with open(wpath, 'r') as f:
+            data = f.read()
+        with open(wpath, 'w') as f:
+            f.write(data.replace('weight="360" > the', 'weight="1360" > the'))
+        with open(os.path.join(dpath, 'citations.XML'), 'a') as f:
+            f.write('\n')
+
+        update(corpus, self.temp)
+        self.assertEqual(corpus.features['wordcounts'].count('the'),
+                         before + 1000)
+        self.assertSameCorpus(corpus, read(self.temp))
+
+    def test_update_unchanged(self):
+        """
+        Files that have not changed are not parsed again.
+        """
+        path = os.path.join(self.temp, 'a.txt')
+        corpus = read(self.temp)
+        corpus.manifest.add(path, [])   # Would be replaced by a new parse.
+        os.utime(path, None)    # Touch.
+
+        update(corpus, self.temp)
+        self.assertEqual(corpus.manifest.keys(path), [])
+        self.assertEqual(len(corpus), 10)
+
+    def test_update_nomanifest(self):
+        with self.assertRaises(ValueError):
+            update(wos.read(wos_datapath), self.temp)
+
+
+if __name__ == '__main__':
+    unittest.main()
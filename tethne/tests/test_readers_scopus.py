@@ -7,7 +7,7 @@ import csv
 from unidecode import unidecode
 
 from tethne.readers import scopus
-from tethne import Corpus, Paper, Feature, FeatureSet
+from tethne import Corpus, Paper, Feature, FeatureSet, StreamingCorpus
 
 
 scopus_datapath = './tethne/tests/data/scopus.csv'
@@ -25,8 +25,6 @@ class MyTestCase(unittest.TestCase):
        datum = rawdata[1]
        self.rawdatum = {headers[i]:datum[i] for i in xrange(len(headers))}
 
-'''
-
     def test_reader(self):
         """
         PURPOSE : To test the Scopus reader functionality.
@@ -85,7 +83,75 @@ class MyTestCase(unittest.TestCase):
         paper['institutions'] = filter(None, paper['institutions'])
         self.assertGreater(len(paper['institutions']), 0)
 
-'''
+
+class TestScopusParser(unittest.TestCase):
+    def test_read(self):
+        corpus = scopus.read(scopus_datapath)
+        self.assertIsInstance(corpus, Corpus)
+        self.assertEqual(len(corpus), 20)
+        self.assertIn('authors', corpus.features)
+        self.assertIn('citations', corpus.features)
+
+        paper = corpus['2-s2.0-84937605616']
+        self.assertEqual(paper.date, 2015)
+        self.assertEqual(paper.journal, 'Ecological Indicators')
+        self.assertEqual(paper.authors_init[0], ('PAN', 'Y'))
+        self.assertEqual(len(paper.institutions), len(paper.authors_init))
+
+    def test_read_nocorpus(self):
+        papers = scopus.read(scopus_datapath, corpus=False)
+        self.assertIsInstance(papers, list)
+        self.assertEqual(len(papers), 20)
+        self.assertIsInstance(papers[0], Paper)
+
+    def test_read_streaming(self):
+        corpus = scopus.read(scopus_datapath, streaming=True, chunksize=3)
+        self.assertIsInstance(corpus, StreamingCorpus)
+        self.assertEqual(len(corpus), 20)
+
+    def test_chunks(self):
+        parser = scopus.ScopusParser(scopus_datapath)
+        chunks = list(parser.iter_chunks(chunksize=6))
+        self.assertEqual([len(chunk) for chunk in chunks], [6, 6, 6, 2])
+
+    def test_parse_only(self):
+        papers = scopus.read(scopus_datapath, corpus=False,
+                             parse_only=['title'])
+        for paper in papers:
+            self.assertEqual(set(paper.__dict__.keys()),
+                             set(['title', 'eid']))
+
+    def test_cited_references(self):
+        parser = scopus.ScopusParser(scopus_datapath)
+        citation = parser.parse_citation(
+            u'Adams, B., White, A., Lenton, T.M., An analysis of some diverse '
+            u'approaches to modelling terrestrial net primary productivity '
+            u'(2004) Ecol. Modell., 177 (3), pp. 353-391')
+        self.assertEqual(citation.authors_init,
+                         [('ADAMS', 'B'), ('WHITE', 'A'), ('LENTON', 'T M')])
+        self.assertTrue(citation.title.startswith('An analysis'))
+        self.assertEqual(citation.date, 2004)
+        self.assertEqual(citation.journal, 'Ecol. Modell.')
+        self.assertEqual(citation.volume, '177')
+        self.assertEqual(citation.issue, '3')
+        self.assertEqual(citation.pageStart, '353')
+        self.assertEqual(citation.pageEnd, '391')
+        self.assertEqual(citation.ayjid, 'ADAMS_B_2004_ECOL._MODELL.')
+
+    def test_unidentified_references(self):
+        """
+        References with no author, date, or source are dropped, rather than
+        becoming citations with an empty ``ayjid``\.
+        """
+        parser = scopus.ScopusParser(scopus_datapath)
+        self.assertIsNone(parser.parse_citation(u'Springer, Heidelberg'))
+
+        corpus = scopus.read(scopus_datapath)
+        self.assertNotIn(u'', corpus.features['citations'].lookup)
+        for paper in corpus.papers:
+            for citation in getattr(paper, 'citedReferences', []):
+                self.assertIsNotNone(citation)
+                self.assertNotEqual(citation.ayjid, u'')
 
 if __name__ == '__main__':
     unittest.main()
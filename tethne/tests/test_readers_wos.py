@@ -9,6 +9,7 @@ from tethne import Corpus, Paper, StreamingCorpus
 
 datapath = './tethne/tests/data/wos2.txt'
 datapath_v = './tethne/tests/data/valentin.txt'
+datadir = './tethne/tests/data'
 
 import sys
 PYTHON_3 = sys.version_info[0] == 3
@@ -194,6 +195,93 @@ class TestWoSParser(unittest.TestCase):
                 self.assertIsInstance(cr.date, int)
             self.assertTrue(hasattr(cr, 'journal'))
 
+    def test_parse_only(self):
+        """
+        Lines for fields that are not in ``parse_only`` should be skipped
+        without being decoded; the requested fields are unaffected.
+        """
+        fields = ['title', 'date', 'authors_full']
+        full = WoSParser(datapath).parse()
+
+        parser = WoSParser(datapath)
+        decoded = []
+        decode = parser._decode
+        parser._decode = lambda line: decoded.append(line) or decode(line)
+        data = parser.parse(parse_only=fields)
+
+        self.assertEqual(len(data), len(full))
+        for entry, full_entry in zip(data, full):
+            self.assertFalse(hasattr(entry, 'citedReferences'))
+            for field in fields:
+                self.assertEqual(getattr(entry, field, None),
+                                 getattr(full_entry, field, None))
+        self.assertFalse([line for line in decoded
+                          if line.startswith(('CR ', 'AB '))])
+
+class TestWoSReadDirectory(unittest.TestCase):
+    def test_read_parallel(self):
+        """
+        Parsing a directory in several worker processes should yield the same
+        papers, in the same order, as parsing it serially.
+        """
+        serial = read(datadir, corpus=False)
+        parallel = read(datadir, corpus=False, processes=2)
+
+        self.assertEqual(len(serial), len(parallel))
+        self.assertListEqual([p.wosid for p in serial],
+                             [p.wosid for p in parallel])
+
+    def test_read_parallel_corpus(self):
+        corpus = read(datadir, processes=2)
+        self.assertIsInstance(corpus, Corpus)
+        self.assertEqual(len(corpus), len(read(datadir)))
+
+
+class TestCitedReferences(unittest.TestCase):
+    def test_shared_citations(self):
+        """
+        Papers that cite the same reference should share a single citation
+        instance.
+        """
+        parser = WoSParser(datapath)
+        value = u'ADAMS SM, 1993, T AM FISH SOC, V122, P63'
+        citation = parser.handle_CR(value)
+        self.assertIs(parser.handle_CR(value), citation)
+
+        self.assertEqual(citation.authors_init, [(u'ADAMS', u'S M')])
+        self.assertEqual(citation.date, 1993)
+        self.assertEqual(citation.journal, u'T AM FISH SOC')
+        self.assertEqual(citation.volume, u'122')
+        self.assertEqual(citation.pageStart, u'63')
+        self.assertIsNone(citation.doi)
+
+    def test_not_shared_between_reads(self):
+        """
+        Separate reads should not share (mutable) citation instances.
+        """
+        value = u'ADAMS SM, 1993, T AM FISH SOC, V122, P63'
+        citation = WoSParser(datapath).handle_CR(value)
+        other = WoSParser(datapath).handle_CR(value)
+        self.assertIsNot(other, citation)
+        citation.journal = u'CHANGED'
+        self.assertEqual(other.journal, u'T AM FISH SOC')
+
+        corpus, other = read(datapath), read(datapath)
+        paper = [paper for paper in corpus.papers
+                 if getattr(paper, 'citedReferences', None)][0]
+        citations = set(map(id, paper.citedReferences))
+        for cited in other.indexed_papers[paper.wosid].citedReferences:
+            self.assertNotIn(id(cited), citations)
+
+    def test_doi(self):
+        parser = WoSParser(datapath)
+        citation = parser.handle_CR(u'Bodin N, 2004, COMP BIOCHEM PHYS C,' +
+                                    u' V138, P411, DOI 10.1016/j.cca.2004.04.009')
+        self.assertEqual(citation.doi, u'10.1016/j.cca.2004.04.009')
+        self.assertEqual(citation.volume, u'138')
+        self.assertEqual(citation.pageStart, u'411')
+
+
 class TestWithStarCR(unittest.TestCase):
     def setUp(self):
         class TestParser(WoSParser):
@@ -2,9 +2,13 @@ import sys
 sys.path.append('../tethne')
 
 import re
+import shutil
+import tempfile
 
 import unittest
-from tethne.readers.zotero import read, ZoteroParser, _infer_spaces
+from tethne.readers.zotero import read, ZoteroParser, StreamingZoteroParser, \
+                                  _infer_spaces, extract_full_text
+from tethne.readers.cache import ParseCache
 from tethne import Corpus, Paper, StructuredFeatureSet
 
 import sys
@@ -53,6 +57,30 @@ class TestZoteroParserWithFiles(unittest.TestCase):
         particular dataset.
         """)
 
+    def test_read_pdf_parallel(self):
+        """
+        Full-text content can be extracted in several processes, and cached.
+        """
+        temp = tempfile.mkdtemp()
+        try:
+            for i in range(2):
+                corpus = read(datapath3, follow_links=True, processes=2,
+                              cache=ParseCache(temp))
+                self.assertEqual(len(corpus.features['pdf_text']), 7)
+        finally:
+            shutil.rmtree(temp)
+
+    def test_extract_full_text_missing(self):
+        """
+        Links to files that do not exist are ignored.
+        """
+        papers = read(datapath3, corpus=False)
+        for paper in papers:
+            paper.link = paper.link + '.missing'
+        self.assertEqual(extract_full_text(papers), {})
+        for paper in papers:
+            self.assertIsInstance(paper.link, list)
+
 
 class TestZoteroDuplicates(unittest.TestCase):
     def test_duplicate_Papers_length(self):
@@ -205,5 +233,35 @@ class TestZoteroParser(unittest.TestCase):
         self.assertEqual(N, 12, 'Expected 12 entries, found {0}.'.format(N))
 
 
+class TestStreamingZoteroParser(unittest.TestCase):
+    def _values(self, papers):
+        def norm(value):    # Triple order is arbitrary in an rdflib Graph.
+            if type(value) is list:
+                return sorted(value)
+            return value
+        return sorted([dict([(k, norm(v)) for k, v in p.__dict__.iteritems()])
+                       for p in papers])
+
+    def test_parse(self):
+        """
+        Should produce the same Papers as :class:`.ZoteroParser`\.
+        """
+        for path in [datapath, datapath2, datapath3, duplicatePath]:
+            papers = ZoteroParser(path).parse()
+            streamed = StreamingZoteroParser(path).parse()
+            self.assertEqual(self._values(papers), self._values(streamed))
+
+    def test_links(self):
+        """
+        Relative links to attachments should be resolved against the location
+        of the RDF file.
+        """
+        papers = StreamingZoteroParser(datapath3).parse()
+        self.assertGreater(len(papers), 0)
+        for paper in papers:
+            link = paper.link
+            self.assertTrue(link.startswith('/'))
+
+
 if __name__ == '__main__':
     unittest.main()
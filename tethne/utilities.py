@@ -3,6 +3,7 @@ Helper functions.
 """
 import string
 import copy
+from multiprocessing import Pool
 
 import sys
 PYTHON_3 = sys.version_info[0] == 3
@@ -319,3 +320,29 @@ class Dictionary:
             return self.by_str[key]
         if type(key) == int:
             return self.by_int[key]
+
+
+def _parallel_imap(func, jobs, processes=1, chunksize=1):
+    """
+    Yields ``func(job)`` for each job in ``jobs``, in order.
+
+    If ``processes`` is greater than 1, jobs are dispatched to a pool of that
+    many worker processes; ``func`` must then be a module-level function.
+    """
+    jobs = list(jobs)
+    if processes > 1 and len(jobs) > 1:
+        pool = Pool(min(processes, len(jobs)))
+        try:
+            # imap preserves the order of ``jobs``, so output is deterministic.
+            for result in pool.imap(func, jobs, chunksize=chunksize):
+                yield result
+        except:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+    else:
+        for job in jobs:
+            yield func(job)